@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for character assembly with the precomputed background table.
+
+Times assemble_character against the previous approach, which looked up
+BACKGROUND_TABLE and re-scanned and re-formatted every item per character.
+Both run on the same pre-rolled inputs, so only assembly is measured.
+
+Usage: python3 benchmarks/bench_background_table.py [N]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mausritter.data import (  # noqa: E402
+    BACKGROUND_TABLE, BIRTHSIGNS, COAT_COLORS, COAT_PATTERNS, FIRST_NAMES, LAST_NAMES,
+    PHYSICAL_DETAILS, WEAPONS,
+)
+from mausritter.generator import (  # noqa: E402
+    FALLBACK_BACKGROUND, WEAPON_CATEGORIES, assemble_character, format_item_text,
+)
+
+
+def legacy_assemble_character(attributes, hp, pips, additional_roll, birthsign_entry,
+                              coat_color, coat_pattern, detail_roll, first_name,
+                              last_name, category, weapon_data):
+    """assemble_character as it was before the precomputed background table."""
+    background, item_a, item_b = BACKGROUND_TABLE.get((hp, pips), FALLBACK_BACKGROUND)
+    highest_attr = max(attributes.values())
+    additional_items = []
+    if additional_roll is not None and highest_attr <= 9:
+        _, add_item_a, add_item_b = BACKGROUND_TABLE.get(additional_roll, FALLBACK_BACKGROUND)
+        additional_items.append(add_item_a)
+        if highest_attr <= 7:
+            additional_items.append(add_item_b)
+
+    birthsign, disposition = birthsign_entry
+    physical_detail = PHYSICAL_DETAILS[detail_roll]
+    weapon = f"{weapon_data[0]} ({category.capitalize()}, {weapon_data[1]})"
+    format_item_text(weapon)
+
+    inventory = {"main_paw": "Select weapon", "off_paw": "", "body": ["", ""], "pack": [""] * 6}
+    body_slot_idx = 0
+    pack_items = []
+    for item in ["Torches", "Rations", item_a, item_b] + additional_items:
+        formatted_item = format_item_text(item)
+        if "armour" in item.lower() or "armor" in item.lower() or "jerkin" in item.lower():
+            if body_slot_idx < 2:
+                inventory["body"][body_slot_idx] = formatted_item
+                body_slot_idx += 1
+            else:
+                pack_items.append(formatted_item)
+        else:
+            pack_items.append(formatted_item)
+    for idx, item in enumerate(pack_items[:6]):
+        inventory["pack"][idx] = item
+
+    equipment = ["Torches", "Rations", weapon, item_a, item_b] + additional_items
+    return {
+        "name": f"{first_name} {last_name}",
+        "attributes": {name: {"max": value, "current": value} for name, value in attributes.items()},
+        "hp": {"max": hp, "current": hp},
+        "pips": pips,
+        "pips_total": pips,
+        "background": background,
+        "level": 1,
+        "xp": 0,
+        "grit": 0,
+        "inventory": inventory,
+        "equipment": equipment,
+        "banked": {"items": [], "pips": 0},
+        "appearance": {
+            "birthsign": birthsign,
+            "disposition": disposition,
+            "coat": f"{coat_color}, {coat_pattern}",
+            "look": physical_detail,
+            "coat_color": coat_color,
+            "coat_pattern": coat_pattern,
+            "physical_detail": physical_detail,
+        },
+        "weapon": weapon,
+        "notes": "",
+        "conditions": [],
+    }
+
+
+def _roll_inputs(n):
+    """Pre-roll the arguments for n calls to assemble_character."""
+    rng = random.Random(1)
+    inputs = []
+    for _ in range(n):
+        attributes = {name: rng.randint(2, 12) for name in ("STR", "DEX", "WIL")}
+        category = rng.choice(WEAPON_CATEGORIES)
+        inputs.append((
+            attributes, rng.randint(1, 6), rng.randint(1, 6),
+            (rng.randint(1, 6), rng.randint(1, 6)), rng.choice(BIRTHSIGNS),
+            rng.choice(COAT_COLORS), rng.choice(COAT_PATTERNS),
+            rng.randint(1, 6) * 10 + rng.randint(1, 6), rng.choice(FIRST_NAMES),
+            rng.choice(LAST_NAMES), category, rng.choice(WEAPONS[category]),
+        ))
+    return inputs
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    inputs = _roll_inputs(n)
+
+    start = time.perf_counter()
+    for args in inputs:
+        legacy_assemble_character(*args)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for args in inputs:
+        assemble_character(*args)
+    table = time.perf_counter() - start
+
+    print(f"N = {n:,} characters")
+    print(f"  legacy assembly:         {legacy / n * 1e6:6.2f} us/char")
+    print(f"  precomputed table:       {table / n * 1e6:6.2f} us/char")
+    print(f"  gain:                    {(legacy - table) / n * 1e6:6.2f} us/char "
+          f"({legacy / table:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
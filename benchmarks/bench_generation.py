@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark character generation.
+Compares per-character generate_character calls against the batch API, both
+producing the finished character dicts the API returns. Also times laying
+out the same number of dicts from fixed pieces, the floor for any builder
+of finished characters: CPython allocating the ~15 dicts and lists of each
+character is most of what a batch character costs.
+
+Usage: python3 benchmarks/bench_generation.py [N]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mausritter import batch  # noqa: E402
+from mausritter.generator import build_character_dict, generate_character  # noqa: E402
+
+# Pieces of a typical mouse, for timing the dict layout alone
+_PARTS = (
+    "Ruth Baiter", 9, 8, 7, 4, 3, "Cheesemaker", ("", ""),
+    ("Cheese (1/3)", "Glue (1/3)", "", "", "", ""), ("Cheese", "Glue"),
+    "Star", "Brave / Reckless", "Brown, Solid", "Brown", "Solid", "Scarred body",
+    "Needle (Light, d6)",
+)
+
+
+def _time(func, repeat: int = 3) -> float:
+    """Return the best wall-clock time of ``repeat`` calls in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+        del result
+    return best
+
+
+def _layout(n: int) -> list:
+    """n character dicts from fixed pieces, with the GC paused as the batch does."""
+    with batch._gc_paused():
+        return [build_character_dict(*_PARTS) for _ in range(n)]
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    backend = "numpy" if batch.np is not None else "pure Python"
+
+    single = _time(lambda: [generate_character() for _ in range(n)])
+    built = _time(lambda: list(batch.generate_characters(n, seed=1)))
+    rolled = _time(lambda: batch.generate_characters(n, seed=1))
+    floor = _time(lambda: _layout(n))
+
+    print(f"N = {n:,} finished characters (batch backend: {backend})")
+    print(f"  generate_character loop:  {single:8.3f}s  ({single / n * 1e6:6.2f} us/char)")
+    print(f"  generate_characters:      {built:8.3f}s  ({built / n * 1e6:6.2f} us/char, "
+          f"{single / built:.1f}x faster)")
+    print(f"    of which rolling dice:  {rolled:8.3f}s")
+    print(f"  dict layout alone:        {floor:8.3f}s  ({floor / n * 1e6:6.2f} us/char, "
+          f"at most {single / floor:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
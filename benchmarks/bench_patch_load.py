@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Load test for character edits against a running GM server.
+
+Starts ``run_server.py`` on a spare port with Flask's development server,
+in production mode (both keeping sessions in memory) and as one worker
+process per core sharing an SQLite database, gives each simulated player a
+character of their own, and has every player PATCH it over a keep-alive
+connection as fast as the server answers. Prints requests per second and
+latency percentiles for each mode.
+
+The players are threads in this process, so on a small machine they share
+the CPU with the server; compare the modes with each other rather than
+with numbers from elsewhere.
+
+Usage: python3 benchmarks/bench_patch_load.py [CLIENTS] [SECONDS] [dev|production|workers]...
+"""
+
+import http.client
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+MODES = ("dev", "production", "workers")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server(mode: str, port: int, clients: int, data_dir: str):
+    """Start the server and return (process, GM token) once it's listening."""
+    args = [sys.executable, "-u", str(ROOT / "run_server.py"), "--port", str(port)]
+    if mode == "workers":
+        workers = os.cpu_count() or 1
+        args += ["--production", "--sqlite", "--data-dir", data_dir, "--workers", str(workers),
+                 "--threads", str(clients // workers + 16)]
+    else:
+        args.append("--memory")
+    if mode == "production":
+        args += ["--production", "--threads", str(clients + 16)]
+    server = subprocess.Popen(
+        args, cwd=ROOT, stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL, text=True,
+    )
+    token = None
+    for line in server.stdout:
+        found = re.search(r"/gm\?token=(\S+)", line)
+        if found:
+            token = found.group(1)
+        if line.startswith("Press Ctrl+C"):
+            break
+    if token is None:
+        server.kill()
+        raise RuntimeError(f"{mode} server didn't start")
+    # Let the output drain so the server never blocks on a full pipe
+    threading.Thread(target=server.stdout.read, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server, token
+        except OSError:
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError(f"{mode} server isn't listening")
+
+
+def _request(connection, method, path, body=None, headers=None):
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    return response.status, response.read()
+
+
+def _player(port, char_id, token, stop, latencies, errors):
+    """Edit one character until told to stop, timing each PATCH."""
+    path = f"/api/characters/{char_id}?token={token}"
+    headers = {"Content-Type": "application/json-patch+json"}
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    n = 0
+    while not stop.is_set():
+        n += 1
+        body = json.dumps([{"op": "replace", "path": "/notes", "value": f"edit {n}"}])
+        start = time.perf_counter()
+        try:
+            status, _ = _request(connection, "PATCH", path, body, headers)
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            connection.close()
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(status)
+    connection.close()
+
+
+def run(mode: str, clients: int, seconds: float):
+    """Load one server mode; returns (requests/sec, latencies, errors)."""
+    port = _free_port()
+    data_dir = tempfile.TemporaryDirectory()
+    server, gm_token = _start_server(mode, port, clients, data_dir.name)
+    try:
+        setup = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        players = []
+        for i in range(clients):
+            _, body = _request(
+                setup, "POST", f"/api/characters?token={gm_token}",
+                json.dumps({"name": f"Mouse {i}", "notes": ""}),
+                {"Content-Type": "application/json"},
+            )
+            character = json.loads(body)["character"]
+            players.append((character["id"], character["player_token"]))
+        setup.close()
+
+        stop = threading.Event()
+        latencies, errors = [], []
+        threads = [
+            threading.Thread(target=_player, args=(port, char_id, token, stop, latencies, errors))
+            for char_id, token in players
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return len(latencies) / seconds, sorted(latencies), len(errors)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+        data_dir.cleanup()
+
+
+def _percentile(latencies, p):
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else 0.0
+
+
+def main() -> None:
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10.0
+    modes = sys.argv[3:] or MODES
+
+    print(f"{clients} clients, {seconds:g}s of PATCH /api/characters/<id> each")
+    print(f"{'server':>10}  {'req/s':>8}  {'p50':>8}  {'p95':>8}  {'p99':>8}  {'errors':>6}")
+    for mode in modes:
+        rate, latencies, errors = run(mode, clients, seconds)
+        p50, p95, p99 = (_percentile(latencies, p) * 1e3 for p in (0.5, 0.95, 0.99))
+        print(f"{mode:>10}  {rate:>8.0f}  {p50:>6.1f}ms  {p95:>6.1f}ms  {p99:>6.1f}ms  {errors:>6}")
+
+
+if __name__ == "__main__":
+    main()
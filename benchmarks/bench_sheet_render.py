@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for rendering character sheets.
+
+Times generate_character_sheet_html with the game data bundle, sheet
+script and compiled page rebuilt for every sheet (as before they were
+cached) against the cached versions, for standalone sheets (which inline
+the script) and server sheets (which link it). Also times building the
+sheet script alone.
+
+Usage: python3 benchmarks/bench_sheet_render.py [SHEETS]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mausritter.data import tables_changed  # noqa: E402
+from mausritter.generator import generate_character  # noqa: E402
+from mausritter.templates.html_template import (  # noqa: E402
+    _page_template,
+    generate_character_sheet_html,
+)
+from mausritter.templates.js import get_javascript_code  # noqa: E402
+
+
+def _time_per_call(render, count, rebuild):
+    render()
+    start = time.perf_counter()
+    for _ in range(count):
+        if rebuild:
+            tables_changed()
+            _page_template.cache_clear()
+        render()
+    return (time.perf_counter() - start) / count
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    character = generate_character()
+    character.update(id="char_001", player_token="token", version=1)
+
+    cases = {
+        "sheet script": get_javascript_code,
+        "standalone sheet": lambda: generate_character_sheet_html(character),
+        "server sheet": lambda: generate_character_sheet_html(
+            character, server_mode=True, token="token", version=1
+        ),
+    }
+    print(f"{'render':>16}  {'rebuilt':>10}  {'cached':>10}  {'speedup':>8}")
+    for name, render in cases.items():
+        rebuilt = _time_per_call(render, count, rebuild=True)
+        cached = _time_per_call(render, count, rebuild=False)
+        print(f"{name:>16}  {rebuilt * 1e3:>8.3f}ms  {cached * 1e3:>8.3f}ms  {rebuilt / cached:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
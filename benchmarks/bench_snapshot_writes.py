@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for single-character writes against session size.
+
+Every write publishes a new SessionSnapshot whose character map is a
+shallow copy of the last one, made under the session's root lock, so a
+write costs O(number of characters) on top of the merge itself. This
+times update_character on an in-memory session (no log, so the copy
+isn't hidden behind an fsync) and the map copy alone, for sessions of
+increasing size.
+
+Usage: python3 benchmarks/bench_snapshot_writes.py [WRITES]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mausritter.generator import generate_character  # noqa: E402
+from mausritter.server.session import GameSession  # noqa: E402
+
+SIZES = (10, 100, 1_000, 10_000)
+
+
+def _per_call(func, calls):
+    start = time.perf_counter()
+    for n in range(calls):
+        func(n)
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+
+    print(f"{'characters':>10}  {'write':>10}  {'map copy':>10}  {'copy share':>10}")
+    for size in SIZES:
+        session = GameSession()
+        for _ in range(size):
+            session.add_character(generate_character())
+        char_id = next(iter(session.get_all_characters()))
+
+        write = _per_call(
+            lambda n: session.update_character(char_id, {"hp": {"current": n % 6}}), writes
+        )
+        characters = session.get_all_characters()
+        copy = _per_call(lambda n: dict(characters), writes)
+        print(f"{size:>10,}  {write * 1e6:>8.2f}us  {copy * 1e6:>8.2f}us  {copy / write:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
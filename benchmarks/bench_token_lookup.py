@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for player token lookups in GameSession.
+
+Times get_character_by_token against the previous linear scan over every
+character, for sessions of increasing size. With the token index the
+lookup cost should stay flat as the session grows.
+
+Usage: python3 benchmarks/bench_token_lookup.py [LOOKUPS]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mausritter.server.session import GameSession  # noqa: E402
+
+SIZES = (10, 100, 1_000, 10_000)
+
+
+def legacy_get_character_by_token(session, token):
+    """get_character_by_token as it was before the token index."""
+    for char in session.get_all_characters().values():
+        if char.get("player_token") == token:
+            return char
+    return None
+
+
+def _time_lookups(lookup, tokens):
+    start = time.perf_counter()
+    for token in tokens:
+        lookup(token)
+    return (time.perf_counter() - start) / len(tokens)
+
+
+def main() -> None:
+    lookups = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    rng = random.Random(1)
+
+    print(f"{'characters':>10}  {'scan':>10}  {'index':>10}")
+    for size in SIZES:
+        session = GameSession()
+        for i in range(size):
+            session.add_character({"name": f"Mouse {i}"})
+        all_tokens = [char["player_token"] for char in session.get_all_characters().values()]
+        tokens = [rng.choice(all_tokens) for _ in range(lookups)]
+
+        scan = _time_lookups(lambda t: legacy_get_character_by_token(session, t), tokens)
+        index = _time_lookups(session.get_character_by_token, tokens)
+        print(f"{size:>10,}  {scan * 1e6:>8.2f}us  {index * 1e6:>8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
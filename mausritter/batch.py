@@ -0,0 +1,384 @@
+"""
+Batch character generation for Mausritter.
+
+Draws every die for N characters at once into column arrays, then builds the
+character dicts lazily. Uses NumPy when it is installed and falls back to the
+standard library otherwise.
+"""
+
+import gc
+import hashlib
+import itertools
+import random
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+from .data import (
+    BIRTHSIGNS,
+    COAT_COLORS,
+    COAT_PATTERNS,
+    FIRST_NAMES,
+    LAST_NAMES,
+    PHYSICAL_DETAILS,
+    WEAPONS,
+    on_tables_changed,
+)
+from .generator import WEAPON_CATEGORIES, build_character_dict, lookup_background
+
+# Number of weapons in each category, in WEAPON_CATEGORIES order
+WEAPON_COUNTS = [len(WEAPONS[category]) for category in WEAPON_CATEGORIES]
+
+_D6_FACES = range(1, 7)
+
+# Characters rolled per batch when streaming; bounds memory use
+BATCH_SIZE = 10_000
+
+# Characters built per garbage collector pause
+_BUILD_CHUNK = 10_000
+
+# Kit variants per background roll: no extra items, or item A / items A and B
+# from each of the 36 second rolls
+_KIT_VARIANTS = 1 + 36 * 2
+
+
+class CharacterBatch(Sequence):
+    """A batch of rolled characters stored as columns of dice results.
+
+    Indexing or iterating builds the same dicts ``generate_character`` returns.
+    The raw columns (``attributes``, ``hp``, ``pips``, ...) stay available for
+    callers that only need the numbers.
+    """
+
+    def __init__(self, columns: Dict[str, Any]):
+        self.columns = columns
+        self._size = len(columns["hp"])
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._build(range(*index.indices(self._size))))
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("character index out of range")
+        return next(self._build([index]))
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self._build(None)
+
+    def _build(self, rows: Optional[Sequence[int]]) -> Iterator[Dict[str, Any]]:
+        """Build the characters at ``rows`` (all of them if None).
+
+        Everything a character's strings and lists depend on is reduced to a
+        few table indices per row, computed for the whole batch at once, so
+        building a character is only looking its pieces up. Characters are
+        built a chunk at a time with the cyclic garbage collector paused:
+        they hold no cycles, and otherwise the collector rescans every
+        character still alive each time a chunk's worth is allocated.
+        """
+        cols = self.columns
+        if rows is not None:
+            cols = {name: _take(col, rows) for name, col in cols.items()}
+        kits, weapons = _kit_and_weapon_indices(cols)
+        tables = _assembly_tables()
+        row_values = zip(
+            _to_list(cols["attributes"]), _to_list(cols["hp"]), _to_list(cols["pips"]),
+            kits, weapons, _to_list(cols["birthsign"]), _to_list(cols["coat_color"]),
+            _to_list(cols["coat_pattern"]), _to_list(cols["detail_roll"]),
+            _to_list(cols["first_name"]), _to_list(cols["last_name"]),
+        )
+        while True:
+            with _gc_paused():
+                chunk = [
+                    _build_character(tables, *attrs, *rest)
+                    for attrs, *rest in itertools.islice(row_values, _BUILD_CHUNK)
+                ]
+            if not chunk:
+                return
+            yield from chunk
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Pause automatic garbage collection for the block, if it was on."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _to_list(column: Any) -> List[Any]:
+    """Convert a NumPy array to nested Python lists; leave lists untouched."""
+    return column.tolist() if hasattr(column, "tolist") else column
+
+
+def _take(column: Any, rows: Sequence[int]) -> Any:
+    """The entries of a column at ``rows``."""
+    if hasattr(column, "tolist"):
+        return column[list(rows)]
+    return [column[i] for i in rows]
+
+
+class _AssemblyTables(NamedTuple):
+    """Every finished string and list a character is built from, by table index."""
+
+    # By kit index: (background, body slots, pack slots, equipment after the weapon)
+    kits: List[Tuple[str, Tuple[str, ...], Tuple[str, ...], Tuple[str, ...]]]
+    # By flat weapon index: the weapon as shown on the sheet
+    weapons: List[str]
+    # First flat weapon index of each category, in WEAPON_CATEGORIES order
+    weapon_offsets: List[int]
+    # By coat_color * len(COAT_PATTERNS) + coat_pattern
+    coats: List[str]
+
+
+_tables: Optional[_AssemblyTables] = None
+
+
+def _forget_tables() -> None:
+    global _tables
+    _tables = None
+    WEAPON_COUNTS[:] = [len(WEAPONS[category]) for category in WEAPON_CATEGORIES]
+
+
+# Registered after the generator's hook, so WEAPON_CATEGORIES is already new
+on_tables_changed(_forget_tables)
+
+
+def _build_kit(hp: int, pips: int, extra: Optional[Tuple[int, int, bool]]):
+    """Background, slots and equipment for one background roll and bonus roll.
+
+    ``extra`` is the bonus (HP, Pips) roll and whether both of its items are
+    granted, or None for a mouse without bonus items. Mirrors
+    ``assemble_character``.
+    """
+    entry = lookup_background(hp, pips)
+    body = list(entry.body)
+    pack = list(entry.pack)
+    additional_items = []
+    if extra is not None:
+        extra_hp, extra_pips, both = extra
+        items = lookup_background(extra_hp, extra_pips).items
+        for item, formatted_item, armour in (items if both else items[:1]):
+            additional_items.append(item)
+            if armour and len(body) < 2:
+                body.append(formatted_item)
+            else:
+                pack.append(formatted_item)
+    del pack[6:]
+    return (
+        entry.background,
+        tuple(body + [""] * (2 - len(body))),
+        tuple(pack + [""] * (6 - len(pack))),
+        (entry.item_a, entry.item_b, *additional_items),
+    )
+
+
+def _assembly_tables() -> _AssemblyTables:
+    """Build (once) the lookup tables character assembly reads."""
+    global _tables
+    tables = _tables
+    if tables is None:
+        extras = [None] + [
+            (extra_hp, extra_pips, both)
+            for extra_hp in range(1, 7) for extra_pips in range(1, 7) for both in (False, True)
+        ]
+        kits = [
+            _build_kit(hp, pips, extra)
+            for hp in range(1, 7) for pips in range(1, 7) for extra in extras
+        ]
+        weapons, offsets = [], []
+        for category in WEAPON_CATEGORIES:
+            offsets.append(len(weapons))
+            weapons.extend(
+                f"{weapon[0]} ({category.capitalize()}, {weapon[1]})"
+                for weapon in WEAPONS[category]
+            )
+        coats = [f"{color}, {pattern}" for color in COAT_COLORS for pattern in COAT_PATTERNS]
+        tables = _tables = _AssemblyTables(kits, weapons, offsets, coats)
+    return tables
+
+
+def _kit_and_weapon_indices(cols: Dict[str, Any]) -> Tuple[List[int], List[int]]:
+    """Each row's kit index and flat weapon index, computed column-wise."""
+    offsets = _assembly_tables().weapon_offsets
+    if np is not None and hasattr(cols["hp"], "dtype"):
+        highest = cols["attributes"].max(axis=1).astype(np.int32)
+        background = (cols["hp"].astype(np.int32) - 1) * 6 + (cols["pips"] - 1)
+        bonus = (cols["additional_hp"].astype(np.int32) - 1) * 6 + (cols["additional_pips"] - 1)
+        extra = np.where(highest > 9, 0, 1 + bonus * 2 + (highest <= 7))
+        kits = background * _KIT_VARIANTS + extra
+        weapons = np.asarray(offsets, dtype=np.int32)[cols["weapon_category"]] + cols["weapon"]
+        return kits.tolist(), weapons.tolist()
+
+    kits = []
+    for attrs, hp, pips, add_hp, add_pips in zip(
+        cols["attributes"], cols["hp"], cols["pips"],
+        cols["additional_hp"], cols["additional_pips"],
+    ):
+        highest = max(attrs)
+        extra = 0 if highest > 9 else 1 + ((add_hp - 1) * 6 + add_pips - 1) * 2 + (highest <= 7)
+        kits.append(((hp - 1) * 6 + pips - 1) * _KIT_VARIANTS + extra)
+    weapons = [offsets[c] + w for c, w in zip(cols["weapon_category"], cols["weapon"])]
+    return kits, weapons
+
+
+def _build_character(tables, strength, dex, wil, hp, pips, kit, weapon, sign, color,
+                     pattern, detail, first, last) -> Dict[str, Any]:
+    """Build one character dict from table indices; same result as assemble_character."""
+    background, body, pack, items = tables.kits[kit]
+    weapon = tables.weapons[weapon]
+    birthsign, disposition = BIRTHSIGNS[sign]
+    physical_detail = PHYSICAL_DETAILS[detail]
+    return build_character_dict(
+        f"{FIRST_NAMES[first]} {LAST_NAMES[last]}", strength, dex, wil, hp, pips,
+        background, body, pack, items, birthsign, disposition,
+        tables.coats[color * len(COAT_PATTERNS) + pattern], COAT_COLORS[color],
+        COAT_PATTERNS[pattern], physical_detail, weapon,
+    )
+
+
+def _roll_numpy(n: int, seed: Optional[int]) -> Dict[str, Any]:
+    """Draw all dice for n characters as NumPy arrays."""
+    rng = np.random.default_rng(seed)
+
+    # 3d6 keep the two highest, for each of STR/DEX/WIL
+    dice = rng.integers(1, 7, size=(n, 3, 3), dtype=np.int16)
+    attributes = dice.sum(axis=2) - dice.min(axis=2)
+
+    d6 = rng.integers(1, 7, size=(6, n), dtype=np.int16)
+    category = rng.integers(0, len(WEAPON_CATEGORIES), size=n, dtype=np.int16)
+    counts = np.asarray(WEAPON_COUNTS, dtype=np.int16)
+
+    return {
+        "attributes": attributes,
+        "hp": d6[0],
+        "pips": d6[1],
+        # Rolled for every mouse, only used when the highest attribute is <= 9
+        "additional_hp": d6[2],
+        "additional_pips": d6[3],
+        "birthsign": rng.integers(0, len(BIRTHSIGNS), size=n, dtype=np.int16),
+        "coat_color": rng.integers(0, len(COAT_COLORS), size=n, dtype=np.int16),
+        "coat_pattern": rng.integers(0, len(COAT_PATTERNS), size=n, dtype=np.int16),
+        "detail_roll": d6[4] * 10 + d6[5],
+        "first_name": rng.integers(0, len(FIRST_NAMES), size=n, dtype=np.int16),
+        "last_name": rng.integers(0, len(LAST_NAMES), size=n, dtype=np.int16),
+        "weapon_category": category,
+        "weapon": rng.integers(0, counts[category], dtype=np.int16),
+    }
+
+
+def _roll_python(n: int, seed: Optional[int]) -> Dict[str, Any]:
+    """Draw all dice for n characters as plain lists (no NumPy)."""
+    rng = random.Random(seed)
+    choices = rng.choices
+
+    dice = choices(_D6_FACES, k=9 * n)
+    attributes = []
+    for i in range(0, 9 * n, 9):
+        row = []
+        for j in range(i, i + 9, 3):
+            a, b, c = dice[j], dice[j + 1], dice[j + 2]
+            row.append(a + b + c - min(a, b, c))
+        attributes.append(row)
+
+    tens = choices(_D6_FACES, k=n)
+    ones = choices(_D6_FACES, k=n)
+    category = choices(range(len(WEAPON_CATEGORIES)), k=n)
+    rand = rng.random
+
+    return {
+        "attributes": attributes,
+        "hp": choices(_D6_FACES, k=n),
+        "pips": choices(_D6_FACES, k=n),
+        "additional_hp": choices(_D6_FACES, k=n),
+        "additional_pips": choices(_D6_FACES, k=n),
+        "birthsign": choices(range(len(BIRTHSIGNS)), k=n),
+        "coat_color": choices(range(len(COAT_COLORS)), k=n),
+        "coat_pattern": choices(range(len(COAT_PATTERNS)), k=n),
+        "detail_roll": [t * 10 + o for t, o in zip(tens, ones)],
+        "first_name": choices(range(len(FIRST_NAMES)), k=n),
+        "last_name": choices(range(len(LAST_NAMES)), k=n),
+        "weapon_category": category,
+        "weapon": [int(rand() * WEAPON_COUNTS[c]) for c in category],
+    }
+
+
+def generate_characters(n: int, seed: Optional[int] = None) -> CharacterBatch:
+    """Generate n characters at once.
+
+    Each character follows the same rules and distributions as
+    ``generate_character``. The same seed gives the same batch, but NumPy and
+    the pure-Python fallback produce different batches for a given seed.
+
+    Args:
+        n: Number of characters to generate
+        seed: Optional seed for a reproducible batch
+
+    Returns:
+        A CharacterBatch that yields character dicts
+    """
+    if n < 0:
+        raise ValueError("n must not be negative")
+    if np is not None:
+        return CharacterBatch(_roll_numpy(n, seed))
+    return CharacterBatch(_roll_python(n, seed))
+
+
+def derive_seed(seed: int, index: int) -> int:
+    """Derive an independent 64-bit seed for batch number ``index``.
+
+    The result depends only on the master seed and the batch index, so a
+    stream cut into batches is reproducible however the batches are produced.
+    """
+    digest = hashlib.blake2b(f"{seed}:{index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def plan_batches(count: int, seed: Optional[int] = None,
+                 batch_size: int = BATCH_SIZE) -> Iterator[Tuple[int, int]]:
+    """Yield ``(seed, size)`` for each batch of a ``count``-character run.
+
+    Batch i is rolled with ``derive_seed(seed, i)``; without a seed a random
+    master seed is picked once for the whole run. The plan depends only on
+    the arguments, so batches can be rolled in any process and any order.
+    """
+    if count < 0:
+        raise ValueError("count must not be negative")
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    for index, start in enumerate(range(0, count, batch_size)):
+        yield derive_seed(seed, index), min(batch_size, count - start)
+
+
+def iter_batches(count: int, seed: Optional[int] = None,
+                 batch_size: int = BATCH_SIZE) -> Iterator[CharacterBatch]:
+    """Yield ``count`` characters as consecutive batches of ``batch_size``.
+
+    Only one batch is held in memory at a time.
+    """
+    for batch_seed, size in plan_batches(count, seed, batch_size):
+        yield generate_characters(size, seed=batch_seed)
+
+
+def iter_characters(count: int, seed: Optional[int] = None,
+                    batch_size: int = BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+    """Yield ``count`` character dicts, rolling them a batch at a time."""
+    for characters in iter_batches(count, seed, batch_size):
+        yield from characters
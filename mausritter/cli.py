@@ -0,0 +1,123 @@
+"""
+Command-line interface for headless character generation.
+
+Usage:
+    python -m mausritter generate --count 1000 --format ndjson --seed 42
+    python -m mausritter generate --count 1000000 --workers 8 --seed 42
+"""
+
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+from .batch import BATCH_SIZE, generate_characters, plan_batches
+from .export import FORMATS, render_batch, write_stream
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="python -m mausritter",
+        description="Mausritter character tools.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate = subparsers.add_parser(
+        "generate",
+        help="Generate characters and stream them as text",
+        description="Generate characters without opening a browser.",
+    )
+    generate.add_argument(
+        "--count", "-n", type=int, default=1,
+        help="Number of characters to generate (default: 1)",
+    )
+    generate.add_argument(
+        "--format", "-f", choices=FORMATS, default="ndjson",
+        help="Output format (default: ndjson)",
+    )
+    generate.add_argument(
+        "--seed", type=int, default=None,
+        help="Master seed for a reproducible run",
+    )
+    generate.add_argument(
+        "--output", "-o", default=None,
+        help="File to write to (default: stdout)",
+    )
+    generate.add_argument(
+        "--workers", "-w", type=int, default=1,
+        help="Worker processes to generate with (default: 1)",
+    )
+    return parser
+
+
+def _render_job(fmt: str, seed: int, size: int) -> str:
+    """Roll and render one batch. Runs in a worker process."""
+    return render_batch(generate_characters(size, seed=seed), fmt)
+
+
+def _render_batches(count: int, fmt: str, seed: Optional[int], workers: int,
+                    batch_size: int) -> Iterator[str]:
+    """Yield the rendered text of each batch, in batch order.
+
+    With several workers, batches are rendered in a process pool. At most
+    two batches per worker are in flight, so memory stays bounded, and
+    results are yielded in submission order, so the output is identical
+    whatever the worker count.
+    """
+    plan = plan_batches(count, seed, batch_size)
+    if workers <= 1:
+        for batch_seed, size in plan:
+            yield _render_job(fmt, batch_seed, size)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch_seed, size in plan:
+            pending.append(pool.submit(_render_job, fmt, batch_seed, size))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def generate(count: int, fmt: str, seed: Optional[int], out, workers: int = 1,
+             batch_size: int = BATCH_SIZE) -> None:
+    """Stream ``count`` characters in ``fmt`` to the text stream ``out``.
+
+    Args:
+        count: Number of characters to generate
+        fmt: One of FORMATS
+        seed: Master seed, or None for a random run
+        out: Text stream to write to
+        workers: Number of worker processes
+        batch_size: Characters per batch; part of what the seed reproduces
+    """
+    write_stream(_render_batches(count, fmt, seed, workers, batch_size), fmt, out)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the command-line interface. Returns the exit code."""
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+
+    if args.count < 0:
+        parser.error("--count must not be negative")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8", newline="") as out:
+            generate(args.count, args.format, args.seed, out, args.workers)
+        return 0
+
+    try:
+        generate(args.count, args.format, args.seed, sys.stdout, args.workers)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # Output was piped into something like `head`; stop quietly
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+    return 0
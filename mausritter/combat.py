@@ -0,0 +1,268 @@
+"""
+Monte Carlo combat simulation for encounter balancing.
+
+Runs many independent fights between a party and a group of creatures,
+following the SRD 2.3 combat rules:
+
+- Party members who pass a DEX save act before their opponents; the order
+  is kept for the rest of the fight.
+- Attacks always hit: roll the weapon die, minus the target's armour.
+- Damage comes off HP first, then STR. After taking STR damage the target
+  makes a STR save; on a failure it takes critical damage and is out of the
+  fight (incapacitated). A creature reduced to 0 STR is dead.
+
+Every fight is simulated at once as NumPy arrays; Python only loops over
+rounds and combatants, never over fights.
+"""
+
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional for the rest of the package
+    np = None
+
+# Fights still running after this many rounds are counted as draws
+MAX_ROUNDS = 100
+
+# Most fights accepted in one request to the server API
+MAX_API_FIGHTS = 1_000_000
+
+# Largest stat or damage die accepted; keeps the int16 fight arrays from overflowing
+MAX_STAT = 999
+
+_DIE = re.compile(r"d(\d+)")
+
+
+class Combatant(NamedTuple):
+    """Stat block for one side's fighter."""
+
+    name: str
+    hp: int
+    strength: int
+    dexterity: int = 10
+    armour: int = 0
+    damage: int = 6  # sides of the damage die
+
+
+def _parse_die(text: str, default: int = 6) -> int:
+    """Return the sides of the first die in text like 'Sword (Medium, d6/d8)'."""
+    match = _DIE.search(text or "")
+    return int(match.group(1)) if match else default
+
+
+def combatant_from_character(character: Dict[str, Any]) -> Combatant:
+    """Build a stat block from a character dict.
+
+    Uses current HP/STR/DEX, the weapon in the main paw (or the rolled
+    weapon) and 1 armour if any armour is worn.
+    """
+    attrs = character["attributes"]
+    inventory = character.get("inventory", {})
+    weapon = inventory.get("main_paw", "")
+    if not _DIE.search(weapon):
+        weapon = character.get("weapon", "")
+
+    worn = [inventory.get("off_paw", "")] + list(inventory.get("body", []))
+    armour = 1 if any("armour" in item.lower() for item in worn if item) else 0
+
+    try:
+        combatant = Combatant(
+            name=str(character.get("name", "Mouse")),
+            hp=int(character["hp"]["current"]),
+            strength=int(attrs["STR"]["current"]),
+            dexterity=int(attrs["DEX"]["current"]),
+            armour=armour,
+            damage=_parse_die(weapon),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid character: {e}") from None
+    if not _in_range(combatant):
+        raise ValueError(f"Stats out of range for {combatant.name}")
+    return combatant
+
+
+def combatant_from_dict(data: Dict[str, Any]) -> Combatant:
+    """Build a stat block from a JSON-style dict, e.g. from the API.
+
+    Accepts ``hp``, ``str``, ``dex``, ``armour`` and ``damage`` (a die such
+    as ``"d8"`` or a number of sides).
+
+    Raises:
+        ValueError: If ``data`` isn't a dict or a stat is missing or out of range
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"Invalid stat block: {data!r}")
+    try:
+        damage = data.get("damage", 6)
+        combatant = Combatant(
+            name=str(data.get("name", "Creature")),
+            hp=int(data["hp"]),
+            strength=int(data["str"]),
+            dexterity=int(data.get("dex", 10)),
+            armour=int(data.get("armour", 0)),
+            damage=_parse_die(damage) if isinstance(damage, str) else int(damage),
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid stat block: {e}") from None
+    if combatant.strength < 1 or not _in_range(combatant):
+        raise ValueError(f"Invalid stat block for {combatant.name}")
+    return combatant
+
+
+def _in_range(combatant: Combatant) -> bool:
+    """Whether every stat fits the fight arrays (0 to MAX_STAT, damage die at least 1)."""
+    stats = (combatant.hp, combatant.strength, combatant.dexterity, combatant.armour)
+    return min(stats) >= 0 and max(stats) <= MAX_STAT and 1 <= combatant.damage <= MAX_STAT
+
+
+class _Side:
+    """Per-fight state for one side: arrays of shape (fights, fighters)."""
+
+    def __init__(self, fighters: Sequence[Combatant], fights: int):
+        def column(values):
+            return np.tile(np.asarray(values, dtype=np.int16), (fights, 1))
+
+        self.hp = column([f.hp for f in fighters])
+        self.strength = column([f.strength for f in fighters])
+        self.armour = np.asarray([f.armour for f in fighters], dtype=np.int16)
+        self.damage = [f.damage for f in fighters]
+        self.dexterity = [f.dexterity for f in fighters]
+        self.standing = np.ones((fights, len(fighters)), dtype=bool)
+        self.dead = np.zeros((fights, len(fighters)), dtype=bool)
+
+
+def _attack(rng, attacker: _Side, index: int, defender: _Side, fights) -> None:
+    """Fighter ``index`` of ``attacker`` hits a random standing defender.
+
+    Only the fights listed in ``fights`` where the attacker is still
+    standing and the defender has someone left are affected.
+    """
+    can_act = attacker.standing[fights, index] & defender.standing[fights].any(axis=1)
+    rows = fights[can_act]
+    if rows.size == 0:
+        return
+
+    # Pick a random standing target per fight
+    if defender.standing.shape[1] == 1:
+        targets = np.zeros(rows.size, dtype=np.intp)
+    else:
+        keys = rng.random((rows.size, defender.standing.shape[1]), dtype=np.float32)
+        keys[~defender.standing[rows]] = -1.0
+        targets = keys.argmax(axis=1)
+
+    damage = rng.integers(1, attacker.damage[index] + 1, size=rows.size, dtype=np.int16)
+    damage = np.maximum(damage - defender.armour[targets], 0)
+
+    hp = defender.hp[rows, targets]
+    to_hp = np.minimum(damage, hp)
+    defender.hp[rows, targets] = hp - to_hp
+    to_str = damage - to_hp
+
+    hurt = to_str > 0
+    if not hurt.any():
+        return
+    rows, targets, to_str = rows[hurt], targets[hurt], to_str[hurt]
+    strength = defender.strength[rows, targets] - to_str
+    np.maximum(strength, 0, out=strength)
+    defender.strength[rows, targets] = strength
+
+    # STR save after STR damage: roll at or under the new STR to keep fighting
+    saved = rng.integers(1, 21, size=rows.size) <= strength
+    dead = strength == 0
+    out = dead | ~saved
+    defender.standing[rows[out], targets[out]] = False
+    defender.dead[rows[dead], targets[dead]] = True
+
+
+def simulate_combat(
+    party: Sequence[Union[Combatant, Dict[str, Any]]],
+    enemies: Sequence[Union[Combatant, Dict[str, Any]]],
+    fights: int = 10_000,
+    seed: Optional[int] = None,
+    max_rounds: int = MAX_ROUNDS,
+) -> Dict[str, Any]:
+    """Simulate ``fights`` independent encounters between party and enemies.
+
+    Args:
+        party: Party stat blocks (Combatant or dicts for combatant_from_dict)
+        enemies: Creature stat blocks
+        fights: Number of fights to simulate
+        seed: Optional seed for reproducible results
+        max_rounds: Fights still running after this many rounds are draws
+
+    Returns:
+        Dict with win/loss/draw rates, rounds to resolve and casualty
+        distributions (index i = probability that exactly i fighters fell)
+
+    Raises:
+        ImportError: If NumPy is not installed
+        ValueError: If a side is empty, a stat block is invalid or out of
+            range, or fights is not positive
+    """
+    if np is None:
+        raise ImportError("The combat simulator needs NumPy: pip install numpy")
+    party = [f if isinstance(f, Combatant) else combatant_from_dict(f) for f in party]
+    enemies = [f if isinstance(f, Combatant) else combatant_from_dict(f) for f in enemies]
+    if not party or not enemies:
+        raise ValueError("Both sides need at least one combatant")
+    for fighter in (*party, *enemies):
+        if not _in_range(fighter):
+            raise ValueError(f"Stats out of range for {fighter.name}")
+    if fights < 1:
+        raise ValueError("fights must be positive")
+
+    rng = np.random.default_rng(seed)
+    us = _Side(party, fights)
+    them = _Side(enemies, fights)
+
+    # DEX save for initiative, kept for the whole fight
+    dex = np.asarray(us.dexterity)
+    goes_first = rng.integers(1, 21, size=(fights, len(party))) <= dex
+
+    rounds = np.zeros(fights, dtype=np.int32)
+    fighting = np.arange(fights)
+    for round_number in range(1, max_rounds + 1):
+        rounds[fighting] = round_number
+        for i in range(len(party)):
+            _attack(rng, us, i, them, fighting[goes_first[fighting, i]])
+        for i in range(len(enemies)):
+            _attack(rng, them, i, us, fighting)
+        for i in range(len(party)):
+            _attack(rng, us, i, them, fighting[~goes_first[fighting, i]])
+
+        over = ~us.standing[fighting].any(axis=1) | ~them.standing[fighting].any(axis=1)
+        fighting = fighting[~over]
+        if fighting.size == 0:
+            break
+
+    party_up = us.standing.any(axis=1)
+    enemies_up = them.standing.any(axis=1)
+    won = party_up & ~enemies_up
+    lost = ~party_up & enemies_up
+    draw = ~(won | lost)
+
+    def distribution(counts: "np.ndarray", size: int) -> List[float]:
+        return (np.bincount(counts, minlength=size + 1) / fights).tolist()
+
+    return {
+        "fights": fights,
+        "party_win_rate": float(won.mean()),
+        "party_loss_rate": float(lost.mean()),
+        "draw_rate": float(draw.mean()),
+        "rounds": {
+            "mean": float(rounds.mean()),
+            "median": float(np.median(rounds)),
+            "max": int(rounds.max()),
+            "distribution": distribution(rounds, int(rounds.max()))[1:],
+        },
+        "party_casualties": {
+            "out_of_action": distribution((~us.standing).sum(axis=1), len(party)),
+            "dead": distribution(us.dead.sum(axis=1), len(party)),
+        },
+        "enemy_casualties": {
+            "out_of_action": distribution((~them.standing).sum(axis=1), len(enemies)),
+            "dead": distribution(them.dead.sum(axis=1), len(enemies)),
+        },
+    }
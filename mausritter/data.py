@@ -3,7 +3,9 @@ Game data tables for Mausritter character generation.
 Single source of truth for all character creation data.
 """
 
+import hashlib
 import json
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
 
 # Background table based on HP and Pips (from SRD 2.3)
 # Format: (HP, Pips) -> (Background, Item A, Item B)
@@ -386,9 +388,29 @@ def get_background_table_as_json() -> str:
     return json.dumps(js_table, ensure_ascii=False)
 
 
-def get_all_data_as_json() -> dict:
-    """Return all game data as a dictionary for JSON serialization."""
-    return {
+class DataBundle(NamedTuple):
+    """The game tables as sent to the browser, built once and reused.
+
+    Attributes:
+        tables: Every table by name, JSON-ready (treat as read-only)
+        json: Each table serialized
+        digest: Hash of the serialized tables; output built from them can
+            be cached under it
+    """
+
+    tables: Dict[str, Any]
+    json: Dict[str, str]
+    digest: str
+
+
+_bundle: Optional[DataBundle] = None
+
+# Called by tables_changed, for modules that precompute from the tables
+_change_hooks: List[Callable[[], None]] = []
+
+
+def _build_bundle() -> DataBundle:
+    tables = {
         "BACKGROUND_TABLE": {f"{hp},{pips}": list(val) for (hp, pips), val in BACKGROUND_TABLE.items()},
         "BIRTHSIGNS": BIRTHSIGNS,
         "COAT_COLORS": COAT_COLORS,
@@ -402,3 +424,44 @@ def get_all_data_as_json() -> dict:
         "HIRELING_DISPOSITIONS": HIRELING_DISPOSITIONS,
         "HIRELING_TYPES": HIRELING_TYPES,
     }
+    serialized = {name: json.dumps(table) for name, table in tables.items()}
+    digest = hashlib.sha256()
+    for name, text in serialized.items():
+        digest.update(f"{name}={text}\n".encode("utf-8"))
+    return DataBundle(tables, serialized, digest.hexdigest()[:16])
+
+
+def get_data_bundle() -> DataBundle:
+    """The tables and their serialized form, built on first use."""
+    global _bundle
+    bundle = _bundle
+    if bundle is None:
+        bundle = _bundle = _build_bundle()
+    return bundle
+
+
+def on_tables_changed(hook: Callable[[], None]) -> None:
+    """Have ``tables_changed`` call ``hook``, to rebuild what it precomputed."""
+    _change_hooks.append(hook)
+
+
+def tables_changed() -> None:
+    """Rebuild cached output after changing the tables at runtime.
+
+    Call this after loading custom tables into the module-level tables.
+    Everything cached from them is keyed by the bundle's digest, so the
+    sheet script and assets follow on their next use; the generator's
+    lookups (see ``on_tables_changed``) are rebuilt straight away.
+    """
+    global _bundle
+    _bundle = None
+    for hook in _change_hooks:
+        hook()
+
+
+def get_all_data_as_json() -> dict:
+    """Return all game data as a dictionary for JSON serialization.
+
+    Built once; treat the result as read-only.
+    """
+    return get_data_bundle().tables
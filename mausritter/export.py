@@ -0,0 +1,95 @@
+"""
+Text export formats for generated characters.
+
+Characters are rendered a batch at a time so large runs can be streamed
+without holding every character in memory.
+"""
+
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, List, TextIO
+
+FORMATS = ("ndjson", "csv", "json")
+
+# Flat columns for CSV output
+CSV_FIELDS = [
+    "name", "background", "STR", "DEX", "WIL", "hp", "pips",
+    "birthsign", "disposition", "coat", "look", "weapon", "equipment",
+]
+
+# Text written before the first record, between batches and after the last
+_HEADERS = {"ndjson": "", "csv": None, "json": "[\n"}
+_SEPARATORS = {"ndjson": "", "csv": "", "json": ",\n"}
+_FOOTERS = {"ndjson": "", "csv": "", "json": "\n]\n"}
+
+
+def character_to_row(character: Dict[str, Any]) -> List[Any]:
+    """Flatten a character into a list of values matching CSV_FIELDS."""
+    attrs = character["attributes"]
+    appearance = character["appearance"]
+    return [
+        character["name"],
+        character["background"],
+        attrs["STR"]["max"],
+        attrs["DEX"]["max"],
+        attrs["WIL"]["max"],
+        character["hp"]["max"],
+        character["pips"],
+        appearance["birthsign"],
+        appearance["disposition"],
+        appearance["coat"],
+        appearance["look"],
+        character["weapon"],
+        "; ".join(character["equipment"]),
+    ]
+
+
+def _csv_text(rows: Iterable[List[Any]]) -> str:
+    """Render rows as CSV text."""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+def render_batch(characters: Iterable[Dict[str, Any]], fmt: str) -> str:
+    """Render one batch of characters, without any header or separators."""
+    if fmt == "ndjson":
+        return "".join(json.dumps(character) + "\n" for character in characters)
+    if fmt == "csv":
+        return _csv_text(character_to_row(character) for character in characters)
+    if fmt == "json":
+        return ",\n".join(json.dumps(character) for character in characters)
+    raise ValueError(f"Unknown format: {fmt}")
+
+
+def write_stream(batches: Iterable[str], fmt: str, out: TextIO) -> None:
+    """Write rendered batches to ``out`` with the format's framing.
+
+    Args:
+        batches: Text of each batch, as returned by render_batch
+        fmt: One of FORMATS
+        out: Text stream to write to
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+
+    header = _HEADERS[fmt]
+    if header is None:
+        header = _csv_text([CSV_FIELDS])
+    out.write(header)
+
+    first = True
+    for text in batches:
+        if not text:
+            continue
+        if not first:
+            out.write(_SEPARATORS[fmt])
+        out.write(text)
+        first = False
+
+    if fmt == "json" and first:
+        # Empty array: drop the newline padding
+        out.write("]\n")
+    else:
+        out.write(_FOOTERS[fmt])
@@ -2,8 +2,7 @@
 Character generation logic for Mausritter.
 """
 
-import random
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence, Tuple
 
 from .data import (
     BACKGROUND_TABLE,
@@ -14,20 +13,29 @@ from .data import (
     FIRST_NAMES,
     LAST_NAMES,
     WEAPONS,
+    on_tables_changed,
 )
+from .rng import DEFAULT_RNG, DiceRNG
 
+# Weapon categories in table order, built once rather than per character
+WEAPON_CATEGORIES = list(WEAPONS.keys())
 
-def roll_dice(num_dice: int, sides: int) -> int:
+
+def roll_dice(num_dice: int, sides: int, rng: Optional[DiceRNG] = None) -> int:
     """Roll dice and return the sum."""
-    return sum(random.randint(1, sides) for _ in range(num_dice))
+    if rng is None:
+        rng = DEFAULT_RNG
+    return sum(rng.randint(1, sides) for _ in range(num_dice))
 
 
-def roll_attribute() -> int:
+def roll_attribute(rng: Optional[DiceRNG] = None) -> int:
     """Roll 3d6 and keep the two highest dice (per SRD 2.3 rules).
 
     Returns a value between 2-12.
     """
-    rolls = [random.randint(1, 6) for _ in range(3)]
+    if rng is None:
+        rng = DEFAULT_RNG
+    rolls = [rng.d6(), rng.d6(), rng.d6()]
     rolls.sort(reverse=True)
     return rolls[0] + rolls[1]  # Keep two highest
 
@@ -43,111 +51,225 @@ def format_item_text(item: str) -> str:
     return item
 
 
-def generate_attributes() -> Dict[str, int]:
+def generate_attributes(rng: Optional[DiceRNG] = None) -> Dict[str, int]:
     """Generate STR, DEX, and WIL attributes.
 
     Per SRD 2.3: Roll 3d6 for each, keep the two highest dice.
     This gives a range of 2-12 for each attribute.
     """
     return {
-        "STR": roll_attribute(),
-        "DEX": roll_attribute(),
-        "WIL": roll_attribute(),
+        "STR": roll_attribute(rng),
+        "DEX": roll_attribute(rng),
+        "WIL": roll_attribute(rng),
     }
 
 
+# Background used when HP/Pips fall outside the table
+FALLBACK_BACKGROUND = ("Test subject", "Spell: Magic missile", "Lead coat (Heavy armour)")
+
+
+def is_armour(item: str) -> bool:
+    """Return True if an item is worn in a body slot."""
+    lowered = item.lower()
+    return "armour" in lowered or "armor" in lowered or "jerkin" in lowered
+
+
+class BackgroundEntry(NamedTuple):
+    """Precomputed background row for one (HP, Pips) roll."""
+
+    background: str
+    item_a: str
+    item_b: str
+    # (raw item, formatted item, is armour) for item A and item B
+    items: Tuple[Tuple[str, str, bool], Tuple[str, str, bool]]
+    # Starting body/pack contents from Torches, Rations, item A and item B
+    body: Tuple[str, ...]
+    pack: Tuple[str, ...]
+
+
+def _build_background_entry(background: str, item_a: str, item_b: str) -> BackgroundEntry:
+    """Format and place one background's items."""
+    body: List[str] = []
+    pack: List[str] = []
+    for item in ("Torches", "Rations", item_a, item_b):
+        formatted_item = format_item_text(item)
+        if is_armour(item) and len(body) < 2:
+            body.append(formatted_item)
+        else:
+            pack.append(formatted_item)
+
+    items = tuple((item, format_item_text(item), is_armour(item)) for item in (item_a, item_b))
+    return BackgroundEntry(background, item_a, item_b, items, tuple(body), tuple(pack))
+
+
+def build_background_lookup() -> List[BackgroundEntry]:
+    """Build the 36-entry background table, indexed by (HP - 1) * 6 + (Pips - 1)."""
+    return [
+        _build_background_entry(*BACKGROUND_TABLE.get((hp, pips), FALLBACK_BACKGROUND))
+        for hp in range(1, 7)
+        for pips in range(1, 7)
+    ]
+
+
+BACKGROUND_LOOKUP = build_background_lookup()
+_FALLBACK_ENTRY = _build_background_entry(*FALLBACK_BACKGROUND)
+
+
+def _rebuild_lookups() -> None:
+    # In place, so modules that imported the lists see the new tables
+    WEAPON_CATEGORIES[:] = WEAPONS.keys()
+    BACKGROUND_LOOKUP[:] = build_background_lookup()
+
+
+on_tables_changed(_rebuild_lookups)
+
+
+def lookup_background(hp: int, pips: int) -> BackgroundEntry:
+    """Get the precomputed background entry for an HP and Pips roll."""
+    if 1 <= hp <= 6 and 1 <= pips <= 6:
+        return BACKGROUND_LOOKUP[(hp - 1) * 6 + (pips - 1)]
+    return _FALLBACK_ENTRY
+
+
 def get_background(hp: int, pips: int) -> Tuple[str, str, str]:
     """Get background based on HP and Pips."""
-    if (hp, pips) in BACKGROUND_TABLE:
-        return BACKGROUND_TABLE[(hp, pips)]
-    return ("Test subject", "Spell: Magic missile", "Lead coat (Heavy armour)")
+    entry = lookup_background(hp, pips)
+    return (entry.background, entry.item_a, entry.item_b)
 
 
-def generate_character() -> Dict[str, Any]:
-    """Generate a complete Mausritter character."""
-    attributes = generate_attributes()
-    hp = roll_dice(1, 6)
-    pips = roll_dice(1, 6)
+def generate_character(rng: Optional[DiceRNG] = None) -> Dict[str, Any]:
+    """Generate a complete Mausritter character.
 
-    background, item_a, item_b = get_background(hp, pips)
+    Args:
+        rng: Dice backend to roll with; defaults to the global ``random`` module
+    """
+    if rng is None:
+        rng = DEFAULT_RNG
+    attributes = generate_attributes(rng)
+    hp = roll_dice(1, 6, rng)
+    pips = roll_dice(1, 6, rng)
 
     # Determine additional equipment based on highest attribute
     highest_attr = max(attributes.values())
-    additional_items = []
+    additional_roll = None
     if highest_attr <= 9:
-        additional_hp = roll_dice(1, 6)
-        additional_pips = roll_dice(1, 6)
-        _, add_item_a, add_item_b = get_background(additional_hp, additional_pips)
-        additional_items.append(add_item_a)
-        if highest_attr <= 7:
-            additional_items.append(add_item_b)
+        additional_roll = (roll_dice(1, 6, rng), roll_dice(1, 6, rng))
 
     # Generate appearance
-    birthsign, disposition = random.choice(BIRTHSIGNS)
-    coat_color = random.choice(COAT_COLORS)
-    coat_pattern = random.choice(COAT_PATTERNS)
+    birthsign = rng.choice(BIRTHSIGNS)
+    coat_color = rng.choice(COAT_COLORS)
+    coat_pattern = rng.choice(COAT_PATTERNS)
     # Roll d66 for physical detail (two d6s: first is tens, second is ones)
-    detail_roll = random.randint(1, 6) * 10 + random.randint(1, 6)
-    physical_detail = PHYSICAL_DETAILS[detail_roll]
+    detail_roll = rng.d66()
 
     # Generate name
-    first_name = random.choice(FIRST_NAMES)
-    last_name = random.choice(LAST_NAMES)
-    name = f"{first_name} {last_name}"
+    first_name = rng.choice(FIRST_NAMES)
+    last_name = rng.choice(LAST_NAMES)
 
     # Select weapon (random category, then random weapon from that category)
-    category = random.choice(list(WEAPONS.keys()))
-    weapon_data = random.choice(WEAPONS[category])
-    weapon = f"{weapon_data[0]} ({category.capitalize()}, {weapon_data[1]})"
-    weapon_category = category
-
-    # Build structured inventory
-    # Main paw: weapon (for light/medium) or empty
-    # Off paw: empty (or used for heavy weapons)
-    # Body: 2 slots for worn items (armor, etc.)
-    # Pack: 6 slots for carried items
-
-    # Format weapon with brackets on new line
-    formatted_weapon = format_item_text(weapon)
-
-    inventory = {
-        "main_paw": "Select weapon",
-        "off_paw": "",
-        "body": ["", ""],
-        "pack": ["", "", "", "", "", ""],
-    }
+    category = rng.choice(WEAPON_CATEGORIES)
+    weapon_data = rng.choice(WEAPONS[category])
 
-    # Collect all non-weapon items
-    all_items = ["Torches", "Rations", item_a, item_b] + additional_items
+    return assemble_character(
+        attributes, hp, pips, additional_roll, birthsign, coat_color,
+        coat_pattern, detail_roll, first_name, last_name, category, weapon_data,
+    )
 
-    # Check if any items are armor and put them in body slots
-    body_slot_idx = 0
-    pack_items = []
-    for item in all_items:
-        formatted_item = format_item_text(item)
-        if "armour" in item.lower() or "armor" in item.lower() or "jerkin" in item.lower():
-            if body_slot_idx < 2:
-                inventory["body"][body_slot_idx] = formatted_item
-                body_slot_idx += 1
+
+def assemble_character(
+    attributes: Dict[str, int],
+    hp: int,
+    pips: int,
+    additional_roll: Optional[Tuple[int, int]],
+    birthsign_entry: Tuple[str, str],
+    coat_color: str,
+    coat_pattern: str,
+    detail_roll: int,
+    first_name: str,
+    last_name: str,
+    category: str,
+    weapon_data: Tuple[str, str, int, str],
+) -> Dict[str, Any]:
+    """Build a character dict from already-rolled values.
+
+    Shared by ``generate_character`` and the batch generator so both produce
+    exactly the same structure. ``additional_roll`` is the (HP, Pips) roll for
+    the low-attribute bonus items, or None if the mouse does not get any.
+    """
+    entry = lookup_background(hp, pips)
+    body = list(entry.body)
+    pack = list(entry.pack)
+
+    # Low attributes grant items from a second background roll: item A if the
+    # highest attribute is 9 or less, item B as well if it is 7 or less
+    highest_attr = max(attributes.values())
+    additional_items = []
+    if additional_roll is not None and highest_attr <= 9:
+        extra = lookup_background(*additional_roll).items
+        for item, formatted_item, armour in (extra if highest_attr <= 7 else extra[:1]):
+            additional_items.append(item)
+            if armour and len(body) < 2:
+                body.append(formatted_item)
             else:
-                pack_items.append(formatted_item)
-        else:
-            pack_items.append(formatted_item)
+                pack.append(formatted_item)
+
+    birthsign, disposition = birthsign_entry
+    physical_detail = PHYSICAL_DETAILS[detail_roll]
+    weapon = f"{weapon_data[0]} ({category.capitalize()}, {weapon_data[1]})"
+
+    # Body: 2 slots for worn items (armor, etc.); Pack: 6 slots for carried items
+    del pack[6:]
+    return build_character_dict(
+        f"{first_name} {last_name}",
+        attributes["STR"], attributes["DEX"], attributes["WIL"],
+        hp,
+        pips,
+        entry.background,
+        body + [""] * (2 - len(body)),
+        pack + [""] * (6 - len(pack)),
+        (entry.item_a, entry.item_b, *additional_items),
+        birthsign,
+        disposition,
+        f"{coat_color}, {coat_pattern}",
+        coat_color,
+        coat_pattern,
+        physical_detail,
+        weapon,
+    )
 
-    # Put remaining items in pack
-    for idx, item in enumerate(pack_items[:6]):
-        inventory["pack"][idx] = item
 
-    # Legacy flat equipment list for backwards compatibility
-    equipment = ["Torches", "Rations", weapon, item_a, item_b]
-    equipment.extend(additional_items)
+def build_character_dict(
+    name: str,
+    strength: int,
+    dex: int,
+    wil: int,
+    hp: int,
+    pips: int,
+    background: str,
+    body: Sequence[str],
+    pack: Sequence[str],
+    items: Sequence[str],
+    birthsign: str,
+    disposition: str,
+    coat: str,
+    coat_color: str,
+    coat_pattern: str,
+    physical_detail: str,
+    weapon: str,
+) -> Dict[str, Any]:
+    """Lay out a new character's dict from its finished pieces.
 
+    The one place the character structure is written down, for
+    ``assemble_character`` and the batch generator alike. ``body`` and
+    ``pack`` are the already padded inventory slots and ``items`` the
+    background's items, bonus items included; all three are copied.
+    """
     return {
         "name": name,
         "attributes": {
-            "STR": {"max": attributes["STR"], "current": attributes["STR"]},
-            "DEX": {"max": attributes["DEX"], "current": attributes["DEX"]},
-            "WIL": {"max": attributes["WIL"], "current": attributes["WIL"]},
+            "STR": {"max": strength, "current": strength},
+            "DEX": {"max": dex, "current": dex},
+            "WIL": {"max": wil, "current": wil},
         },
         "hp": {"max": hp, "current": hp},
         "pips": pips,
@@ -156,8 +278,17 @@ def generate_character() -> Dict[str, Any]:
         "level": 1,
         "xp": 0,
         "grit": 0,
-        "inventory": inventory,
-        "equipment": equipment,  # Legacy flat list
+        # Structured inventory
+        # Main paw: weapon (for light/medium) or empty
+        # Off paw: empty (or used for heavy weapons)
+        "inventory": {
+            "main_paw": "Select weapon",
+            "off_paw": "",
+            "body": list(body),
+            "pack": list(pack),
+        },
+        # Legacy flat equipment list for backwards compatibility
+        "equipment": ["Torches", "Rations", weapon, *items],
         "banked": {
             "items": [],
             "pips": 0,
@@ -165,7 +296,7 @@ def generate_character() -> Dict[str, Any]:
         "appearance": {
             "birthsign": birthsign,
             "disposition": disposition,
-            "coat": f"{coat_color}, {coat_pattern}",
+            "coat": coat,
             "look": physical_detail,
             # Keep individual fields for flexibility
             "coat_color": coat_color,
@@ -0,0 +1,288 @@
+"""
+Exact dice probabilities for Mausritter.
+
+Distributions are kept as integer outcome counts over a contiguous range of
+totals, so sums are plain convolutions of small integer arrays and every
+probability comes out as an exact Fraction. No dice are rolled.
+"""
+
+import re
+from fractions import Fraction
+from functools import lru_cache
+from math import comb
+from typing import Dict, List, Optional, Tuple, Union
+
+# Largest dice pools accepted from user-supplied notation, so odds stay instant
+MAX_DICE = 20
+MAX_SIDES = 100
+MAX_FACES = 400  # dice x sides
+MAX_KEEP_DICE = 10
+MAX_KEEP_FACES = 200
+
+_NOTATION = re.compile(r"^(\d*)d(\d+)(?:(kh|kl|k)(\d+))?([+-]\d+)?$", re.IGNORECASE)
+
+
+class Distribution:
+    """Exact distribution of an integer-valued roll.
+
+    ``weights[i]`` is the number of equally likely outcomes with total
+    ``offset + i``; ``total`` is the number of outcomes overall.
+    """
+
+    def __init__(self, offset: int, weights: List[int], total: Optional[int] = None):
+        # Trim impossible totals from both ends
+        start = 0
+        while start < len(weights) - 1 and weights[start] == 0:
+            start += 1
+        end = len(weights)
+        while end > start + 1 and weights[end - 1] == 0:
+            end -= 1
+        self.offset = offset + start
+        self.weights = weights[start:end]
+        self.total = total if total is not None else sum(self.weights)
+
+    @classmethod
+    def constant(cls, value: int) -> "Distribution":
+        """A roll that is always ``value``."""
+        return cls(value, [1])
+
+    @classmethod
+    def die(cls, sides: int) -> "Distribution":
+        """A single die with faces 1..sides."""
+        if sides < 1:
+            raise ValueError("a die needs at least one side")
+        return cls(1, [1] * sides)
+
+    @property
+    def min(self) -> int:
+        return self.offset
+
+    @property
+    def max(self) -> int:
+        return self.offset + len(self.weights) - 1
+
+    def __add__(self, other: Union["Distribution", int]) -> "Distribution":
+        """Sum of two independent rolls (convolution), or a flat modifier."""
+        if isinstance(other, int):
+            return Distribution(self.offset + other, list(self.weights), self.total)
+        weights = [0] * (len(self.weights) + len(other.weights) - 1)
+        for i, a in enumerate(self.weights):
+            if a:
+                for j, b in enumerate(other.weights):
+                    weights[i + j] += a * b
+        return Distribution(self.offset + other.offset, weights, self.total * other.total)
+
+    __radd__ = __add__
+
+    def __sub__(self, modifier: int) -> "Distribution":
+        return self + (-modifier)
+
+    def repeat(self, count: int) -> "Distribution":
+        """Sum of ``count`` independent copies of this roll."""
+        if count < 0:
+            raise ValueError("count must not be negative")
+        result = Distribution.constant(0)
+        base = self
+        # Square-and-multiply keeps the number of convolutions logarithmic
+        while count:
+            if count & 1:
+                result = result + base
+            count >>= 1
+            if count:
+                base = base + base
+        return result
+
+    def _combine(self, other: "Distribution", pick) -> "Distribution":
+        """Distribution of pick(X, Y) for independent X and Y."""
+        low = pick(self.min, other.min)
+        weights = [0] * (pick(self.max, other.max) - low + 1)
+        for i, a in enumerate(self.weights):
+            for j, b in enumerate(other.weights):
+                weights[pick(self.offset + i, other.offset + j) - low] += a * b
+        return Distribution(low, weights, self.total * other.total)
+
+    def highest(self, other: "Distribution") -> "Distribution":
+        """Distribution of the higher of this roll and ``other``."""
+        return self._combine(other, max)
+
+    def lowest(self, other: "Distribution") -> "Distribution":
+        """Distribution of the lower of this roll and ``other``."""
+        return self._combine(other, min)
+
+    def pmf(self, value: int) -> Fraction:
+        """P(X == value)."""
+        index = value - self.offset
+        if 0 <= index < len(self.weights):
+            return Fraction(self.weights[index], self.total)
+        return Fraction(0)
+
+    def at_most(self, value: int) -> Fraction:
+        """P(X <= value)."""
+        count = value - self.offset + 1
+        if count <= 0:
+            return Fraction(0)
+        return Fraction(sum(self.weights[:count]), self.total)
+
+    def at_least(self, value: int) -> Fraction:
+        """P(X >= value)."""
+        return 1 - self.at_most(value - 1)
+
+    def compare(self, other: "Distribution") -> Tuple[Fraction, Fraction, Fraction]:
+        """Return (P(X < Y), P(X == Y), P(X > Y)) for independent X and Y."""
+        # For each total of X, count Y's outcomes below and equal to it
+        less = equal = greater = 0
+        for i, a in enumerate(self.weights):
+            if not a:
+                continue
+            x = self.offset + i
+            below = sum(other.weights[:max(0, min(x - other.offset, len(other.weights)))])
+            same = other.weights[x - other.offset] if other.min <= x <= other.max else 0
+            greater += a * below
+            equal += a * same
+            less += a * (other.total - below - same)
+        total = self.total * other.total
+        return Fraction(less, total), Fraction(equal, total), Fraction(greater, total)
+
+    def mean(self) -> Fraction:
+        """Expected value."""
+        return Fraction(
+            sum((self.offset + i) * w for i, w in enumerate(self.weights)), self.total
+        )
+
+    def probabilities(self) -> Dict[int, Fraction]:
+        """Map each possible total to its exact probability."""
+        return {
+            self.offset + i: Fraction(w, self.total)
+            for i, w in enumerate(self.weights) if w
+        }
+
+    def to_dict(self) -> Dict[str, object]:
+        """JSON-friendly summary with float probabilities."""
+        return {
+            "min": self.min,
+            "max": self.max,
+            "mean": float(self.mean()),
+            "probabilities": {str(v): float(p) for v, p in self.probabilities().items()},
+        }
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Distribution):
+            return NotImplemented
+        return self.probabilities() == other.probabilities()
+
+    def __repr__(self) -> str:
+        return f"Distribution(min={self.min}, max={self.max}, outcomes={self.total})"
+
+
+def dice(count: int, sides: int) -> Distribution:
+    """Distribution of the sum of ``count`` dice with ``sides`` sides (XdY)."""
+    return Distribution.die(sides).repeat(count)
+
+
+def _keep(count: int, sides: int, keep: int, highest: bool) -> Distribution:
+    """Distribution of the sum of the ``keep`` highest or lowest of XdY.
+
+    Walks the faces from best to worst, choosing how many dice show each
+    face. The state is (dice placed so far, sum of kept dice) weighted by
+    the number of ways to get there, so no outcome is enumerated.
+    """
+    if not 0 <= keep <= count:
+        raise ValueError("keep must be between 0 and the number of dice")
+    states = {(0, 0): 1}
+    faces = range(sides, 0, -1) if highest else range(1, sides + 1)
+    for face in faces:
+        next_states: Dict[Tuple[int, int], int] = {}
+        for (placed, kept_sum), ways in states.items():
+            remaining = count - placed
+            for showing in range(remaining + 1):
+                kept = min(showing, max(keep - placed, 0))
+                key = (placed + showing, kept_sum + kept * face)
+                next_states[key] = next_states.get(key, 0) + ways * comb(remaining, showing)
+        states = next_states
+
+    sums = {kept_sum: ways for (placed, kept_sum), ways in states.items() if placed == count}
+    low = min(sums)
+    weights = [0] * (max(sums) - low + 1)
+    for kept_sum, ways in sums.items():
+        weights[kept_sum - low] = ways
+    return Distribution(low, weights, sides ** count)
+
+
+def keep_highest(count: int, sides: int, keep: int) -> Distribution:
+    """Sum of the ``keep`` highest of ``count`` dice, e.g. 3d6k2."""
+    return _keep(count, sides, keep, highest=True)
+
+
+def keep_lowest(count: int, sides: int, keep: int) -> Distribution:
+    """Sum of the ``keep`` lowest of ``count`` dice, e.g. 2d20kl1."""
+    return _keep(count, sides, keep, highest=False)
+
+
+@lru_cache(maxsize=256)
+def parse(notation: str) -> Distribution:
+    """Build a distribution from dice notation.
+
+    Supports ``XdY``, a keep suffix (``kZ``/``khZ`` for highest, ``klZ`` for
+    lowest) and a flat modifier, e.g. ``2d6``, ``3d6k2``, ``2d20kl1``, ``1d8+2``.
+    Results are cached; treat the returned distribution as read-only.
+
+    Raises:
+        ValueError: If the notation is invalid or the pool is too large
+    """
+    match = _NOTATION.match(notation.strip().replace(" ", ""))
+    if not match:
+        raise ValueError(f"Invalid dice notation: {notation!r}")
+    count = int(match.group(1) or 1)
+    sides = int(match.group(2))
+    keep_mode, keep = match.group(3), match.group(4)
+    too_large = (
+        not 1 <= count <= MAX_DICE
+        or not 1 <= sides <= MAX_SIDES
+        or count * sides > MAX_FACES
+        or (keep_mode and (count > MAX_KEEP_DICE or count * sides > MAX_KEEP_FACES))
+    )
+    if too_large:
+        raise ValueError(f"Dice pool out of range: {notation!r}")
+
+    if keep_mode:
+        if keep_mode.lower() == "kl":
+            result = keep_lowest(count, sides, int(keep))
+        else:
+            result = keep_highest(count, sides, int(keep))
+    else:
+        result = dice(count, sides)
+
+    if match.group(5):
+        result = result + int(match.group(5))
+    return result
+
+
+# Attribute roll at character creation: 3d6, keep the two highest
+ATTRIBUTE = keep_highest(3, 6, 2)
+
+SAVE_MODES = ("normal", "advantage", "disadvantage")
+
+
+def save_roll(mode: str = "normal") -> Distribution:
+    """The d20 used for a save: 2d20 keep lowest with advantage, highest with disadvantage."""
+    if mode == "advantage":
+        return keep_lowest(2, 20, 1)
+    if mode == "disadvantage":
+        return keep_highest(2, 20, 1)
+    if mode == "normal":
+        return Distribution.die(20)
+    raise ValueError(f"Unknown save mode: {mode!r}")
+
+
+def save_chance(score: int, mode: str = "normal") -> Fraction:
+    """Chance to pass a save: roll at most ``score`` on the save d20."""
+    return save_roll(mode).at_most(score)
+
+
+def extra_items_chance() -> Tuple[Fraction, Fraction]:
+    """Chance a new mouse gets bonus starting items.
+
+    Returns (P(highest attribute <= 9), P(highest attribute <= 7)): the
+    chance of at least one extra item, and of two.
+    """
+    return ATTRIBUTE.at_most(9) ** 3, ATTRIBUTE.at_most(7) ** 3
@@ -0,0 +1,119 @@
+"""
+Random number backends for dice rolling.
+
+Every roll in ``mausritter.generator`` goes through a DiceRNG. The default
+backend uses the global ``random`` module (so ``random.seed`` still works);
+sessions can hold their own seeded or buffered backend instead, which also
+keeps request threads off the shared global RNG state.
+"""
+
+import random
+from abc import ABC, abstractmethod
+from typing import Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Number of results pre-drawn per block by BufferedRNG
+BLOCK_SIZE = 4096
+
+_D6_FACES = range(1, 7)
+_D66_VALUES = [tens * 10 + ones for tens in _D6_FACES for ones in _D6_FACES]
+
+
+class DiceRNG(ABC):
+    """Interface for dice rolling backends.
+
+    Subclasses implement ``randint`` and ``choice``; ``d6`` and ``d66`` are
+    built on top of them and may be overridden with faster versions.
+    """
+
+    @abstractmethod
+    def randint(self, a: int, b: int) -> int:
+        """Return a random integer N such that a <= N <= b."""
+
+    @abstractmethod
+    def choice(self, seq: Sequence[T]) -> T:
+        """Return a random element from a non-empty sequence."""
+
+    def d6(self) -> int:
+        """Roll a single d6."""
+        return self.randint(1, 6)
+
+    def d66(self) -> int:
+        """Roll a d66: first d6 is the tens digit, second is the ones digit."""
+        return self.d6() * 10 + self.d6()
+
+
+class DefaultRNG(DiceRNG):
+    """Rolls with the global ``random`` module."""
+
+    def randint(self, a: int, b: int) -> int:
+        return random.randint(a, b)
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return random.choice(seq)
+
+
+class SeededRNG(DiceRNG):
+    """Rolls with a private ``random.Random`` instance.
+
+    Args:
+        seed: Optional seed for reproducible rolls
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self.random = random.Random(seed)
+
+    def seed(self, seed: Optional[int] = None) -> None:
+        """Re-seed the generator."""
+        self.random.seed(seed)
+
+    def randint(self, a: int, b: int) -> int:
+        return self.random.randint(a, b)
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return self.random.choice(seq)
+
+
+class BufferedRNG(SeededRNG):
+    """Seeded backend that serves d6 and d66 rolls from pre-drawn blocks.
+
+    Each block of BLOCK_SIZE results is drawn with one ``random.choices``
+    call. Reading the next result is a single ``next()`` on a list iterator,
+    which is atomic, so threads can share one instance without a lock; two
+    threads refilling at once only discards part of a block.
+    """
+
+    def __init__(self, seed: Optional[int] = None, block_size: int = BLOCK_SIZE):
+        super().__init__(seed)
+        self.block_size = block_size
+        self._d6 = iter(())
+        self._d66 = iter(())
+
+    def seed(self, seed: Optional[int] = None) -> None:
+        super().seed(seed)
+        self._d6 = iter(())
+        self._d66 = iter(())
+
+    def d6(self) -> int:
+        value = next(self._d6, None)
+        while value is None:
+            self._d6 = iter(self.random.choices(_D6_FACES, k=self.block_size))
+            value = next(self._d6, None)
+        return value
+
+    def d66(self) -> int:
+        value = next(self._d66, None)
+        while value is None:
+            self._d66 = iter(self.random.choices(_D66_VALUES, k=self.block_size))
+            value = next(self._d66, None)
+        return value
+
+    def randint(self, a: int, b: int) -> int:
+        if a == 1 and b == 6:
+            return self.d6()
+        return self.random.randint(a, b)
+
+
+# Backend used when no RNG is passed in
+DEFAULT_RNG = DefaultRNG()
@@ -17,21 +17,46 @@ def create_app() -> Flask:
     # Configuration
     app.config["SECRET_KEY"] = "mausritter-local-dev"  # Only for local LAN use
     app.config["JSON_SORT_KEYS"] = False
+    # Live update streams open at once; None for no limit (production.py sets one)
+    app.config["MAX_EVENT_STREAMS"] = None
+
+    from .events import StreamSlots
+    app.extensions["event_streams"] = StreamSlots()
+
+    # Request metrics first, so they see responses as sent
+    from .metrics import init_metrics
+    init_metrics(app)
+
+    # Compact JSON and compressed responses
+    from .compression import init_compression
+    init_compression(app)
 
     # Register blueprints
     from .routes.api import api_bp
+    from .routes.assets import assets_bp, precompressed_assets
+    from ..templates.assets import ASSET_PREFIX
     from .routes.gm import gm_bp
     from .routes.player import player_bp
+    from .routes.sync import sync_bp
 
     app.register_blueprint(api_bp, url_prefix="/api")
+    # Empty unless flask-sock is installed
+    app.register_blueprint(sync_bp, url_prefix="/api")
     app.register_blueprint(gm_bp, url_prefix="/gm")
     app.register_blueprint(player_bp)
+    app.register_blueprint(assets_bp, url_prefix=ASSET_PREFIX.rstrip("/"))
+    # Compress the sheet's assets now rather than on a player's first visit
+    precompressed_assets()
+
+    # Requests sent with the host GM token in X-Profile run under cProfile
+    from .profiling import init_profiling
+    init_profiling(app)
 
     # Root route
     @app.route("/")
     def index():
         from flask import render_template
-        from .session import game_session
-        return render_template("index.html", gm_token=game_session.gm_token)
+        from .session import get_store
+        return render_template("index.html", gm_token=get_store().default().gm_token)
 
     return app
@@ -0,0 +1,121 @@
+"""
+Smaller responses for the GM server.
+
+Text responses (pages, JSON, scripts) are compressed with Brotli or gzip,
+whichever the client accepts, and JSON is sent without indentation unless
+a request asks for ``?pretty``. Players mostly connect from phones over
+venue Wi-Fi, where bytes cost more than the CPU to squeeze them.
+
+Brotli needs the brotli package (``pip install brotli``); without it
+responses are gzipped.
+"""
+
+import gzip
+from typing import Any, Optional
+
+from flask import Flask, Response, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from .metrics import timed
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always there
+    brotli = None
+
+# Encodings we can produce, best first
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+# Bodies smaller than this (bytes) aren't worth compressing
+MIN_SIZE = 512
+
+# Fast settings for per-request compression; static assets use the best
+DYNAMIC_LEVELS = {"br": 5, "gzip": 6}
+STATIC_LEVELS = {"br": 11, "gzip": 9}
+
+COMPRESSIBLE_TYPES = (
+    "application/javascript",
+    "application/json",
+    "application/json-patch+json",
+    "image/svg+xml",
+)
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    """Compress ``data`` with one of ENCODINGS."""
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    # mtime=0 so the same body always compresses to the same bytes
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def accepted_encoding() -> Optional[str]:
+    """The best of ENCODINGS the current request accepts, if any."""
+    return request.accept_encodings.best_match(ENCODINGS)
+
+
+def is_compressible(mimetype: str) -> bool:
+    """Whether a response of this type is text that compresses well."""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_TYPES
+
+
+def compress_response(response: Response) -> Response:
+    """Compress a finished response if the client and the body allow it.
+
+    Streamed responses (the event stream) pass through untouched, as does
+    anything already encoded, such as precompressed assets.
+    """
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.is_streamed
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or not is_compressible(response.mimetype or "")
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = accepted_encoding()
+    body = response.get_data()
+    if encoding is None or len(body) < MIN_SIZE:
+        return response
+
+    with timed("compress"):
+        response.set_data(compress(body, encoding, DYNAMIC_LEVELS[encoding]))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # Same content, different bytes: only weakly the tagged entity
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def wants_pretty() -> bool:
+    """Whether the request asked for indented JSON (``?pretty``)."""
+    return has_request_context() and request.args.get("pretty") not in (None, "0", "false")
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """JSON responses without whitespace, indented only for ``?pretty``.
+
+    Flask's own provider switches to indented output in debug mode; API
+    clients never read it, so size doesn't depend on how the server runs.
+    """
+
+    # Keep the order the data was built in (what JSON_SORT_KEYS used to do)
+    sort_keys = False
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        with timed("json_encode"):
+            if wants_pretty():
+                text = self.dumps(obj, indent=2)
+            else:
+                text = self.dumps(obj, separators=(",", ":"))
+        return self._app.response_class(f"{text}\n", mimetype=self.mimetype)
+
+
+def init_compression(app: Flask) -> None:
+    """Send compact JSON and compress responses for ``app``."""
+    app.json_provider_class = CompactJSONProvider
+    app.json = CompactJSONProvider(app)
+    app.after_request(compress_response)
@@ -0,0 +1,154 @@
+"""
+Live session updates for the GM server.
+
+Every change to a session publishes one event to the session's EventBroker,
+tagged with the session version the change produced. Subscribers block on a
+condition variable until something newer than what they've seen arrives, so
+an idle stream costs a sleeping thread and no CPU. The most recent events
+are kept so a client that reconnects (with ``Last-Event-ID``) catches up on
+what it missed.
+"""
+
+import json
+import threading
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Events kept for reconnecting clients
+HISTORY = 512
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT = 15.0
+
+# Events after which a stream ends; the client reloads the page
+FINAL_EVENTS = ("reset", "resync")
+
+
+class Event(NamedTuple):
+    """One published change.
+
+    ``data`` is serialized once when published, however many clients
+    receive it.
+    """
+
+    version: int
+    type: str
+    char_id: Optional[str]
+    gm_only: bool
+    data: str
+
+    def visible_to(self, char_id: Optional[str]) -> bool:
+        """Whether a subscriber sees this event.
+
+        GMs (``char_id`` None) see everything; players see session-wide
+        events that aren't GM-only and events for their own character.
+        """
+        if char_id is None:
+            return True
+        return not self.gm_only and self.char_id in (None, char_id)
+
+    def to_sse(self) -> str:
+        """Format as a Server-Sent Events message."""
+        return f"id: {self.version}\nevent: {self.type}\ndata: {self.data}\n\n"
+
+
+class EventBroker:
+    """Fan-out of one session's events to any number of subscribers.
+
+    Args:
+        version: Session version the broker starts at
+        history: Events kept for clients catching up
+    """
+
+    def __init__(self, version: int = 0, history: int = HISTORY):
+        self._changed = threading.Condition(threading.Lock())
+        self._events: deque = deque(maxlen=history)
+        self._version = version
+        self._closed = False
+
+    @property
+    def version(self) -> int:
+        """Version of the latest event published."""
+        return self._version
+
+    def publish(
+        self,
+        version: int,
+        event_type: str,
+        payload: Dict[str, Any],
+        char_id: Optional[str] = None,
+        gm_only: bool = False,
+    ) -> None:
+        """Publish the event that produced ``version`` and wake subscribers.
+
+        Callers publish in version order.
+        """
+        data = json.dumps({"version": version, **payload}, separators=(",", ":"))
+        with self._changed:
+            self._events.append(Event(version, event_type, char_id, gm_only, data))
+            self._version = version
+            self._changed.notify_all()
+
+    def wait(self, after: int, timeout: float = HEARTBEAT) -> Optional[List[Event]]:
+        """Events newer than version ``after``, blocking until there is one.
+
+        Returns:
+            The events (empty if ``timeout`` passed first), or None once the
+            broker is closed. If some of the events have already dropped out
+            of the history, a single "resync" event is returned instead.
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self._closed or self._version != after, timeout)
+            if self._closed:
+                return None
+            if self._version == after:
+                return []
+            oldest = self._events[0].version if self._events else self._version + 1
+            if not oldest <= after + 1 <= self._version:
+                resync = json.dumps({"version": self._version})
+                return [Event(self._version, "resync", None, False, resync)]
+            return list(islice(self._events, after + 1 - oldest, None))
+
+    def close(self) -> None:
+        """End every subscriber's stream."""
+        with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+
+class StreamSlots:
+    """Count of the live update streams open at once.
+
+    Under waitress each stream holds a worker thread for as long as its
+    page stays open, so the app only opens a stream while it's under its
+    limit; pages turned away poll instead. This caps what streams cost
+    rather than making them cheaper: a WSGI server can't park an idle
+    connection without its thread, so subscribers past the cap cost a
+    short request every few seconds instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._open = 0
+
+    @property
+    def open(self) -> int:
+        """Streams open now."""
+        return self._open
+
+    def take(self, limit: Optional[int]) -> bool:
+        """Claim a slot for a new stream; False if ``limit`` are already open.
+
+        ``limit`` None means no limit.
+        """
+        with self._lock:
+            if limit is not None and self._open >= limit:
+                return False
+            self._open += 1
+            return True
+
+    def give_back(self) -> None:
+        """Free the slot of a stream that ended."""
+        with self._lock:
+            self._open -= 1
@@ -0,0 +1,182 @@
+"""
+Request timing and payload metrics for the GM server.
+
+The app records every request's latency and body sizes by route, and code
+on the hot paths times its stages (JSON decoding and encoding, session
+writes, merging updates, rendering sheets) with ``timed``. The host GM
+reads them at ``/api/metrics`` in the Prometheus text format, so a scraper
+or a plain ``curl`` shows where the time goes.
+
+Metrics are kept per process; with several workers each reports its own.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from flask import Flask, Request, Response, g, request
+
+# Upper bounds (seconds) of the latency buckets, from 0.1ms to 10s
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Counts of observations by bucket, plus their sum, for one label set."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        # One count per bucket and one past the last (+Inf)
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+
+class Metrics:
+    """Histograms and counters by name and labels, rendered for Prometheus."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+
+    def describe(self, name: str, kind: str, help_text: str) -> None:
+        """Set the type ("histogram" or "counter") and help line of a metric."""
+        self._help[name] = (kind, help_text)
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = LATENCY_BUCKETS,
+                **labels: str) -> None:
+        """Add an observation to a histogram."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        """Add to a counter."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def clear(self) -> None:
+        """Forget every observation."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name in sorted(set(self._histograms) | set(self._counters)):
+                kind, help_text = self._help.get(name, ("untyped", ""))
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in sorted(self._counters.get(name, {}).items()):
+                    lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+                for labels, histogram in sorted(self._histograms.get(name, {}).items()):
+                    cumulative = 0
+                    bounds = [*map(repr, histogram.buckets), "+Inf"]
+                    for bound, count in zip(bounds, histogram.counts):
+                        cumulative += count
+                        lines.append(
+                            f"{name}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}"
+                        )
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total!r}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+# The process's metrics, recorded by the app and the code it runs
+metrics = Metrics()
+metrics.describe(
+    "mausritter_request_duration_seconds", "histogram",
+    "Time to handle a request, until the response headers are ready.",
+)
+metrics.describe("mausritter_requests_total", "counter", "Requests handled, by status.")
+metrics.describe("mausritter_request_bytes_total", "counter", "Request body bytes received.")
+metrics.describe(
+    "mausritter_response_bytes_total", "counter", "Response body bytes sent (after compression)."
+)
+metrics.describe(
+    "mausritter_stage_duration_seconds", "histogram", "Time spent in one stage of the work."
+)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time the block as one run of ``stage``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe("mausritter_stage_duration_seconds", time.perf_counter() - start,
+                        stage=stage)
+
+
+class TimedRequest(Request):
+    """Request whose JSON body decoding is timed."""
+
+    def get_json(self, *args, **kwargs):
+        with timed("json_decode"):
+            return super().get_json(*args, **kwargs)
+
+
+def _start_timer() -> None:
+    g.metrics_start = time.perf_counter()
+
+
+def _record_request(response: Response) -> Response:
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return response
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    labels = {"method": request.method, "route": route}
+    metrics.observe("mausritter_request_duration_seconds", time.perf_counter() - start, **labels)
+    metrics.inc("mausritter_requests_total", status=str(response.status_code), **labels)
+    if request.content_length:
+        metrics.inc("mausritter_request_bytes_total", request.content_length, **labels)
+    # Streams (live updates) have no length up front
+    if response.content_length is not None:
+        metrics.inc("mausritter_response_bytes_total", response.content_length, **labels)
+    return response
+
+
+def init_metrics(app: Flask) -> None:
+    """Record request latency and sizes for ``app``.
+
+    Call before anything else registers an ``after_request`` hook:
+    hooks run in reverse order, so sizes are measured as sent.
+    """
+    app.request_class = TimedRequest
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
@@ -0,0 +1,198 @@
+"""
+JSON Patch (RFC 6902) for character updates.
+
+Lets the character sheet send only the paths that changed instead of the
+whole sheet. Patches are applied without modifying the original document:
+only the containers along each changed path are copied, so the result shares
+everything else with the session snapshot it came from. Values from the
+patch are inserted as they are, so don't modify them after applying.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+# Fields the server assigns; patches may only test them
+PROTECTED_FIELDS = ("id", "player_token", "version")
+
+_MISSING = object()
+
+
+class PatchError(ValueError):
+    """A patch is malformed or can't be applied to the document."""
+
+
+class PatchConflict(PatchError):
+    """A ``test`` operation failed: the document isn't what the client expected."""
+
+
+class VersionConflict(PatchConflict):
+    """The character changed after the version the client based its edit on.
+
+    Attributes:
+        version: The character's current version
+        delta: JSON Patch from the client's version to the current one, or
+            None if that version is too old to diff against
+        character: The current character
+    """
+
+    def __init__(self, version: int, delta: Optional[List[Dict[str, Any]]], character: Dict[str, Any]):
+        super().__init__(f"Character has changed (now at version {version})")
+        self.version = version
+        self.delta = delta
+        self.character = character
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """Split a JSON Pointer (RFC 6901) into unescaped reference tokens."""
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise PatchError(f"Invalid JSON pointer: {pointer!r}")
+    if not pointer:
+        return []
+    return [part.replace("~1", "/").replace("~0", "~") for part in pointer[1:].split("/")]
+
+
+def escape_pointer(key: str) -> str:
+    """Escape one reference token for a JSON Pointer."""
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    """Array index for a pointer token; '-' means one past the end."""
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"Invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"Array index out of range: {token}")
+    return index
+
+
+def _get(doc: Any, path: List[str]) -> Any:
+    for token in path:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise PatchError(f"Path not found: /{'/'.join(path)}")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token)]
+        else:
+            raise PatchError(f"Path not found: /{'/'.join(path)}")
+    return doc
+
+
+def _set(doc: Any, path: List[str], value: Any, insert: bool) -> Any:
+    """Return a copy of doc with value added/replaced at path.
+
+    ``insert`` gives RFC 6902 "add" semantics (arrays grow); otherwise the
+    target must already exist ("replace"). ``value`` of _MISSING removes it.
+    """
+    if not path:
+        return value
+    token, rest = path[0], path[1:]
+    if isinstance(doc, dict):
+        result = dict(doc)
+        if rest:
+            if token not in doc:
+                raise PatchError(f"Path not found: {token!r}")
+            result[token] = _set(doc[token], rest, value, insert)
+        elif value is _MISSING:
+            if token not in result:
+                raise PatchError(f"Path not found: {token!r}")
+            del result[token]
+        else:
+            if not insert and token not in result:
+                raise PatchError(f"Path not found: {token!r}")
+            result[token] = value
+        return result
+    if isinstance(doc, list):
+        result = list(doc)
+        if rest:
+            index = _index(doc, token)
+            result[index] = _set(doc[index], rest, value, insert)
+        elif value is _MISSING:
+            del result[_index(doc, token)]
+        elif insert:
+            result.insert(_index(doc, token, allow_end=True), value)
+        else:
+            result[_index(doc, token)] = value
+        return result
+    raise PatchError(f"Cannot address into a {type(doc).__name__}")
+
+
+def _operation(op: Any) -> Tuple[str, List[str]]:
+    if not isinstance(op, dict) or "op" not in op or "path" not in op:
+        raise PatchError("Each operation needs 'op' and 'path'")
+    path = parse_pointer(op["path"])
+    if not path or (path[0] in PROTECTED_FIELDS and op["op"] != "test"):
+        raise PatchError(f"Path can't be changed: {op['path']!r}")
+    return op["op"], path
+
+
+def apply_patch(doc: Dict[str, Any], operations: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply a JSON Patch to a character, returning the patched copy.
+
+    All operations apply or none do; ``doc`` itself is never modified.
+
+    Raises:
+        PatchConflict: If a ``test`` operation fails
+        PatchError: If the patch is malformed or a path doesn't exist
+    """
+    if not isinstance(operations, list):
+        raise PatchError("A JSON Patch must be a list of operations")
+    for op in operations:
+        name, path = _operation(op)
+        if name in ("add", "replace", "test") and "value" not in op:
+            raise PatchError(f"'{name}' needs a value")
+        if name == "add":
+            doc = _set(doc, path, op["value"], insert=True)
+        elif name == "replace":
+            doc = _set(doc, path, op["value"], insert=False)
+        elif name == "remove":
+            doc = _set(doc, path, _MISSING, insert=False)
+        elif name in ("move", "copy"):
+            source = parse_pointer(op.get("from", ""))
+            if not source or source[0] in PROTECTED_FIELDS:
+                raise PatchError(f"Path can't be changed: {op.get('from')!r}")
+            if name == "move" and len(path) > len(source) and path[:len(source)] == source:
+                raise PatchError("Can't move a value into itself")
+            value = _get(doc, source)
+            if name == "move":
+                doc = _set(doc, source, _MISSING, insert=False)
+            doc = _set(doc, path, value, insert=True)
+        elif name == "test":
+            if _get(doc, path) != op["value"]:
+                raise PatchConflict(f"Test failed at {op['path']}")
+        else:
+            raise PatchError(f"Unknown operation: {name!r}")
+    return doc
+
+
+def diff(before: Any, after: Any, path: str = "") -> List[Dict[str, Any]]:
+    """JSON Patch turning ``before`` into ``after``.
+
+    Objects and same-length arrays are compared member by member, so the
+    patch names only the paths that changed. Parts shared between two
+    snapshots are skipped without being walked.
+    """
+    if before is after:
+        return []
+    if isinstance(before, dict) and isinstance(after, dict):
+        ops = [
+            {"op": "remove", "path": f"{path}/{escape_pointer(key)}"}
+            for key in before if key not in after
+        ]
+        for key, value in after.items():
+            child = f"{path}/{escape_pointer(key)}"
+            if key in before:
+                ops.extend(diff(before[key], value, child))
+            else:
+                ops.append({"op": "add", "path": child, "value": value})
+        return ops
+    if isinstance(before, list) and isinstance(after, list) and len(before) == len(after):
+        ops = []
+        for index, (old, new) in enumerate(zip(before, after)):
+            ops.extend(diff(old, new, f"{path}/{index}"))
+        return ops
+    if type(before) is type(after) and before == after:
+        return []
+    return [{"op": "replace", "path": path, "value": after}]
@@ -0,0 +1,190 @@
+"""
+Production serving for the GM server.
+
+``run_server.py --production`` serves the app with waitress
+(``pip install waitress``), a pure-Python WSGI server that runs on the
+laptops GMs bring to the table, instead of Flask's development server.
+Requests are handled by a fixed pool of worker threads.
+
+Every open sheet or dashboard keeps a live update stream, which holds one
+worker thread for as long as the page is open (waitress can't hand the
+connection over to a WebSocket, so sheets stream over ``/api/events``).
+So that open pages can never starve saves, streams may only take half the
+threads (stream_limit); pages beyond that poll with ETag revalidation,
+which costs a short request every few seconds rather than a thread. That
+is a cap, not cheap idle streams: waitress gives every response its own
+thread until it ends, and flask-sock's WebSockets don't run on it, so
+there is nowhere to keep an idle stream without one.
+
+On SIGINT or SIGTERM the server stops accepting connections, ends the
+live update streams, gives requests in flight a few seconds to finish and
+then closes the session store, which writes its final snapshots.
+
+With an SQLite store the server can also run as several worker processes
+(serve_workers), to use every core of the machine. The workers accept
+connections from one listening socket, so the operating system spreads
+players across them, and share sessions through the database; live
+updates reach every worker through its pub/sub (see pubsub.py).
+"""
+
+import multiprocessing
+import multiprocessing.connection
+import signal
+import socket
+from typing import Any, Dict
+
+try:
+    from waitress import create_server
+except ImportError:  # Only production mode needs waitress
+    create_server = None
+
+# Worker threads: live update streams plus the requests pages make
+DEFAULT_THREADS = 64
+
+# Connections waitress accepts at once (its own default is 100)
+DEFAULT_CONNECTION_LIMIT = 1000
+
+
+def stream_limit(threads: int) -> int:
+    """Live update streams allowed open with ``threads`` worker threads.
+
+    Half the threads, leaving the rest for requests however many pages
+    are open.
+    """
+    return threads // 2
+
+
+def _end_streams(store) -> None:
+    """End every live update stream so its thread is free to stop."""
+    for table in store.list_sessions():
+        session = store.get(table["id"])
+        if session is not None:
+            session.events.close()
+
+
+def serve(
+    app,
+    store,
+    host: str,
+    port: int,
+    threads: int = DEFAULT_THREADS,
+    connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+    **options: Any,
+) -> None:
+    """Serve ``app`` with waitress until interrupted, then shut down cleanly.
+
+    Args:
+        app: The Flask application
+        store: Session store to close once the last request is done
+        host: Interface to listen on
+        port: Port to listen on
+        threads: Worker threads handling requests
+        connection_limit: Connections accepted at once
+        **options: Further waitress settings
+
+    Raises:
+        RuntimeError: If waitress isn't installed
+    """
+    _serve(app, store, host=host, port=port, threads=threads,
+           connection_limit=connection_limit, **options)
+
+
+def _serve(app, store, **settings: Any) -> None:
+    if create_server is None:
+        raise RuntimeError("Production mode needs waitress: pip install waitress")
+    app.config["MAX_EVENT_STREAMS"] = stream_limit(settings["threads"])
+    server = create_server(app, ident="mausritter", **settings)
+    signals = (signal.SIGINT, signal.SIGTERM)
+
+    def stop(signum, frame):
+        # Ctrl+C reaches every worker and the supervisor passes it on; once is enough
+        for sig in signals:
+            signal.signal(sig, signal.SIG_IGN)
+        _end_streams(store)
+        # waitress catches this, stops accepting and waits for its threads
+        raise SystemExit(0)
+
+    previous = {sig: signal.signal(sig, stop) for sig in signals}
+    try:
+        server.run()
+    finally:
+        store.close()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+
+
+def _worker(listener: socket.socket, path: str, settings: Dict[str, Any]) -> None:
+    """One worker process: its own store on the shared database, and the app."""
+    from .app import create_app
+    from .pubsub import SQLitePubSub
+    from .session import set_store
+    from .sqlite_store import SQLiteSessionStore
+
+    store = SQLiteSessionStore(path, pubsub=SQLitePubSub(path))
+    set_store(store)
+    _serve(create_app(), store, sockets=[listener], **settings)
+
+
+def serve_workers(
+    path,
+    host: str,
+    port: int,
+    workers: int,
+    threads: int = DEFAULT_THREADS,
+    connection_limit: int = DEFAULT_CONNECTION_LIMIT,
+    **options: Any,
+) -> None:
+    """Serve from ``workers`` processes sharing the SQLite database at ``path``.
+
+    Blocks until interrupted. A worker that crashes is replaced; one that
+    exits cleanly (the GM stopped the server) stops the others.
+
+    Args:
+        path: The SQLite session database
+        host: Interface to listen on
+        port: Port to listen on
+        workers: Worker processes
+        threads: Worker threads in each process
+        connection_limit: Connections each process accepts at once
+        **options: Further waitress settings
+
+    Raises:
+        RuntimeError: If waitress isn't installed
+    """
+    if create_server is None:
+        raise RuntimeError("Production mode needs waitress: pip install waitress")
+    listener = socket.create_server((host, port), backlog=1024)
+    settings = dict(threads=threads, connection_limit=connection_limit, **options)
+    # Fresh interpreters: no forked SQLite connections or RNG buffers
+    context = multiprocessing.get_context("spawn")
+
+    def start():
+        process = context.Process(target=_worker, args=(listener, str(path), settings))
+        process.start()
+        return process
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    previous = {sig: signal.signal(sig, stop) for sig in (signal.SIGINT, signal.SIGTERM)}
+    processes = [start() for _ in range(workers)]
+    try:
+        while not stopping:
+            multiprocessing.connection.wait([p.sentinel for p in processes], timeout=0.5)
+            for i, process in enumerate(processes):
+                if process.exitcode == 0:
+                    stopping = True
+                elif process.exitcode is not None and not stopping:
+                    processes[i] = start()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        for process in processes:
+            process.join()
+        listener.close()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
@@ -0,0 +1,180 @@
+"""
+Profiling a running GM server.
+
+Two tools, both for the host table's GM and neither needing a restart:
+
+- ``sample_stacks`` samples what every thread is doing for a few seconds
+  (``/api/debug/profile?seconds=N``) and returns the stacks in the
+  collapsed format flame graph tools read: one line per distinct stack,
+  root first, with the number of samples it was seen in. Threads that are
+  only waiting (idle workers, open event streams) are left out unless
+  asked for.
+- A request sent with ``X-Profile: <GM token>`` runs under cProfile. Its
+  response carries an ``X-Profile-Id`` header, and the profile is kept (the
+  most recent few) for ``/api/debug/profile/<id>``, as a text report or a
+  pstats dump for ``python -m pstats`` or snakeviz.
+
+Up to Python 3.11 a request profile covers only its own thread, and
+overlapping profiled requests each get their own. From 3.12 cProfile hooks
+the whole interpreter: a profile includes whatever other threads ran
+meanwhile, and only one can run at a time, so a profiled request that
+overlaps another runs unprofiled, marked with ``X-Profile-Skipped``.
+"""
+
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Optional
+
+from flask import Flask, Response, g, request
+from .session import get_store
+
+# Header that asks for a request to be profiled; its value is the host GM token
+PROFILE_HEADER = "X-Profile"
+
+# Longest sampling run allowed (seconds)
+MAX_SAMPLE_SECONDS = 60
+
+# Seconds between samples
+SAMPLE_INTERVAL = 0.005
+
+# Request profiles kept for fetching
+PROFILES_KEPT = 20
+
+# A thread whose innermost Python frame is in one of these is waiting, not working
+_IDLE_MODULES = ("threading.py", "selectors.py", "socket.py", "queue.py", "wasyncore.py")
+
+# One sampling run at a time; two would sample each other
+_sampling = threading.Lock()
+
+
+def is_host_gm(token: str) -> bool:
+    """Whether ``token`` is the GM token of the server's host table."""
+    store = get_store()
+    session = store.find_by_gm_token(token)
+    return session is not None and session.id == store.default().id
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(
+    seconds: float, interval: float = SAMPLE_INTERVAL, include_idle: bool = False
+) -> Optional[str]:
+    """Sample every other thread's stack for ``seconds``.
+
+    Returns:
+        Collapsed stacks (``root;...;leaf count`` lines, most samples
+        first), or None if another sampling run is in progress
+    """
+    if not _sampling.acquire(blocking=False):
+        return None
+    try:
+        me = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if not include_idle and frame.f_code.co_filename.endswith(_IDLE_MODULES):
+                    continue
+                frames = []
+                while frame is not None:
+                    frames.append(_frame_name(frame))
+                    frame = frame.f_back
+                frames.append(names.get(ident, "thread"))
+                stacks[";".join(reversed(frames))] += 1
+            time.sleep(interval)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+    finally:
+        _sampling.release()
+
+
+class RequestProfiles:
+    """The most recent request profiles, by ID."""
+
+    def __init__(self, kept: int = PROFILES_KEPT):
+        self.kept = kept
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._profiles: "OrderedDict[int, cProfile.Profile]" = OrderedDict()
+
+    def add(self, profile: cProfile.Profile) -> int:
+        with self._lock:
+            profile_id = next(self._ids)
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self.kept:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: int) -> Optional[cProfile.Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+
+profiles = RequestProfiles()
+
+
+def profile_report(profile: cProfile.Profile, limit: int = 40) -> str:
+    """The slowest functions of a profile by cumulative time, as text."""
+    stream = io.StringIO()
+    pstats.Stats(profile, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
+
+
+def profile_dump(profile: cProfile.Profile) -> bytes:
+    """A profile in the file format ``pstats.Stats`` loads."""
+    profile.create_stats()
+    return marshal.dumps(profile.stats)
+
+
+def _start_profile() -> None:
+    token = request.headers.get(PROFILE_HEADER)
+    if token and is_host_gm(token):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # 3.12+: another request's profile is running
+            g.profile_skipped = True
+            return
+        g.profile = profile
+
+
+def _stop_profile(response: Response) -> Response:
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profile.disable()
+        response.headers["X-Profile-Id"] = str(profiles.add(profile))
+    elif g.pop("profile_skipped", False):
+        response.headers["X-Profile-Skipped"] = "another profile is running"
+    return response
+
+
+def _end_profile(exc: Optional[BaseException]) -> None:
+    # A view that raised skips after_request; don't leave the profiler on
+    profile = g.pop("profile", None)
+    if profile is not None:
+        profile.disable()
+
+
+def init_profiling(app: Flask) -> None:
+    """Profile requests that carry the host GM token in ``X-Profile``.
+
+    Call after the other hooks are registered, so the profile stops before
+    they post-process the response.
+    """
+    app.before_request(_start_profile)
+    app.after_request(_stop_profile)
+    app.teardown_request(_end_profile)
@@ -0,0 +1,210 @@
+"""
+Change notifications between server workers.
+
+Every worker process keeps its own EventBroker per session for the streams
+it serves, but a change can be made by any of them. Writers stage a
+Message in the same transaction as the change, and the pub/sub delivers
+it to every subscribed store after the commit, in commit order, so each
+broker publishes the same events in the same version order.
+
+SQLitePubSub carries messages between processes through a table in the
+shared database, which each worker polls (a cheap ``PRAGMA
+data_version`` check while nothing changes). LocalPubSub delivers between
+stores in one process; it is the default for a single worker and the fake
+that tests run several "workers" against.
+"""
+
+import json
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+# Message type that ends a deleted session's streams in every worker
+CLOSED = "closed"
+
+# Seconds between checks for other workers' changes
+POLL_INTERVAL = 0.05
+
+# Messages kept in the table, far more than a worker falls behind between polls
+KEEP_MESSAGES = 10_000
+
+# Trim old messages every this many writes
+TRIM_EVERY = 1_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    char_id TEXT,
+    gm_only INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+"""
+
+
+class Message(NamedTuple):
+    """One change to a session, as published to its EventBroker."""
+
+    session_id: str
+    version: int
+    type: str
+    payload: Dict[str, Any]
+    char_id: Optional[str] = None
+    gm_only: bool = False
+
+
+class PubSub(ABC):
+    """Delivers staged messages to every subscriber once their write commits."""
+
+    def __init__(self):
+        self._subscribers: List[Callable[[Message], None]] = []
+        # One delivery at a time, so subscribers see messages in order
+        self._deliver_lock = threading.Lock()
+
+    def subscribe(self, callback: Callable[[Message], None]) -> None:
+        """Call ``callback`` with every message from now on."""
+        self._subscribers.append(callback)
+
+    @abstractmethod
+    def stage(self, db: sqlite3.Connection, message: Message) -> None:
+        """Queue a message inside the write transaction that makes the change."""
+
+    def flush(self) -> None:
+        """The staging transaction committed; deliver its message."""
+        self.deliver()
+
+    def discard(self) -> None:
+        """The staging transaction rolled back; drop its message, if any."""
+
+    def deliver(self) -> None:
+        """Deliver every committed message not yet delivered, in order."""
+        with self._deliver_lock:
+            for message in self._fetch():
+                for callback in self._subscribers:
+                    callback(message)
+
+    @abstractmethod
+    def _fetch(self) -> List[Message]:
+        """Committed messages after the last delivered (caller holds _deliver_lock)."""
+
+    def close(self) -> None:
+        """Stop delivering."""
+
+
+class LocalPubSub(PubSub):
+    """Pub/sub between the stores of one process.
+
+    Messages are numbered when staged, while the writer holds the
+    database's write lock, so numbering follows commit order; delivery
+    waits for each one to commit (or roll back) before the next.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._staged = threading.local()
+        self._next_seq = 0
+        self._delivered = 0
+        # seq -> message once committed, None if rolled back; absent while pending
+        self._done: Dict[int, Optional[Message]] = {}
+
+    def stage(self, db: sqlite3.Connection, message: Message) -> None:
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+        self._staged.pending = (seq, message)
+
+    def _settle(self, committed: bool) -> bool:
+        pending = getattr(self._staged, "pending", None)
+        if pending is None:
+            return False
+        self._staged.pending = None
+        seq, message = pending
+        with self._lock:
+            self._done[seq] = message if committed else None
+        return True
+
+    def flush(self) -> None:
+        if self._settle(committed=True):
+            self.deliver()
+
+    def discard(self) -> None:
+        if self._settle(committed=False):
+            self.deliver()
+
+    def _fetch(self) -> List[Message]:
+        messages = []
+        with self._lock:
+            while self._delivered in self._done:
+                message = self._done.pop(self._delivered)
+                self._delivered += 1
+                if message is not None:
+                    messages.append(message)
+        return messages
+
+
+class SQLitePubSub(PubSub):
+    """Pub/sub between processes through an ``events`` table.
+
+    Args:
+        path: The database file the workers share
+        poll_interval: Seconds between checks for other workers' changes
+    """
+
+    def __init__(self, path, poll_interval: float = POLL_INTERVAL):
+        super().__init__()
+        # Used only under _deliver_lock, from writers and the poller
+        self._db = sqlite3.connect(str(path), isolation_level=None, timeout=30,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        (self._seq,) = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()
+        self._data_version = None
+        self._stop = threading.Event()
+        self._poller = threading.Thread(
+            target=self._poll, args=(poll_interval,), name="pubsub-poll", daemon=True
+        )
+        self._poller.start()
+
+    def stage(self, db: sqlite3.Connection, message: Message) -> None:
+        seq = db.execute(
+            "INSERT INTO events (session_id, version, type, char_id, gm_only, payload) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (message.session_id, message.version, message.type, message.char_id,
+             int(message.gm_only), json.dumps(message.payload, separators=(",", ":"))),
+        ).lastrowid
+        if seq % TRIM_EVERY == 0:
+            db.execute("DELETE FROM events WHERE seq <= ?", (seq - KEEP_MESSAGES,))
+
+    def _fetch(self) -> List[Message]:
+        if self._stop.is_set():
+            return []
+        rows = self._db.execute(
+            "SELECT seq, session_id, version, type, char_id, gm_only, payload "
+            "FROM events WHERE seq > ? ORDER BY seq",
+            (self._seq,),
+        ).fetchall()
+        if rows:
+            self._seq = rows[-1][0]
+        return [
+            Message(session_id, version, event_type, json.loads(payload), char_id, bool(gm_only))
+            for _, session_id, version, event_type, char_id, gm_only, payload in rows
+        ]
+
+    def _poll(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            with self._deliver_lock:
+                # Changes whenever another connection commits
+                (data_version,) = self._db.execute("PRAGMA data_version").fetchone()
+                changed, self._data_version = data_version != self._data_version, data_version
+            if changed:
+                self.deliver()
+
+    def close(self) -> None:
+        self._stop.set()
+        self._poller.join()
+        with self._deliver_lock:
+            self._db.close()
@@ -2,12 +2,115 @@
 REST API routes for character and session management.
 """
 
-from flask import Blueprint, jsonify, request, Response
-from ..session import game_session
+from flask import Blueprint, current_app, jsonify, request, Response
+from ..compression import wants_pretty
+from ..events import FINAL_EVENTS
+from ..metrics import metrics
+from ..profiling import MAX_SAMPLE_SECONDS, profile_dump, profile_report, profiles, sample_stacks
+from ..patch import PatchConflict, PatchError, VersionConflict
+from ..session import get_store
 from ...generator import generate_character
+from ... import combat, probability
 
 api_bp = Blueprint("api", __name__)
 
+JSON_PATCH_MIMETYPE = "application/json-patch+json"
+
+# Prometheus text exposition format
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4"
+
+# How long browsers wait before reconnecting a dropped event stream (ms)
+EVENTS_RETRY = 3000
+
+# Seconds a client turned away from the event stream polls before asking again
+EVENTS_POLL = 5
+
+
+def _session_for_token(token: str):
+    """Find the session a GM or player token belongs to.
+
+    Returns:
+        (session, is_gm); the default session when the token matches nothing
+    """
+    store = get_store()
+    session = store.find_by_gm_token(token)
+    if session:
+        return session, True
+    found = store.find_by_player_token(token)
+    if found:
+        return found[0], False
+    return store.default(), False
+
+
+def etag(session, version: int) -> str:
+    """ETag for something at ``version`` of a session's current contents.
+
+    ETags are version counters (the session's, or a character's own), so
+    making or checking one never serializes or hashes the body. Versions
+    start again when a file is loaded, so they're prefixed with the
+    session's epoch: ``"<epoch>-<version>"``.
+    """
+    return f"{session.epoch}-{version}"
+
+
+def is_fresh(session, version: int) -> bool:
+    """Whether the copy the client already has (If-None-Match) is at ``version``."""
+    return request.if_none_match.contains_weak(etag(session, version))
+
+
+def tagged(response: Response, session, version: int) -> Response:
+    """Tag a response with its version so clients can revalidate it cheaply."""
+    response.set_etag(etag(session, version))
+    # Tokens are in the URL; let browsers keep a copy but always ask first
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified(session, version: int) -> Response:
+    """304 reply for a client whose copy is still current."""
+    return tagged(Response(status=304), session, version)
+
+
+# Matches no character version: an If-Match from before the session was loaded
+STALE_VERSION = -1
+
+
+def expected_version(session):
+    """Character version the request's If-Match header requires.
+
+    Takes one of our ETags or a bare version number (what the sheet sends).
+
+    Returns:
+        The version (STALE_VERSION for a tag from an earlier epoch), or None
+        if the request doesn't make its edit conditional
+
+    Raises:
+        ValueError: If the header isn't a version or one of our ETags
+    """
+    header = request.headers.get("If-Match", "").strip()
+    if not header or header == "*":
+        return None
+    epoch, _, version = header.removeprefix("W/").strip('"').rpartition("-")
+    version = int(version)
+    if epoch and epoch != session.epoch:
+        return STALE_VERSION
+    return version
+
+
+def conflict_body(conflict: VersionConflict):
+    """What a client needs to redo an edit that lost a version race.
+
+    The delta turns the character the client based its edit on into the
+    current one; without one (the client's version is too old) the whole
+    character is sent.
+    """
+    body = {"error": str(conflict), "version": conflict.version}
+    if conflict.delta is not None:
+        body["delta"] = conflict.delta
+    else:
+        body["character"] = conflict.character
+    return body
+
 
 # Session endpoints
 
@@ -15,20 +118,26 @@ api_bp = Blueprint("api", __name__)
 def get_session():
     """Get full session state (GM only)."""
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return jsonify({"error": "Unauthorized"}), 401
-    return jsonify(game_session.get_state())
+    version = session.version
+    if is_fresh(session, version):
+        return not_modified(session, version)
+    snapshot = session.snapshot()
+    return tagged(jsonify(snapshot.state), session, snapshot.version)
 
 
 @api_bp.route("/session/save", methods=["POST"])
 def save_session():
-    """Export session as JSON download (GM only)."""
+    """Export session as JSON download (GM only); indented with ``?pretty``."""
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return jsonify({"error": "Unauthorized"}), 401
 
-    json_data = game_session.to_json()
-    session_name = game_session.get_state().get("session_name", "session")
+    json_data = session.to_json(pretty=wants_pretty())
+    session_name = session.get_state().get("session_name", "session")
     safe_name = "".join(c for c in session_name if c.isalnum() or c in " -_").strip().replace(" ", "_")
 
     return Response(
@@ -42,7 +151,8 @@ def save_session():
 def load_session():
     """Load session from uploaded JSON (GM only)."""
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return jsonify({"error": "Unauthorized"}), 401
 
     if "file" not in request.files:
@@ -55,10 +165,10 @@ def load_session():
     else:
         json_str = request.files["file"].read().decode("utf-8")
 
-    if game_session.from_json(json_str):
+    if session.from_json(json_str):
         return jsonify({
             "success": True,
-            "new_gm_token": game_session.gm_token,
+            "new_gm_token": session.gm_token,
             "message": "Session loaded. New GM token generated."
         })
     return jsonify({"error": "Invalid session file"}), 400
@@ -68,13 +178,14 @@ def load_session():
 def new_session():
     """Start a fresh session (GM only)."""
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return jsonify({"error": "Unauthorized"}), 401
 
-    game_session.reset()
+    session.reset()
     return jsonify({
         "success": True,
-        "new_gm_token": game_session.gm_token,
+        "new_gm_token": session.gm_token,
         "message": "New session started."
     })
 
@@ -83,14 +194,15 @@ def new_session():
 def update_session_name():
     """Update session name (GM only)."""
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return jsonify({"error": "Unauthorized"}), 401
 
     data = request.get_json()
     if not data or "name" not in data:
         return jsonify({"error": "Name required"}), 400
 
-    game_session.set_session_name(data["name"])
+    session.set_session_name(data["name"])
     return jsonify({"success": True})
 
 
@@ -98,17 +210,50 @@ def update_session_name():
 def update_session_data():
     """Update session data like turn count (GM only)."""
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return jsonify({"error": "Unauthorized"}), 401
 
     data = request.get_json()
     if not data:
         return jsonify({"error": "No data provided"}), 400
 
-    game_session.update_session_data(data)
+    session.update_session_data(data)
+    return jsonify({"success": True})
+
+
+@api_bp.route("/session", methods=["DELETE"])
+def delete_session():
+    """Delete this table and its characters (GM only)."""
+    token = request.args.get("token", "")
+    session = get_store().find_by_gm_token(token)
+    if not session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    get_store().delete(session.id)
     return jsonify({"success": True})
 
 
+@api_bp.route("/sessions", methods=["GET"])
+def list_sessions():
+    """List the tables this server hosts."""
+    return jsonify([
+        {"id": table["id"], "name": table["name"], "characters": len(table["characters"])}
+        for table in get_store().list_sessions()
+    ])
+
+
+@api_bp.route("/sessions", methods=["POST"])
+def create_session():
+    """Start a new table with its own GM token."""
+    session = get_store().create()
+    return jsonify({
+        "success": True,
+        "session_id": session.id,
+        "gm_token": session.gm_token,
+    }), 201
+
+
 @api_bp.route("/server/shutdown", methods=["POST"])
 def shutdown_server():
     """Shutdown the server (GM only)."""
@@ -116,10 +261,15 @@ def shutdown_server():
     import signal
 
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return jsonify({"error": "Unauthorized"}), 401
+    if session.id != get_store().default().id:
+        return jsonify({"error": "Only the host table's GM can stop the server"}), 403
 
     def shutdown():
+        # Every change is already in the log; a snapshot just makes restart faster
+        get_store().close()
         os.kill(os.getpid(), signal.SIGTERM)
 
     # Schedule shutdown after response is sent
@@ -129,31 +279,107 @@ def shutdown_server():
     return jsonify({"success": True, "message": "Server shutting down..."})
 
 
+def host_gm_error(action: str):
+    """Error reply unless the request's token is the host table's GM's.
+
+    Server-wide tools (metrics, profiling) aren't for every table's GM.
+
+    Returns:
+        A (response, status) pair, or None if the request may go ahead
+    """
+    token = request.args.get("token", "")
+    session = get_store().find_by_gm_token(token)
+    if not session:
+        return jsonify({"error": "Unauthorized"}), 401
+    if session.id != get_store().default().id:
+        return jsonify({"error": f"Only the host table's GM can {action}"}), 403
+    return None
+
+
+@api_bp.route("/metrics", methods=["GET"])
+def server_metrics():
+    """Request and stage timings in the Prometheus text format (host GM only)."""
+    error = host_gm_error("read server metrics")
+    if error:
+        return error
+    return Response(metrics.render(), mimetype=PROMETHEUS_MIMETYPE)
+
+
+@api_bp.route("/debug/profile", methods=["GET"])
+def profile_server():
+    """Sample every thread's stack for ``?seconds=N`` (host GM only).
+
+    Returns collapsed stacks, the input of flame graph tools; ``?idle=1``
+    keeps threads that were only waiting.
+    """
+    error = host_gm_error("profile the server")
+    if error:
+        return error
+    try:
+        seconds = float(request.args.get("seconds", 5))
+    except ValueError:
+        return jsonify({"error": "Invalid seconds"}), 400
+    if not 0 < seconds <= MAX_SAMPLE_SECONDS:
+        return jsonify({"error": f"seconds must be between 0 and {MAX_SAMPLE_SECONDS}"}), 400
+
+    include_idle = request.args.get("idle") not in (None, "0", "false")
+    stacks = sample_stacks(seconds, include_idle=include_idle)
+    if stacks is None:
+        return jsonify({"error": "A profile is already running"}), 409
+    return Response(stacks, mimetype="text/plain")
+
+
+@api_bp.route("/debug/profile/<int:profile_id>", methods=["GET"])
+def request_profile(profile_id: int):
+    """A profiled request's cProfile report (host GM only).
+
+    Text by default; ``?format=pstats`` downloads the stats file.
+    """
+    error = host_gm_error("profile the server")
+    if error:
+        return error
+    profile = profiles.get(profile_id)
+    if profile is None:
+        return jsonify({"error": "Profile not found"}), 404
+    if request.args.get("format") == "pstats":
+        return Response(
+            profile_dump(profile),
+            mimetype="application/octet-stream",
+            headers={"Content-Disposition": f"attachment; filename=request_{profile_id}.pstats"},
+        )
+    return Response(profile_report(profile), mimetype="text/plain")
+
+
 # Character endpoints
 
 @api_bp.route("/characters", methods=["GET"])
 def list_characters():
     """List all characters (GM) or just names/IDs (players)."""
     token = request.args.get("token", "")
-    is_gm = game_session.verify_gm(token)
+    session, is_gm = _session_for_token(token)
+    version = session.version
+    if is_fresh(session, version):
+        return not_modified(session, version)
 
-    characters = game_session.get_all_characters()
+    snapshot = session.snapshot()
+    characters = snapshot.characters
 
     if is_gm:
-        return jsonify(characters)
+        return tagged(jsonify(characters), session, snapshot.version)
     else:
         # Players only see name and ID for the join page
-        return jsonify({
+        return tagged(jsonify({
             char_id: {"id": char["id"], "name": char["name"]}
             for char_id, char in characters.items()
-        })
+        }), session, snapshot.version)
 
 
 @api_bp.route("/characters", methods=["POST"])
 def create_character():
     """Create a new character (GM only)."""
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return jsonify({"error": "Unauthorized"}), 401
 
     # Check if custom data provided or generate new
@@ -161,78 +387,292 @@ def create_character():
     if data.get("name"):
         character = data
     else:
-        character = generate_character()
+        character = generate_character(rng=session.rng)
 
-    char_id = game_session.add_character(character)
+    char_id = session.add_character(character)
     return jsonify({
         "success": True,
-        "character": game_session.get_character(char_id)
+        "character": session.get_character(char_id)
     }), 201
 
 
 @api_bp.route("/characters/<char_id>", methods=["GET"])
 def get_character(char_id: str):
     """Get a specific character."""
-    character = game_session.get_character(char_id)
+    token = request.args.get("token", "")
+    session, is_gm = _session_for_token(token)
+    character = session.get_character(char_id)
     if not character:
         return jsonify({"error": "Character not found"}), 404
 
     # Check authorization - GM can see all, player needs their token
-    token = request.args.get("token", "")
-    is_gm = game_session.verify_gm(token)
     is_owner = character.get("player_token") == token
 
     if not is_gm and not is_owner:
         return jsonify({"error": "Unauthorized"}), 401
 
-    return jsonify(character)
+    version = character.get("version", 0)
+    if is_fresh(session, version):
+        return not_modified(session, version)
+    return tagged(jsonify(character), session, version)
 
 
 @api_bp.route("/characters/<char_id>", methods=["PATCH"])
 def update_character(char_id: str):
-    """Update a character (GM or owner)."""
-    character = game_session.get_character(char_id)
+    """Update a character (GM or owner).
+
+    With ``If-Match: "<version>"`` the edit only applies if the character
+    is still at that version; otherwise the reply is a 409 with the changes
+    since then.
+    """
+    token = request.args.get("token", "")
+    session, is_gm = _session_for_token(token)
+    character = session.get_character(char_id)
     if not character:
         return jsonify({"error": "Character not found"}), 404
 
     # Check authorization
-    token = request.args.get("token", "")
-    is_gm = game_session.verify_gm(token)
     is_owner = character.get("player_token") == token
 
     if not is_gm and not is_owner:
         return jsonify({"error": "Unauthorized"}), 401
 
-    data = request.get_json()
+    # A JSON Patch (a list of operations) changes only the paths it names;
+    # a plain object is deep-merged into the character
+    data = request.get_json(force=request.mimetype == JSON_PATCH_MIMETYPE, silent=True)
     if not data:
         return jsonify({"error": "No data provided"}), 400
-
-    if game_session.update_character(char_id, data):
-        return jsonify({
-            "success": True,
-            "character": game_session.get_character(char_id)
-        })
-    return jsonify({"error": "Update failed"}), 500
+    if not isinstance(data, (dict, list)):
+        return jsonify({"error": "Expected a JSON object or a JSON Patch"}), 400
+    try:
+        expected = expected_version(session)
+    except ValueError:
+        return jsonify({"error": "Invalid If-Match header"}), 400
+
+    try:
+        if isinstance(data, list):
+            version = session.patch_character(char_id, data, expected)
+            if not version:
+                return jsonify({"error": "Character not found"}), 404
+            # The client already has the result; keep the reply as small as the edit
+            response = jsonify({"success": True, "version": version})
+        else:
+            version = session.update_character(char_id, data, expected)
+            if not version:
+                # Deleted since we looked it up
+                return jsonify({"error": "Character not found"}), 404
+            response = jsonify({
+                "success": True,
+                "character": session.get_character(char_id)
+            })
+    except VersionConflict as e:
+        response = jsonify(conflict_body(e))
+        response.status_code = 409
+        version = e.version
+    except PatchConflict as e:
+        return jsonify({"error": str(e)}), 409
+    except PatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    response.set_etag(etag(session, version))
+    return response
 
 
 @api_bp.route("/characters/<char_id>", methods=["DELETE"])
 def delete_character(char_id: str):
     """Delete a character (GM only)."""
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return jsonify({"error": "Unauthorized"}), 401
 
-    if game_session.delete_character(char_id):
+    if session.delete_character(char_id):
         return jsonify({"success": True})
     return jsonify({"error": "Character not found"}), 404
 
 
+# Live updates
+
+@api_bp.route("/events", methods=["GET"])
+def session_events():
+    """Stream session changes as Server-Sent Events (GM or player).
+
+    Each event's id is the session version it produced. Clients pass the
+    version their page was rendered at as ``since``; browsers resume from
+    the last event they saw when they reconnect. Players only receive
+    events for their own character and session-wide changes.
+    """
+    token = request.args.get("token", "")
+    store = get_store()
+    session = store.find_by_gm_token(token)
+    char_id = None
+    if not session:
+        found = store.find_by_player_token(token)
+        if not found:
+            return jsonify({"error": "Unauthorized"}), 401
+        session, character = found
+        char_id = character["id"]
+
+    since = request.headers.get("Last-Event-ID") or request.args.get("since")
+    try:
+        after = int(since) if since else session.version
+    except ValueError:
+        return jsonify({"error": "Invalid event id"}), 400
+    broker = session.events
+
+    slots = current_app.extensions["event_streams"]
+    if not slots.take(current_app.config["MAX_EVENT_STREAMS"]):
+        response = jsonify({"error": "Too many live update streams; poll instead"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(EVENTS_POLL)
+        return response
+
+    def stream():
+        nonlocal after
+        yield f"retry: {EVENTS_RETRY}\n\n"
+        while True:
+            events = broker.wait(after)
+            if events is None:
+                return
+            if not events:
+                # Keeps proxies from timing out and finds closed connections
+                yield ": keep-alive\n\n"
+                continue
+            messages = []
+            for event in events:
+                after = event.version
+                if event.visible_to(char_id):
+                    messages.append(event.to_sse())
+                if event.type in FINAL_EVENTS:
+                    # Nothing after a reset belongs to this token's session
+                    yield "".join(messages)
+                    return
+            if messages:
+                yield "".join(messages)
+
+    response = Response(stream(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+    # The server closes the response when the stream ends or the client leaves
+    response.call_on_close(slots.give_back)
+    return response
+
+
 # Player token endpoint
 
 @api_bp.route("/player/<player_token>", methods=["GET"])
 def get_character_by_player_token(player_token: str):
     """Get character by player token (for player view)."""
-    character = game_session.get_character_by_token(player_token)
-    if not character:
+    found = get_store().find_by_player_token(player_token)
+    if not found:
         return jsonify({"error": "Character not found"}), 404
-    return jsonify(character)
+    session, character = found
+    version = character.get("version", 0)
+    if is_fresh(session, version):
+        return not_modified(session, version)
+    return tagged(jsonify(character), session, version)
+
+
+# Probability endpoints
+
+@api_bp.route("/odds", methods=["GET"])
+def dice_odds():
+    """Exact distribution for dice notation, e.g. ?dice=3d6k2&at_least=9."""
+    notation = request.args.get("dice", "")
+    try:
+        distribution = probability.parse(notation)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = distribution.to_dict()
+    result["dice"] = notation
+    for key, chance in (("at_most", distribution.at_most), ("at_least", distribution.at_least)):
+        value = request.args.get(key, type=int)
+        if value is not None:
+            result[key] = {"value": value, "chance": float(chance(value))}
+    return jsonify(result)
+
+
+@api_bp.route("/odds/save", methods=["GET"])
+def save_odds():
+    """Chance to pass a save, e.g. ?score=9&mode=advantage."""
+    score = request.args.get("score", type=int)
+    mode = request.args.get("mode", "normal")
+    if score is None:
+        return jsonify({"error": "Score required"}), 400
+    if mode not in probability.SAVE_MODES:
+        return jsonify({"error": f"Mode must be one of {', '.join(probability.SAVE_MODES)}"}), 400
+    return jsonify({
+        "score": score,
+        "mode": mode,
+        "chance": float(probability.save_chance(score, mode)),
+    })
+
+
+@api_bp.route("/odds/character", methods=["GET"])
+def character_odds():
+    """Attribute distribution and bonus item chances for a new mouse."""
+    one_item, two_items = probability.extra_items_chance()
+    return jsonify({
+        "attribute": probability.ATTRIBUTE.to_dict(),
+        "extra_items": {
+            "at_least_one": float(one_item),
+            "two": float(two_items),
+        },
+    })
+
+
+# Encounter balancing
+
+@api_bp.route("/combat/simulate", methods=["POST"])
+def simulate_combat():
+    """Simulate many fights between the party and a group of creatures (GM only).
+
+    Body: {"enemies": [stat blocks], "party": [character IDs or stat blocks],
+    "fights": N, "seed": S}. Without "party", every character in the session fights.
+    """
+    token = request.args.get("token", "")
+    session = get_store().find_by_gm_token(token)
+    if not session:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    entries = data.get("party") or list(session.get_all_characters())
+    enemies = data.get("enemies") or []
+    if not isinstance(entries, list) or not isinstance(enemies, list):
+        return jsonify({"error": "Party and enemies must be lists"}), 400
+
+    party = []
+    try:
+        for entry in entries:
+            if isinstance(entry, str):
+                character = session.get_character(entry)
+                if not character:
+                    return jsonify({"error": f"Character not found: {entry}"}), 404
+                entry = character
+            if not isinstance(entry, dict):
+                return jsonify({"error": "Party entries must be character IDs or stat blocks"}), 400
+            if "attributes" in entry:
+                party.append(combat.combatant_from_character(entry))
+            else:
+                party.append(entry)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    fights = data.get("fights", 10_000)
+    if not isinstance(fights, int) or not 1 <= fights <= combat.MAX_API_FIGHTS:
+        return jsonify({"error": f"Fights must be between 1 and {combat.MAX_API_FIGHTS}"}), 400
+    seed = data.get("seed")
+    if seed is not None and not isinstance(seed, int):
+        return jsonify({"error": "Seed must be an integer"}), 400
+
+    try:
+        result = combat.simulate_combat(party, enemies, fights, seed)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except ImportError as e:
+        return jsonify({"error": str(e)}), 501
+    return jsonify(result)
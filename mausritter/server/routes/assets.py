@@ -0,0 +1,56 @@
+"""
+Routes for the character sheet's static assets.
+"""
+
+from functools import lru_cache
+from typing import Dict
+
+from flask import Blueprint, jsonify, request, Response
+from ..compression import ENCODINGS, STATIC_LEVELS, accepted_encoding, compress
+from ...data import get_data_bundle
+from ...templates.assets import find_asset, sheet_assets
+
+assets_bp = Blueprint("assets", __name__)
+
+# A year; an asset's name changes whenever its content does
+ASSET_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def precompressed_assets() -> Dict[str, Dict[str, bytes]]:
+    """Every asset compressed at the highest level, by file name and encoding.
+
+    Built once per version of the tables (the app factory builds it at
+    startup), so serving an asset never compresses anything.
+    """
+    return _precompress(get_data_bundle().digest)
+
+
+@lru_cache(maxsize=1)
+def _precompress(data_digest: str) -> Dict[str, Dict[str, bytes]]:
+    # data_digest is only the cache key, as for the assets themselves
+    return {
+        asset.filename: {
+            encoding: compress(asset.content, encoding, STATIC_LEVELS[encoding])
+            for encoding in ENCODINGS
+        }
+        for asset in sheet_assets().values()
+    }
+
+
+@assets_bp.route("/<filename>")
+def sheet_asset(filename: str):
+    """Serve a content-hashed stylesheet or script."""
+    asset = find_asset(filename)
+    if asset is None:
+        return jsonify({"error": "Asset not found"}), 404
+    encoding = accepted_encoding()
+    if encoding is None:
+        response = Response(asset.content, mimetype=asset.mimetype)
+        response.set_etag(asset.filename)
+    else:
+        response = Response(precompressed_assets()[filename][encoding], mimetype=asset.mimetype)
+        response.headers["Content-Encoding"] = encoding
+        response.set_etag(f"{asset.filename}.{encoding}")
+    response.vary.add("Accept-Encoding")
+    response.headers["Cache-Control"] = f"public, max-age={ASSET_MAX_AGE}, immutable"
+    return response.make_conditional(request)
@@ -2,9 +2,11 @@
 GM dashboard routes.
 """
 
-from flask import Blueprint, render_template, request, Response
-from ..session import game_session
+from flask import Blueprint, redirect, render_template, request, Response
+from ..metrics import timed
+from ..session import get_store
 from ...templates.html_template import generate_character_sheet_html
+from ...templates.js import LIVE_UPDATE_JS
 
 gm_bp = Blueprint("gm", __name__)
 
@@ -13,38 +15,63 @@ gm_bp = Blueprint("gm", __name__)
 def dashboard():
     """GM dashboard - view and manage all characters."""
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return render_template("unauthorized.html"), 401
 
-    characters = game_session.get_all_characters()
-    session_state = game_session.get_state()
+    # One consistent view of the session, however many writes land meanwhile
+    snapshot = session.snapshot()
+    session_state = snapshot.state
 
     return render_template(
         "gm.html",
         token=token,
-        characters=characters,
+        version=snapshot.version,
+        characters=session_state["characters"],
         session_name=session_state.get("session_name", "New Session"),
         gm_notes=session_state.get("gm_notes", ""),
-        session_data=game_session.get_session_data(),
+        session_data=session_state.get("session_data") or {"turn_count": 1},
+        live_update_js=LIVE_UPDATE_JS,
     )
 
 
+@gm_bp.route("/new", methods=["POST"])
+def new_table():
+    """Start a new table and open its GM dashboard."""
+    session = get_store().create()
+    return redirect(f"/gm/?token={session.gm_token}", code=303)
+
+
+@gm_bp.route("/card/<char_id>")
+def character_card(char_id: str):
+    """One character's dashboard card, for cards added by live updates."""
+    token = request.args.get("token", "")
+    session = get_store().find_by_gm_token(token)
+    if not session:
+        return render_template("unauthorized.html"), 401
+
+    character = session.get_character(char_id)
+    if not character:
+        return render_template("not_found.html"), 404
+    return render_template("character_card.html", token=token, char_id=char_id, char=character)
+
+
 @gm_bp.route("/character/<char_id>")
 def view_character(char_id: str):
     """View/edit a specific character as GM - uses full character sheet."""
     token = request.args.get("token", "")
-    if not game_session.verify_gm(token):
+    session = get_store().find_by_gm_token(token)
+    if not session:
         return render_template("unauthorized.html"), 401
 
-    character = game_session.get_character(char_id)
+    # Read the version first: the sheet may replay a change it already has,
+    # but never misses one
+    version = session.version
+    character = session.get_character(char_id)
     if not character:
         return render_template("not_found.html"), 404
 
-    # Generate full character sheet HTML with server connectivity
-    # GM uses their token for API auth
-    html = generate_character_sheet_html(character, server_mode=True, token=token)
-
-    # Add a back button to the GM dashboard
+    # A back button to the GM dashboard
     back_button = f'''
     <div style="position:fixed;top:10px;left:10px;z-index:9999;">
         <a href="/gm/?token={token}" style="background:#4a4a5a;color:white;padding:10px 20px;border-radius:8px;text-decoration:none;font-weight:bold;">
@@ -52,6 +79,12 @@ def view_character(char_id: str):
         </a>
     </div>
     '''
-    html = html.replace('<body>', '<body>' + back_button)
+
+    # Generate full character sheet HTML with server connectivity
+    # GM uses their token for API auth
+    with timed("render_sheet"):
+        html = generate_character_sheet_html(
+            character, server_mode=True, token=token, version=version, chrome=back_button
+        )
 
     return Response(html, mimetype='text/html')
@@ -3,7 +3,8 @@ Player view routes.
 """
 
 from flask import Blueprint, render_template, Response
-from ..session import game_session
+from ..metrics import timed
+from ..session import get_store
 from ...templates.html_template import generate_character_sheet_html
 
 player_bp = Blueprint("player", __name__)
@@ -12,22 +13,29 @@ player_bp = Blueprint("player", __name__)
 @player_bp.route("/join")
 def join():
     """Player join page - select character."""
-    characters = game_session.get_all_characters()
-    # Only expose names and player tokens for selection
-    char_list = [
-        {"name": char["name"], "token": char["player_token"]}
-        for char in characters.values()
-    ]
-    return render_template("join.html", characters=char_list)
+    # Each table lists only names and player tokens for selection
+    tables = get_store().list_sessions()
+    return render_template("join.html", tables=tables)
 
 
 @player_bp.route("/player/<player_token>")
 def player_view(player_token: str):
     """Player character sheet view - uses full character sheet with server connectivity."""
-    character = game_session.get_character_by_token(player_token)
+    found = get_store().find_by_player_token(player_token)
+    if not found:
+        return render_template("not_found.html"), 404
+    session = found[0]
+
+    # Read the version first: the sheet may replay a change it already has,
+    # but never misses one
+    version = session.version
+    character = session.get_character_by_token(player_token)
     if not character:
         return render_template("not_found.html"), 404
 
     # Generate the full character sheet HTML with server connectivity
-    html = generate_character_sheet_html(character, server_mode=True, token=player_token)
+    with timed("render_sheet"):
+        html = generate_character_sheet_html(
+            character, server_mode=True, token=player_token, version=version
+        )
     return Response(html, mimetype='text/html')
@@ -0,0 +1,137 @@
+"""
+WebSocket sync for character sheets.
+
+An open sheet keeps one connection to ``/api/sync``. Edits travel as small
+frames (a JSON Patch, or a merge update for the first save) and are
+acknowledged with the session version that includes them and the
+character's new version; the session's live update events for the
+character come back on the same socket.
+
+Needs flask-sock (``pip install flask-sock``). Without it the route isn't
+registered and sheets save through the REST API and listen on
+``/api/events`` instead.
+"""
+
+import json
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from flask import Blueprint, request
+from ..events import FINAL_EVENTS
+from ..patch import PatchConflict, PatchError, VersionConflict
+from ..session import get_store
+from .api import conflict_body
+
+try:
+    from flask_sock import Sock
+    from simple_websocket import ConnectionClosed
+except ImportError:  # WebSockets are optional; sheets fall back to REST
+    Sock = None
+
+sync_bp = Blueprint("sync", __name__)
+
+# WebSocket close code for a rejected token (policy violation)
+CLOSE_UNAUTHORIZED = 1008
+
+
+def _authorize(token: str, char_id: str) -> Optional[Tuple[Any, str]]:
+    """Find the session if ``token`` may edit ``char_id`` (GM or owner)."""
+    store = get_store()
+    session = store.find_by_gm_token(token)
+    if session:
+        return (session, char_id) if session.get_character(char_id) else None
+    found = store.find_by_player_token(token)
+    if found and found[1]["id"] == char_id:
+        return found[0], char_id
+    return None
+
+
+def apply_frame(session, char_id: str, frame: str) -> Dict[str, Any]:
+    """Apply one edit frame to a character and build the reply.
+
+    Frames are ``{"seq": n, "patch": [...]}`` or ``{"seq": n, "update": {...}}``,
+    plus ``"if_match": character_version`` to make the edit conditional.
+
+    Returns:
+        ``{"ack": n, "version": v, "character_version": cv}``, or
+        ``{"nack": n, "status": code, "error": message}`` with the status
+        (and, for version conflicts, the body) the REST API would give
+    """
+    try:
+        message = json.loads(frame)
+    except (TypeError, ValueError):
+        return {"nack": None, "status": 400, "error": "Invalid frame"}
+    if not isinstance(message, dict):
+        return {"nack": None, "status": 400, "error": "Invalid frame"}
+    seq = message.get("seq")
+    expected = message.get("if_match")
+    if expected is not None and type(expected) is not int:
+        return {"nack": seq, "status": 400, "error": "Invalid if_match"}
+
+    try:
+        if isinstance(message.get("patch"), list):
+            version = session.patch_character(char_id, message["patch"], expected)
+        elif isinstance(message.get("update"), dict):
+            version = session.update_character(char_id, message["update"], expected)
+        else:
+            return {"nack": seq, "status": 400, "error": "No changes in frame"}
+    except VersionConflict as e:
+        # "version" means the session version in acks; name this one apart
+        body = conflict_body(e)
+        body["character_version"] = body.pop("version")
+        return {"nack": seq, "status": 409, **body}
+    except PatchConflict as e:
+        return {"nack": seq, "status": 409, "error": str(e)}
+    except PatchError as e:
+        return {"nack": seq, "status": 400, "error": str(e)}
+    if not version:
+        return {"nack": seq, "status": 404, "error": "Character not found"}
+    return {"ack": seq, "version": session.version, "character_version": version}
+
+
+if Sock is not None:
+    sock = Sock()
+
+    @sock.route("/sync", bp=sync_bp)
+    def character_sync(ws):
+        """Sync one character sheet: edits in, acks and live updates out.
+
+        Query parameters: ``token`` (GM or the character's player),
+        ``character`` (its ID) and ``since`` (version the sheet has seen).
+        """
+        found = _authorize(request.args.get("token", ""), request.args.get("character", ""))
+        if not found:
+            ws.close(reason=CLOSE_UNAUTHORIZED, message="Unauthorized")
+            return
+        session, char_id = found
+        since = request.args.get("since", "")
+        after = int(since) if since.isdigit() else session.version
+        broker = session.events
+        send_lock = threading.Lock()
+
+        def send(frame: str) -> None:
+            with send_lock:
+                ws.send(frame)
+
+        def push_events() -> None:
+            nonlocal after
+            try:
+                while ws.connected:
+                    events = broker.wait(after)
+                    if events is None:
+                        break
+                    for event in events:
+                        after = event.version
+                        if event.visible_to(char_id):
+                            # Splice the type into the already-serialized event
+                            send(f'{{"event":"{event.type}",{event.data[1:]}')
+                        if event.type in FINAL_EVENTS:
+                            ws.close()
+                            return
+            except ConnectionClosed:
+                pass
+
+        threading.Thread(target=push_events, daemon=True).start()
+        while True:
+            frame = ws.receive()
+            send(json.dumps(apply_frame(session, char_id, frame), separators=(",", ":")))
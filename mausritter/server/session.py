@@ -1,38 +1,463 @@
 """
 Session management for Mausritter GM server.
-Handles in-memory state and save/load to JSON.
+Handles in-memory state, save/load to JSON and optional durable storage
+through a write-ahead log. A SessionStore holds every campaign the server
+hosts, so one process can run many tables.
 """
 
 import json
 import secrets
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
-from typing import Dict, Any, Optional
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from ..rng import BufferedRNG
+from .events import EventBroker
+from .metrics import timed
+from .patch import PROTECTED_FIELDS, VersionConflict, apply_patch, diff
+from .store import WriteAheadLog
+
+
+# ID of the session every store starts with
+DEFAULT_SESSION_ID = "default"
+
+# Number of locks characters are spread over in a GameSession
+LOCK_STRIPES = 64
+
+# Past versions of each character kept to answer version conflicts with a delta
+CHARACTER_HISTORY = 16
+
+
+def new_session_id() -> str:
+    """Generate an ID for a new session."""
+    return secrets.token_hex(4)
+
+
+def new_epoch() -> str:
+    """Generate the epoch of a freshly reset or loaded session."""
+    return secrets.token_hex(4)
+
+
+def clone(value: Any) -> Any:
+    """Copy JSON-style data (dicts, lists and scalars) all the way down."""
+    if isinstance(value, dict):
+        return {key: clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [clone(item) for item in value]
+    return value
+
+
+def merge_updates(target: Dict[str, Any], source: Dict[str, Any]) -> None:
+    """Recursively merge a character update into the character."""
+    for key, value in source.items():
+        if key in PROTECTED_FIELDS:
+            # Don't allow changing these
+            continue
+        if isinstance(value, dict) and key in target and isinstance(target[key], dict):
+            # Recursively merge nested dicts
+            merge_updates(target[key], value)
+        elif isinstance(value, list) and key in target and isinstance(target[key], list):
+            # For lists, replace entirely (inventory arrays)
+            target[key] = value
+        else:
+            target[key] = value
+
+
+def merged_updates(target: Dict[str, Any], source: Dict[str, Any]) -> Dict[str, Any]:
+    """Return a copy of target with an update merged in, leaving target as is.
+
+    Same rules as merge_updates, but only the dicts along changed paths are
+    copied; untouched parts are shared with target.
+    """
+    result = dict(target)
+    for key, value in source.items():
+        if key in PROTECTED_FIELDS:
+            continue
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = merged_updates(result[key], value)
+        else:
+            result[key] = clone(value)
+    return result
+
+
+def bump_version(character: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy of a changed character with its version counter incremented."""
+    return {**character, "version": character.get("version", 0) + 1}
+
+
+class CharacterHistory:
+    """The last few versions of each character, to diff stale edits against.
+
+    Entries are the (read-only) character documents themselves, so with
+    copy-on-write snapshots a past version costs only what changed in it.
+    Not thread-safe; the owning session serializes access.
+
+    Args:
+        size: Versions kept per character
+    """
+
+    def __init__(self, size: int = CHARACTER_HISTORY):
+        self.size = size
+        self._versions: Dict[str, deque] = {}
+
+    def record(self, char_id: str, character: Dict[str, Any]) -> None:
+        """Remember a character as of its current version."""
+        versions = self._versions.get(char_id)
+        if versions is None:
+            versions = self._versions[char_id] = deque(maxlen=self.size)
+        versions.append((character.get("version", 0), character))
+
+    def forget(self, char_id: str) -> None:
+        """Drop a deleted character's versions."""
+        self._versions.pop(char_id, None)
+
+    def clear(self) -> None:
+        """Drop everything (the session was replaced)."""
+        self._versions.clear()
+
+    def conflict(self, char_id: str, expected: int, character: Dict[str, Any]) -> VersionConflict:
+        """The error for an edit based on version ``expected`` of a character.
+
+        The delta is None if that version is no longer remembered.
+        """
+        # Newest first: an entry from a write that failed to commit is shadowed
+        # by the one that did
+        base = next(
+            (doc for version, doc in reversed(self._versions.get(char_id, ())) if version == expected),
+            None,
+        )
+        delta = diff(base, character) if base is not None else None
+        return VersionConflict(character.get("version", 0), delta, character)
+
+
+class SessionSnapshot(NamedTuple):
+    """Immutable view of a session at one version.
+
+    Writers never change a published snapshot; they publish a new one that
+    shares every unchanged character with the last. Treat everything in
+    ``state`` as read-only.
+    """
+
+    version: int
+    state: Dict[str, Any]
+
+    @property
+    def characters(self) -> Dict[str, Dict[str, Any]]:
+        return self.state["characters"]
+
+
+def _fresh_state() -> Dict[str, Any]:
+    return {
+        "session_name": "New Session",
+        "created": datetime.now().isoformat(),
+        "characters": {},
+        "gm_notes": "",
+        "session_data": {
+            "turn_count": 1
+        },
+        "combat": {
+            "active": False,
+            "turn_order": [],
+            "current_turn": 0
+        }
+    }
+
+
+# Types of the session fields a saved file may carry
+_SESSION_FIELD_TYPES = {
+    "session_name": str,
+    "created": str,
+    "gm_notes": str,
+    "characters": dict,
+    "session_data": dict,
+    "combat": dict,
+}
+
+
+def parse_session_file(
+    json_str: str, token_taken: Optional[Callable[[str], bool]] = None
+) -> Dict[str, Any]:
+    """Parse and check a saved session (as written by ``to_json``).
+
+    Loading checks the whole file with this before replacing anything, so
+    a bad file leaves the session as it was. Each character gets its ID
+    from its key, and a new player token if it has none, shares one with
+    an earlier character in the file or ``token_taken`` says another
+    table uses it.
+
+    Returns:
+        The session state to load
+
+    Raises:
+        ValueError: If the file isn't JSON or isn't a saved session
+    """
+    data = json.loads(json_str)
+    state = data.get("session") if isinstance(data, dict) else None
+    if not isinstance(state, dict):
+        raise ValueError("Not a saved session")
+    for field, field_type in _SESSION_FIELD_TYPES.items():
+        if field in state and not isinstance(state[field], field_type):
+            raise ValueError(f"Invalid {field}")
+
+    characters = {}
+    tokens = set()
+    for char_id, character in state.get("characters", {}).items():
+        if not isinstance(character, dict):
+            raise ValueError(f"Invalid character {char_id}")
+        token = character.get("player_token")
+        while not isinstance(token, str) or not token or token in tokens or (
+            token_taken is not None and token_taken(token)
+        ):
+            token = secrets.token_urlsafe(6)
+        tokens.add(token)
+        characters[char_id] = {**character, "id": char_id, "player_token": token}
+    return {**state, "characters": characters}
+
+
+def next_char_id(characters: Dict[str, Any]) -> int:
+    """The number to give the next character, after the highest ``char_NNN``."""
+    max_id = 0
+    for char_id in characters:
+        try:
+            max_id = max(max_id, int(char_id.split("_")[1]))
+        except (IndexError, ValueError):
+            pass
+    return max_id + 1
 
 
 class GameSession:
-    """Manages the current game session state."""
+    """Manages one game session's state in memory.
+
+    Safe to share between request threads. The state is a SessionSnapshot
+    that is replaced, never modified, so readers take the current snapshot
+    in O(1) without locks. Each character is guarded by one of LOCK_STRIPES
+    striped locks, so updates to different mice run in parallel; session-wide
+    fields have their own lock. Whole-state operations (snapshots to disk,
+    reset, load) take every lock.
+
+    Each new snapshot publishes an event with its version and what changed
+    to ``events``, for the live update stream.
+
+    Every character also carries its own ``version``, bumped on each change
+    to it, so clients can make edits conditional on the version they saw.
+    Versions start again when a file is loaded, so the session's ``epoch``,
+    new on every reset and load, tells the two apart.
+    """
+
+    def __init__(self, session_id: str = DEFAULT_SESSION_ID):
+        self.id = session_id
+        # Per-session dice backend, so request threads don't share the
+        # global random state
+        self.rng = BufferedRNG()
+        # The store hosting this table, so loads avoid other tables' player tokens
+        self.store: Optional["MemorySessionStore"] = None
+        self._log: Optional[WriteAheadLog] = None
+        self._root = SessionSnapshot(0, _fresh_state())
+        self.events: Optional[EventBroker] = None
+        self._history = CharacterHistory()
+        self._session_lock = threading.Lock()
+        self._stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        # Leaf locks: never held while taking another lock
+        self._id_lock = threading.Lock()
+        self._root_lock = threading.Lock()
+        self._reset()
+        self.events = EventBroker(self._root.version)
+
+    # Locking and publishing
+
+    def _lock_for(self, char_id: str) -> threading.Lock:
+        """The striped lock guarding a character."""
+        return self._stripes[hash(char_id) % LOCK_STRIPES]
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Hold every lock, stopping all writers (always in the same order)."""
+        with ExitStack() as stack:
+            stack.enter_context(self._session_lock)
+            for lock in self._stripes:
+                stack.enter_context(lock)
+            yield
+
+    def _notify(self, event_type: str, payload: Dict[str, Any], **kwargs: Any) -> None:
+        # Called under _root_lock, so events go out in version order
+        if self.events is not None:
+            self.events.publish(self._root.version, event_type, payload, **kwargs)
+
+    def _replace_state(self, state: Dict[str, Any]) -> None:
+        """Publish a whole new state (callers hold every lock)."""
+        state.setdefault("characters", {})
+        with self._root_lock:
+            self._root = SessionSnapshot(self._root.version + 1, state)
+            self._history.clear()
+            self._notify("reset", {})
+
+    def _publish(self, **fields: Any) -> None:
+        """Publish a new snapshot with some top-level fields replaced."""
+        with self._root_lock:
+            root = self._root
+            self._root = SessionSnapshot(root.version + 1, {**root.state, **fields})
+            self._notify("session", {"fields": fields}, gm_only="gm_notes" in fields)
+
+    def _publish_character(
+        self, char_id: str, character: Optional[Dict[str, Any]], **delta: Any
+    ) -> None:
+        """Publish a new snapshot with one character replaced (or removed if None).
+
+        Only the top-level character map is copied; every other character
+        is shared with the previous snapshot. ``delta`` (``update=`` or
+        ``patch=``) is what the event sends instead of the whole character.
+
+        That copy is O(number of characters) and made under ``_root_lock``,
+        so writes to different characters serialize on it. At table sizes
+        it's well under a microsecond, a few percent of a write; it only
+        dominates in the thousands (benchmarks/bench_snapshot_writes.py).
+        The map stays a plain dict because readers hand it straight to
+        json and the templates.
+        """
+        with self._root_lock:
+            root = self._root
+            characters = dict(root.state["characters"])
+            if character is None:
+                characters.pop(char_id, None)
+                self._history.forget(char_id)
+                change = {"deleted": True}
+            else:
+                characters[char_id] = character
+                self._history.record(char_id, character)
+                change = {
+                    "character_version": character.get("version", 0),
+                    **(delta or {"character": character}),
+                }
+            self._root = SessionSnapshot(
+                root.version + 1, {**root.state, "characters": characters}
+            )
+            self._notify("character", {"id": char_id, **change}, char_id=char_id)
+
+    def snapshot(self) -> SessionSnapshot:
+        """The current immutable snapshot; O(1) and never blocks writers."""
+        return self._root
 
-    def __init__(self):
-        self.reset()
+    @property
+    def version(self) -> int:
+        """Counter bumped by every change to the session."""
+        return self._root.version
+
+    # Durable storage
+
+    def open_store(self, log: WriteAheadLog) -> bool:
+        """Attach a write-ahead log, restoring any session it holds.
+
+        Returns:
+            True if an existing session was restored
+        """
+        snapshot, records = log.load()
+        with self._exclusive():
+            self._log = None  # don't re-log while replaying
+            events, self.events = self.events, None
+            if snapshot:
+                self._restore_snapshot(snapshot)
+            restored = snapshot is not None
+            for op, args in records:
+                getattr(self, f"_apply_{op}")(**args)()
+                restored = True
+            self._log = log
+            if not snapshot:
+                self._checkpoint()
+            # Nobody has seen the replayed versions; start the stream after them
+            self.events = EventBroker(self._root.version)
+            events.close()
+        return restored
+
+    def close_store(self) -> None:
+        """Write a final snapshot, detach the log and end live update streams."""
+        with self._exclusive():
+            if self._log:
+                self._checkpoint()
+                self._log.close()
+                self._log = None
+        self.events.close()
+
+    def checkpoint(self) -> None:
+        """Snapshot the full state to the store and truncate its log."""
+        with self._exclusive():
+            self._checkpoint()
+
+    def _checkpoint(self) -> None:
+        # Caller holds every lock, so the snapshot matches the log exactly
+        if self._log:
+            root = self._root
+            self._log.compact({
+                "session": root.state,
+                "version": root.version,
+                "gm_token": self._gm_token,
+                "epoch": self._epoch,
+                "next_char_id": self._next_char_id,
+            })
+
+    def _maybe_compact(self) -> None:
+        if self._log and self._log.should_compact:
+            with self._exclusive():
+                # Another thread may have compacted while we waited
+                if self._log and self._log.should_compact:
+                    self._checkpoint()
+
+    def _restore_snapshot(self, snapshot: Dict[str, Any]) -> None:
+        state = snapshot["session"]
+        state.setdefault("characters", {})
+        self._root = SessionSnapshot(snapshot.get("version", 0), state)
+        self._history.clear()
+        self._gm_token = snapshot["gm_token"]
+        # Snapshots from before epochs existed: cached copies just revalidate once
+        self._epoch = snapshot.get("epoch") or new_epoch()
+        with self._id_lock:
+            self._next_char_id = snapshot["next_char_id"]
+        self._reindex_tokens()
+
+    def _reindex_tokens(self) -> None:
+        """Rebuild the player token -> character ID index from the state."""
+        self._tokens = {
+            char["player_token"]: char_id
+            for char_id, char in self._root.characters.items()
+            if char.get("player_token")
+        }
+
+    def _commit(self, op: str, **args: Any) -> None:
+        """Work out a mutation, log it (if storing) and then publish it.
+
+        The caller holds the lock for whatever the mutation touches, so log
+        order matches apply order for that character or field. Each mutation
+        is split into a deterministic ``_apply_<op>`` method so replaying the
+        log reproduces the same state. It computes the new state and returns
+        a function that publishes it, so a mutation that fails (a malformed
+        update, say) raises before anything is logged, and can't leave a
+        record that breaks every later replay.
+        """
+        with timed(f"session.{op}"):
+            publish = getattr(self, f"_apply_{op}")(**args)
+            if self._log:
+                with timed("wal_append"):
+                    self._log.append(op, args)
+            publish()
 
     def reset(self) -> None:
         """Reset to a fresh session."""
-        self._state: Dict[str, Any] = {
-            "session_name": "New Session",
-            "created": datetime.now().isoformat(),
-            "characters": {},
-            "gm_notes": "",
-            "session_data": {
-                "turn_count": 1
-            },
-            "combat": {
-                "active": False,
-                "turn_order": [],
-                "current_turn": 0
-            }
-        }
+        with self._exclusive():
+            self._reset()
+            self._checkpoint()
+
+    def _reset(self) -> None:
+        self._replace_state(_fresh_state())
         self._gm_token: str = secrets.token_urlsafe(8)
-        self._next_char_id: int = 1
+        self._epoch: str = new_epoch()
+        with self._id_lock:
+            self._next_char_id: int = 1
+        self._tokens: Dict[str, str] = {}
 
     @property
     def gm_token(self) -> str:
@@ -43,129 +468,393 @@ class GameSession:
         """Verify if the provided token matches the GM token."""
         return secrets.compare_digest(token, self._gm_token)
 
+    @property
+    def epoch(self) -> str:
+        """ID of the session's current contents, new on every reset and load."""
+        return self._epoch
+
     def get_state(self) -> Dict[str, Any]:
-        """Get the full session state."""
-        return self._state.copy()
+        """Get the full session state (read-only)."""
+        return self._root.state
 
     def set_session_name(self, name: str) -> None:
         """Set the session name."""
-        self._state["session_name"] = name
+        with self._session_lock:
+            self._commit("set_session_name", name=name)
+        self._maybe_compact()
+
+    def _apply_set_session_name(self, name: str) -> Callable[[], None]:
+        return partial(self._publish, session_name=name)
 
     def set_gm_notes(self, notes: str) -> None:
         """Set GM notes."""
-        self._state["gm_notes"] = notes
+        with self._session_lock:
+            self._commit("set_gm_notes", notes=notes)
+        self._maybe_compact()
+
+    def _apply_set_gm_notes(self, notes: str) -> Callable[[], None]:
+        return partial(self._publish, gm_notes=notes)
 
     def get_session_data(self) -> Dict[str, Any]:
-        """Get session data (turn count, etc)."""
-        if "session_data" not in self._state:
-            self._state["session_data"] = {"turn_count": 1}
-        return self._state["session_data"]
+        """Get session data (turn count, etc; read-only)."""
+        return self._root.state.get("session_data") or {"turn_count": 1}
 
     def update_session_data(self, data: Dict[str, Any]) -> None:
         """Update session data."""
-        if "session_data" not in self._state:
-            self._state["session_data"] = {"turn_count": 1}
-        self._state["session_data"].update(data)
+        with self._session_lock:
+            self._commit("update_session_data", data=data)
+        self._maybe_compact()
+
+    def _apply_update_session_data(self, data: Dict[str, Any]) -> Callable[[], None]:
+        return partial(self._publish, session_data={**self.get_session_data(), **clone(data)})
 
     # Character management
 
     def add_character(self, character_data: Dict[str, Any]) -> str:
         """Add a character and return its ID."""
-        char_id = f"char_{self._next_char_id:03d}"
-        self._next_char_id += 1
-
         # Generate a player token for this character
         character_data["player_token"] = secrets.token_urlsafe(6)
-        character_data["id"] = char_id
 
-        self._state["characters"][char_id] = character_data
+        while True:
+            with self._id_lock:
+                number = self._next_char_id
+                self._next_char_id += 1
+            char_id = f"char_{number:03d}"
+            character_data["id"] = char_id
+
+            with self._lock_for(char_id):
+                # A load between taking the ID and its lock may have brought
+                # in a character with it; loads hold every lock, so this holds
+                if char_id in self._root.characters:
+                    continue
+                self._commit("add_character", char_id=char_id, character=character_data)
+            break
+        self._maybe_compact()
         return char_id
 
+    def _apply_add_character(self, char_id: str, character: Dict[str, Any]) -> Callable[[], None]:
+        added = {**clone(character), "version": 1}
+        token = character["player_token"]
+        number = int(char_id.split("_")[1])
+
+        def publish():
+            self._publish_character(char_id, added)
+            self._tokens[token] = char_id
+            with self._id_lock:
+                self._next_char_id = max(self._next_char_id, number + 1)
+        return publish
+
     def get_character(self, char_id: str) -> Optional[Dict[str, Any]]:
-        """Get a character by ID."""
-        return self._state["characters"].get(char_id)
+        """Get a character by ID (read-only)."""
+        return self._root.characters.get(char_id)
 
     def get_character_by_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """Get a character by player token."""
-        for char in self._state["characters"].values():
-            if char.get("player_token") == token:
-                return char
-        return None
+        """Get a character by player token (read-only)."""
+        char_id = self._tokens.get(token)
+        return self.get_character(char_id) if char_id else None
 
     def get_all_characters(self) -> Dict[str, Dict[str, Any]]:
-        """Get all characters."""
-        return self._state["characters"].copy()
-
-    def update_character(self, char_id: str, updates: Dict[str, Any]) -> bool:
-        """Update a character's data. Returns True if successful."""
-        if char_id not in self._state["characters"]:
-            return False
-
-        character = self._state["characters"][char_id]
-
-        def deep_merge(target: dict, source: dict) -> None:
-            """Recursively merge source into target."""
-            for key, value in source.items():
-                if key in ("id", "player_token"):
-                    # Don't allow changing these
-                    continue
-                if isinstance(value, dict) and key in target and isinstance(target[key], dict):
-                    # Recursively merge nested dicts
-                    deep_merge(target[key], value)
-                elif isinstance(value, list) and key in target and isinstance(target[key], list):
-                    # For lists, replace entirely (inventory arrays)
-                    target[key] = value
-                else:
-                    target[key] = value
-
-        deep_merge(character, updates)
-        return True
+        """Get all characters (read-only)."""
+        return self._root.characters
+
+    def _check_version(
+        self, char_id: str, character: Dict[str, Any], expected: Optional[int]
+    ) -> None:
+        """Raise VersionConflict unless the character is at version ``expected``.
+
+        Caller holds the character's lock.
+        """
+        if expected is not None and character.get("version", 0) != expected:
+            with self._root_lock:
+                raise self._history.conflict(char_id, expected, character)
+
+    def update_character(
+        self, char_id: str, updates: Dict[str, Any], expected_version: Optional[int] = None
+    ) -> Optional[int]:
+        """Update a character's data.
+
+        Args:
+            expected_version: If given, only update the character if it is
+                still at this version
+
+        Returns:
+            The character's new version, or None if there is no such character
+
+        Raises:
+            VersionConflict: If the character isn't at ``expected_version``
+        """
+        with self._lock_for(char_id):
+            character = self._root.characters.get(char_id)
+            if character is None:
+                return None
+            self._check_version(char_id, character, expected_version)
+            self._commit("update_character", char_id=char_id, updates=updates)
+            version = self._root.characters[char_id]["version"]
+        self._maybe_compact()
+        return version
+
+    def _apply_update_character(self, char_id: str, updates: Dict[str, Any]) -> Callable[[], None]:
+        with timed("merge_updates"):
+            merged = merged_updates(self._root.characters[char_id], updates)
+        return partial(self._publish_character, char_id, bump_version(merged), update=updates)
+
+    def patch_character(
+        self,
+        char_id: str,
+        operations: List[Dict[str, Any]],
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Apply a JSON Patch (RFC 6902) to a character.
+
+        Args:
+            expected_version: If given, only patch the character if it is
+                still at this version
+
+        Returns:
+            The character's new version, or None if there is no such character
+
+        Raises:
+            VersionConflict: If the character isn't at ``expected_version``
+            PatchError: If the patch is invalid; nothing is changed or logged
+        """
+        with self._lock_for(char_id):
+            character = self._root.characters.get(char_id)
+            if character is None:
+                return None
+            self._check_version(char_id, character, expected_version)
+            self._commit("patch_character", char_id=char_id, operations=operations)
+            version = self._root.characters[char_id]["version"]
+        self._maybe_compact()
+        return version
+
+    def _apply_patch_character(
+        self, char_id: str, operations: List[Dict[str, Any]]
+    ) -> Callable[[], None]:
+        character = bump_version(apply_patch(self._root.characters[char_id], operations))
+        return partial(self._publish_character, char_id, character, patch=operations)
 
     def delete_character(self, char_id: str) -> bool:
         """Delete a character. Returns True if successful."""
-        if char_id in self._state["characters"]:
-            del self._state["characters"][char_id]
-            return True
-        return False
+        with self._lock_for(char_id):
+            if char_id not in self._root.characters:
+                return False
+            self._commit("delete_character", char_id=char_id)
+        self._maybe_compact()
+        return True
+
+    def _apply_delete_character(self, char_id: str) -> Callable[[], None]:
+        token = self._root.characters[char_id].get("player_token")
+
+        def publish():
+            self._publish_character(char_id, None)
+            self._tokens.pop(token, None)
+        return publish
 
     # Save/Load
 
-    def to_json(self) -> str:
-        """Export session state to JSON string."""
+    def _token_taken(self, token: str) -> bool:
+        """Whether another table of this session's store uses a player token."""
+        found = self.store.find_by_player_token(token) if self.store is not None else None
+        return found is not None and found[0] is not self
+
+    def to_json(self, pretty: bool = False) -> str:
+        """Export session state to JSON string.
+
+        Args:
+            pretty: Indent the JSON for reading; compact otherwise
+        """
         export_data = {
             "version": "1.0",
             "exported": datetime.now().isoformat(),
-            "session": self._state
+            "session": self.get_state()
         }
-        return json.dumps(export_data, indent=2)
+        if pretty:
+            return json.dumps(export_data, indent=2)
+        return json.dumps(export_data, separators=(",", ":"))
 
     def from_json(self, json_str: str) -> bool:
-        """Import session state from JSON string. Returns True if successful."""
-        try:
-            data = json.loads(json_str)
-
-            if "session" not in data:
-                return False
+        """Import session state from JSON string. Returns True if successful.
 
-            self._state = data["session"]
+        An invalid file changes nothing.
+        """
+        try:
+            state = parse_session_file(json_str, self._token_taken)
+        except ValueError:
+            return False
 
-            # Find the highest character ID to continue numbering
-            max_id = 0
-            for char_id in self._state.get("characters", {}).keys():
-                try:
-                    num = int(char_id.split("_")[1])
-                    max_id = max(max_id, num)
-                except (IndexError, ValueError):
-                    pass
-            self._next_char_id = max_id + 1
+        with self._exclusive():
+            self._replace_state(state)
+            # Continue numbering after the highest character ID
+            with self._id_lock:
+                self._next_char_id = next_char_id(state["characters"])
+            self._reindex_tokens()
 
             # Generate new GM token for security
             self._gm_token = secrets.token_urlsafe(8)
+            self._epoch = new_epoch()
+
+            # A load replaces everything, so snapshot instead of logging it
+            self._checkpoint()
+        return True
+
+
+class SessionStore(ABC):
+    """Interface for the collection of sessions a server hosts.
+
+    Sessions are found by ID, by GM token (GM pages and API calls) or by a
+    player token (player pages), so URLs don't need to name the session.
+    Each session object offers the GameSession methods.
+    """
+
+    @abstractmethod
+    def create(self) -> Any:
+        """Start a new, empty session and return it."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Any]:
+        """Get a session by ID."""
+
+    @abstractmethod
+    def default(self) -> Any:
+        """The session shown on the home page, created if there is none."""
+
+    @abstractmethod
+    def find_by_gm_token(self, token: str) -> Optional[Any]:
+        """Get the session a GM token belongs to."""
+
+    @abstractmethod
+    def find_by_player_token(self, token: str) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        """Get (session, character) for a player token."""
+
+    @abstractmethod
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        """Summaries of every session: ID, name and character names/tokens."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Delete a session and its characters. Returns True if it existed."""
+
+    def close(self) -> None:
+        """Flush and release any storage."""
+
+
+class MemorySessionStore(SessionStore):
+    """Keeps GameSession objects in memory.
+
+    With a data directory, each session gets its own write-ahead log in
+    ``data_dir/<session id>/`` and survives restarts.
+
+    Args:
+        data_dir: Optional directory for session logs
+    """
+
+    def __init__(self, data_dir=None):
+        self.data_dir = Path(data_dir) if data_dir is not None else None
+        self._sessions: Dict[str, GameSession] = {}
+        self._lock = threading.Lock()
+
+    def add(self, session: GameSession) -> bool:
+        """Host an existing session, restoring its log if there is one.
+
+        Returns:
+            True if the session was restored from disk
+        """
+        restored = False
+        if self.data_dir is not None:
+            restored = session.open_store(WriteAheadLog(self.data_dir / session.id))
+        session.store = self
+        with self._lock:
+            self._sessions[session.id] = session
+        return restored
+
+    def load(self) -> int:
+        """Restore every logged session not already hosted.
+
+        Returns:
+            Number of sessions restored
+        """
+        if self.data_dir is None or not self.data_dir.is_dir():
+            return 0
+        count = 0
+        for path in sorted(self.data_dir.iterdir()):
+            if path.is_dir() and path.name not in self._sessions:
+                count += self.add(GameSession(path.name))
+        return count
+
+    def create(self) -> GameSession:
+        session = GameSession(new_session_id())
+        self.add(session)
+        return session
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        return self._sessions.get(session_id)
+
+    def default(self) -> GameSession:
+        with self._lock:
+            session = next(iter(self._sessions.values()), None)
+        if session is None:
+            session = GameSession()
+            self.add(session)
+        return session
+
+    def find_by_gm_token(self, token: str) -> Optional[GameSession]:
+        if not token:
+            return None
+        for session in list(self._sessions.values()):
+            if session.verify_gm(token):
+                return session
+        return None
+
+    def find_by_player_token(self, token: str) -> Optional[Tuple[GameSession, Dict[str, Any]]]:
+        if not token:
+            return None
+        for session in list(self._sessions.values()):
+            character = session.get_character_by_token(token)
+            if character:
+                return session, character
+        return None
 
-            return True
-        except (json.JSONDecodeError, KeyError):
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": session.id,
+                "name": session.get_state().get("session_name", "New Session"),
+                "characters": [
+                    {"name": char["name"], "token": char["player_token"]}
+                    for char in session.get_all_characters().values()
+                ],
+            }
+            for session in list(self._sessions.values())
+        ]
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+        if session is None:
             return False
+        session.close_store()
+        if self.data_dir is not None:
+            shutil.rmtree(self.data_dir / session_id, ignore_errors=True)
+        return True
 
+    def close(self) -> None:
+        for session in list(self._sessions.values()):
+            session.close_store()
 
-# Global session instance
+
+# Global session instance, the default table of the default store
 game_session = GameSession()
+
+_store: SessionStore = MemorySessionStore()
+_store.add(game_session)
+
+
+def get_store() -> SessionStore:
+    """The store the server routes use."""
+    return _store
+
+
+def set_store(store: SessionStore) -> None:
+    """Replace the store the server routes use (call before serving)."""
+    global _store
+    _store = store
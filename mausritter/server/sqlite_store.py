@@ -0,0 +1,619 @@
+"""
+SQLite session store for hosting many campaigns from one server.
+
+Each session is a row in ``sessions`` and each character a row in
+``characters``, indexed by session and by player token, so serving one
+table never reads another table's state. The database runs in WAL mode:
+readers don't block the writer, and each request thread has its own
+connection. Several worker processes can share one database: each change
+stages its live update event in the same transaction, and the store's
+pub/sub (see pubsub.py) publishes it to every worker's brokers after the
+commit.
+"""
+
+import json
+import secrets
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..rng import BufferedRNG
+from .events import EventBroker
+from .metrics import timed
+from .patch import apply_patch
+from .pubsub import CLOSED, LocalPubSub, Message, PubSub
+from .session import (
+    CharacterHistory,
+    SessionSnapshot,
+    SessionStore,
+    bump_version,
+    merge_updates,
+    new_epoch,
+    new_session_id,
+    next_char_id,
+    parse_session_file,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    gm_token TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    created TEXT NOT NULL,
+    gm_notes TEXT NOT NULL DEFAULT '',
+    session_data TEXT NOT NULL,
+    combat TEXT NOT NULL,
+    next_char_id INTEGER NOT NULL DEFAULT 1,
+    version INTEGER NOT NULL DEFAULT 0,
+    epoch TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS characters (
+    session_id TEXT NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    char_id TEXT NOT NULL,
+    player_token TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_id, char_id)
+);
+"""
+
+_DEFAULT_SESSION_DATA = {"turn_count": 1}
+_DEFAULT_COMBAT = {"active": False, "turn_order": [], "current_turn": 0}
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
+class SQLiteSessionStore(SessionStore):
+    """Sessions kept in an SQLite database.
+
+    Args:
+        path: Database file (``":memory:"`` is not supported, as every
+            thread opens its own connection)
+        pubsub: How change events reach every worker's brokers; a
+            SQLitePubSub on the same file when several processes share it
+            (default: this process only)
+    """
+
+    def __init__(self, path, pubsub: Optional[PubSub] = None):
+        self.path = str(path)
+        self.rng = BufferedRNG()
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+        self._migrate()
+        # Guards the brokers and histories; held through each write so
+        # history records match commit order
+        self._publish_lock = threading.Lock()
+        self._brokers: Dict[str, EventBroker] = {}
+        # Recent character versions written by this process, per session
+        self._histories: Dict[str, CharacterHistory] = {}
+        self.pubsub = pubsub or LocalPubSub()
+        self.pubsub.subscribe(self._deliver)
+
+    def _migrate(self) -> None:
+        """Bring a database made by an older version up to SCHEMA."""
+        db = self._connection()
+        columns = {row[1] for row in db.execute("PRAGMA table_info(sessions)")}
+        if "epoch" not in columns:
+            db.execute("ALTER TABLE sessions ADD COLUMN epoch TEXT NOT NULL DEFAULT ''")
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # Autocommit mode; writes use explicit transactions below
+            db = sqlite3.connect(self.path, isolation_level=None, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            # NORMAL is durable across crashes of this process in WAL mode
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA foreign_keys=ON")
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run a write transaction, taking the write lock up front.
+
+        BEGIN IMMEDIATE stops two read-modify-write updates from
+        interleaving and losing one of them.
+        """
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """Run several reads against one consistent view of the database."""
+        db = self._connection()
+        db.execute("BEGIN")
+        try:
+            yield db
+        finally:
+            db.execute("COMMIT")
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        return self._connection().execute(sql, params).fetchall()
+
+    def events(self, session_id: str) -> EventBroker:
+        """The live update broker for a session, created on first use."""
+        # Catch up first, so a client that saw a change made by another
+        # worker doesn't find this one behind it
+        self.pubsub.deliver()
+        with self._publish_lock:
+            broker = self._brokers.get(session_id)
+            if broker is None:
+                rows = self._query("SELECT version FROM sessions WHERE id = ?", (session_id,))
+                broker = EventBroker(rows[0][0] if rows else 0)
+                self._brokers[session_id] = broker
+            return broker
+
+    def history(self, session_id: str) -> CharacterHistory:
+        """Recent character versions for a session (caller holds _publish_lock).
+
+        Only this process's writes are remembered; a conflict with a version
+        it never saw gets the whole character instead of a delta.
+        """
+        history = self._histories.get(session_id)
+        if history is None:
+            history = self._histories[session_id] = CharacterHistory()
+        return history
+
+    def _stage(self, db: sqlite3.Connection, session_id: str, version: int, event: Tuple) -> None:
+        """Stage the event for a change in its write transaction."""
+        event_type, payload, kwargs = event
+        self.pubsub.stage(db, Message(session_id, version, event_type, payload, **kwargs))
+
+    def _deliver(self, message: Message) -> None:
+        """Publish a committed change, made by any worker, to this one's broker."""
+        with self._publish_lock:
+            if message.type == CLOSED:
+                broker = self._brokers.pop(message.session_id, None)
+                self._histories.pop(message.session_id, None)
+                if broker is not None:
+                    broker.close()
+                return
+            # Nobody is listening until a broker exists, and a new broker
+            # starts at the version it was created at
+            broker = self._brokers.get(message.session_id)
+            if broker is not None and message.version > broker.version:
+                broker.publish(
+                    message.version, message.type, message.payload,
+                    char_id=message.char_id, gm_only=message.gm_only,
+                )
+
+    @contextmanager
+    def _publishing(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction that may stage an event, delivered after commit."""
+        try:
+            with self._publish_lock:
+                with self._transaction() as db:
+                    yield db
+        except BaseException:
+            self.pubsub.discard()
+            raise
+        self.pubsub.flush()
+
+    def create(self) -> "SQLiteSession":
+        session_id = new_session_id()
+        with self._transaction() as db:
+            SQLiteSession.insert_fresh(db, session_id)
+        return SQLiteSession(self, session_id)
+
+    def get(self, session_id: str) -> Optional["SQLiteSession"]:
+        if self._query("SELECT 1 FROM sessions WHERE id = ?", (session_id,)):
+            return SQLiteSession(self, session_id)
+        return None
+
+    def default(self) -> "SQLiteSession":
+        rows = self._query("SELECT id FROM sessions ORDER BY rowid LIMIT 1")
+        if rows:
+            return SQLiteSession(self, rows[0][0])
+        return self.create()
+
+    def find_by_gm_token(self, token: str) -> Optional["SQLiteSession"]:
+        rows = self._query("SELECT id FROM sessions WHERE gm_token = ?", (token,))
+        return SQLiteSession(self, rows[0][0]) if token and rows else None
+
+    def find_by_player_token(self, token: str) -> Optional[Tuple["SQLiteSession", Dict[str, Any]]]:
+        rows = self._query(
+            "SELECT session_id, data FROM characters WHERE player_token = ?", (token,)
+        )
+        if not token or not rows:
+            return None
+        return SQLiteSession(self, rows[0][0]), json.loads(rows[0][1])
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        sessions = {
+            session_id: {"id": session_id, "name": name, "characters": []}
+            for session_id, name in self._query("SELECT id, name FROM sessions ORDER BY rowid")
+        }
+        # Names and tokens have their own columns; character JSON isn't read
+        for session_id, name, token in self._query(
+            "SELECT session_id, name, player_token FROM characters ORDER BY session_id, char_id"
+        ):
+            sessions[session_id]["characters"].append({"name": name, "token": token})
+        return list(sessions.values())
+
+    def delete(self, session_id: str) -> bool:
+        with self._publishing() as db:
+            deleted = db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+            if deleted:
+                self._stage(db, session_id, 0, (CLOSED, {}, {}))
+        return deleted
+
+    def close(self) -> None:
+        """End live update streams and close this thread's connection."""
+        self.pubsub.close()
+        with self._publish_lock:
+            brokers, self._brokers = list(self._brokers.values()), {}
+            self._histories.clear()
+        for broker in brokers:
+            broker.close()
+        db = getattr(self._local, "db", None)
+        if db is not None:
+            db.close()
+            self._local.db = None
+
+
+class SQLiteSession:
+    """One session in an SQLiteSessionStore, with the GameSession interface.
+
+    Holds no state of its own beyond the session ID; every call reads or
+    writes only this session's rows.
+    """
+
+    def __init__(self, store: SQLiteSessionStore, session_id: str):
+        self.store = store
+        self.id = session_id
+        self.rng = store.rng
+
+    @staticmethod
+    def insert_fresh(db: sqlite3.Connection, session_id: str, version: int = 0) -> None:
+        db.execute(
+            "INSERT INTO sessions "
+            "(id, gm_token, name, created, session_data, combat, version, epoch) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (session_id, secrets.token_urlsafe(8), "New Session", datetime.now().isoformat(),
+             _dumps(_DEFAULT_SESSION_DATA), _dumps(_DEFAULT_COMBAT), version, new_epoch()),
+        )
+
+    @property
+    def events(self) -> EventBroker:
+        """Live update broker for this session."""
+        return self.store.events(self.id)
+
+    def _emit(self, event_type: str, payload: Dict[str, Any], **kwargs: Any) -> None:
+        """Record the event for the write in progress on this thread."""
+        self.store._local.event = (event_type, payload, kwargs)
+
+    @contextmanager
+    def _write(self, op: str) -> Iterator[sqlite3.Connection]:
+        """Write transaction on this session, timed as ``session.<op>``.
+
+        If the body calls _emit, the version is bumped and the event is
+        published once the transaction commits.
+        """
+        self.store._local.event = None
+        with timed(f"session.{op}"), self.store._publishing() as db:
+            yield db
+            event = self.store._local.event
+            if event is not None:
+                row = db.execute(
+                    "UPDATE sessions SET version = version + 1 WHERE id = ? RETURNING version",
+                    (self.id,),
+                ).fetchone()
+                if row is not None:
+                    self.store._stage(db, self.id, row[0], event)
+
+    def _row(self, columns: str) -> Optional[sqlite3.Row]:
+        rows = self.store._query(f"SELECT {columns} FROM sessions WHERE id = ?", (self.id,))
+        return rows[0] if rows else None
+
+    def reset(self) -> None:
+        """Reset to a fresh session."""
+        with self.store._publishing() as db:
+            row = db.execute("SELECT version FROM sessions WHERE id = ?", (self.id,)).fetchone()
+            db.execute("DELETE FROM sessions WHERE id = ?", (self.id,))
+            # Keep the version climbing, so nothing cached for the old session matches
+            version = row[0] + 1 if row else 0
+            self.insert_fresh(db, self.id, version)
+            self.store.history(self.id).clear()
+            self.store._stage(db, self.id, version, ("reset", {}, {}))
+
+    @property
+    def gm_token(self) -> str:
+        """Get the GM authentication token."""
+        row = self._row("gm_token")
+        return row[0] if row else ""
+
+    def verify_gm(self, token: str) -> bool:
+        """Verify if the provided token matches the GM token."""
+        gm_token = self.gm_token
+        return bool(gm_token) and secrets.compare_digest(token, gm_token)
+
+    @property
+    def epoch(self) -> str:
+        """ID of the session's current contents, new on every reset and load."""
+        row = self._row("epoch")
+        return row[0] if row else ""
+
+    def snapshot(self) -> SessionSnapshot:
+        """The session and its characters as of one committed version."""
+        with self.store._read():
+            row = self._row("name, created, gm_notes, session_data, combat, version")
+            if row is None:
+                return SessionSnapshot(0, {})
+            name, created, gm_notes, session_data, combat, version = row
+            state = {
+                "session_name": name,
+                "created": created,
+                "characters": self.get_all_characters(),
+                "gm_notes": gm_notes,
+                "session_data": json.loads(session_data),
+                "combat": json.loads(combat),
+            }
+        return SessionSnapshot(version, state)
+
+    @property
+    def version(self) -> int:
+        """Counter bumped by every change to the session."""
+        row = self._row("version")
+        return row[0] if row else 0
+
+    def get_state(self) -> Dict[str, Any]:
+        """Get the full session state."""
+        return self.snapshot().state
+
+    def set_session_name(self, name: str) -> None:
+        """Set the session name."""
+        with self._write("set_session_name") as db:
+            db.execute("UPDATE sessions SET name = ? WHERE id = ?", (name, self.id))
+            self._emit("session", {"fields": {"session_name": name}})
+
+    def set_gm_notes(self, notes: str) -> None:
+        """Set GM notes."""
+        with self._write("set_gm_notes") as db:
+            db.execute("UPDATE sessions SET gm_notes = ? WHERE id = ?", (notes, self.id))
+            self._emit("session", {"fields": {"gm_notes": notes}}, gm_only=True)
+
+    def get_session_data(self) -> Dict[str, Any]:
+        """Get session data (turn count, etc)."""
+        row = self._row("session_data")
+        return json.loads(row[0]) if row else dict(_DEFAULT_SESSION_DATA)
+
+    def update_session_data(self, data: Dict[str, Any]) -> None:
+        """Update session data."""
+        with self._write("update_session_data") as db:
+            row = db.execute(
+                "SELECT session_data FROM sessions WHERE id = ?", (self.id,)
+            ).fetchone()
+            if row is None:
+                return
+            session_data = json.loads(row[0])
+            session_data.update(data)
+            db.execute(
+                "UPDATE sessions SET session_data = ? WHERE id = ?",
+                (_dumps(session_data), self.id),
+            )
+            self._emit("session", {"fields": {"session_data": session_data}})
+
+    # Character management
+
+    def add_character(self, character_data: Dict[str, Any]) -> str:
+        """Add a character and return its ID."""
+        with self._write("add_character") as db:
+            (next_id,) = db.execute(
+                "SELECT next_char_id FROM sessions WHERE id = ?", (self.id,)
+            ).fetchone()
+            char_id = f"char_{next_id:03d}"
+
+            # Generate a player token for this character
+            character_data["player_token"] = secrets.token_urlsafe(6)
+            character_data["id"] = char_id
+
+            character = {**character_data, "version": 1}
+            self._insert_character(db, character)
+            db.execute(
+                "UPDATE sessions SET next_char_id = ? WHERE id = ?", (next_id + 1, self.id)
+            )
+            self._saved(char_id, character, character=character)
+        return char_id
+
+    def _insert_character(self, db: sqlite3.Connection, character: Dict[str, Any]) -> None:
+        db.execute(
+            "INSERT INTO characters (session_id, char_id, player_token, name, data) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (self.id, character["id"], character["player_token"],
+             str(character.get("name", "")), _dumps(character)),
+        )
+
+    def get_character(self, char_id: str) -> Optional[Dict[str, Any]]:
+        """Get a character by ID."""
+        rows = self.store._query(
+            "SELECT data FROM characters WHERE session_id = ? AND char_id = ?", (self.id, char_id)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_character_by_token(self, token: str) -> Optional[Dict[str, Any]]:
+        """Get a character by player token."""
+        rows = self.store._query(
+            "SELECT data FROM characters WHERE session_id = ? AND player_token = ?",
+            (self.id, token),
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_all_characters(self) -> Dict[str, Dict[str, Any]]:
+        """Get all characters."""
+        rows = self.store._query(
+            "SELECT char_id, data FROM characters WHERE session_id = ? ORDER BY char_id",
+            (self.id,),
+        )
+        return {char_id: json.loads(data) for char_id, data in rows}
+
+    def _current(
+        self, db: sqlite3.Connection, char_id: str, expected: Optional[int]
+    ) -> Optional[Dict[str, Any]]:
+        """Read a character for an update, checking it is at version ``expected``.
+
+        Raises:
+            VersionConflict: If it isn't; the transaction rolls back
+        """
+        row = db.execute(
+            "SELECT data FROM characters WHERE session_id = ? AND char_id = ?",
+            (self.id, char_id),
+        ).fetchone()
+        if row is None:
+            return None
+        character = json.loads(row[0])
+        if expected is not None and character.get("version", 0) != expected:
+            raise self.store.history(self.id).conflict(char_id, expected, character)
+        return character
+
+    def _save(self, db: sqlite3.Connection, char_id: str, character: Dict[str, Any]) -> None:
+        db.execute(
+            "UPDATE characters SET name = ?, data = ? WHERE session_id = ? AND char_id = ?",
+            (str(character.get("name", "")), _dumps(character), self.id, char_id),
+        )
+
+    def _saved(self, char_id: str, saved: Dict[str, Any], **delta: Any) -> None:
+        """Remember a written character and emit its event.
+
+        ``delta`` (``update=``, ``patch=`` or ``character=``) is what the
+        event carries, as in GameSession.
+        """
+        self.store.history(self.id).record(char_id, saved)
+        self._emit(
+            "character",
+            {"id": char_id, "character_version": saved["version"], **delta},
+            char_id=char_id,
+        )
+
+    def update_character(
+        self, char_id: str, updates: Dict[str, Any], expected_version: Optional[int] = None
+    ) -> Optional[int]:
+        """Update a character's data.
+
+        Args:
+            expected_version: If given, only update the character if it is
+                still at this version
+
+        Returns:
+            The character's new version, or None if there is no such character
+
+        Raises:
+            VersionConflict: If the character isn't at ``expected_version``
+        """
+        with self._write("update_character") as db:
+            character = self._current(db, char_id, expected_version)
+            if character is None:
+                return None
+            with timed("merge_updates"):
+                merge_updates(character, updates)
+            character = bump_version(character)
+            self._save(db, char_id, character)
+            self._saved(char_id, character, update=updates)
+        return character["version"]
+
+    def patch_character(
+        self,
+        char_id: str,
+        operations: List[Dict[str, Any]],
+        expected_version: Optional[int] = None,
+    ) -> Optional[int]:
+        """Apply a JSON Patch (RFC 6902) to a character.
+
+        Args:
+            expected_version: If given, only patch the character if it is
+                still at this version
+
+        Returns:
+            The character's new version, or None if there is no such character
+
+        Raises:
+            VersionConflict: If the character isn't at ``expected_version``
+            PatchError: If the patch is invalid; nothing is changed
+        """
+        with self._write("patch_character") as db:
+            character = self._current(db, char_id, expected_version)
+            if character is None:
+                return None
+            character = bump_version(apply_patch(character, operations))
+            self._save(db, char_id, character)
+            self._saved(char_id, character, patch=operations)
+        return character["version"]
+
+    def delete_character(self, char_id: str) -> bool:
+        """Delete a character. Returns True if successful."""
+        with self._write("delete_character") as db:
+            cursor = db.execute(
+                "DELETE FROM characters WHERE session_id = ? AND char_id = ?", (self.id, char_id)
+            )
+            if cursor.rowcount:
+                self.store.history(self.id).forget(char_id)
+                self._emit("character", {"id": char_id, "deleted": True}, char_id=char_id)
+        return cursor.rowcount > 0
+
+    # Save/Load
+
+    def to_json(self, pretty: bool = False) -> str:
+        """Export session state to JSON string.
+
+        Args:
+            pretty: Indent the JSON for reading; compact otherwise
+        """
+        export_data = {
+            "version": "1.0",
+            "exported": datetime.now().isoformat(),
+            "session": self.get_state()
+        }
+        if pretty:
+            return json.dumps(export_data, indent=2)
+        return json.dumps(export_data, separators=(",", ":"))
+
+    def from_json(self, json_str: str) -> bool:
+        """Import session state from JSON string. Returns True if successful.
+
+        An invalid file changes nothing.
+        """
+        try:
+            state = parse_session_file(json_str)
+        except ValueError:
+            return False
+        characters = state["characters"]
+        try:
+            with self._write("from_json") as db:
+                db.execute("DELETE FROM characters WHERE session_id = ?", (self.id,))
+                for character in characters.values():
+                    # Player tokens are unique across tables; a file loaded
+                    # into a second table gets new ones there
+                    while db.execute(
+                        "SELECT 1 FROM characters WHERE player_token = ?",
+                        (character["player_token"],),
+                    ).fetchone():
+                        character["player_token"] = secrets.token_urlsafe(6)
+                    self._insert_character(db, character)
+                # Generate new GM token for security
+                db.execute(
+                    "UPDATE sessions SET gm_token = ?, epoch = ?, name = ?, created = ?, "
+                    "gm_notes = ?, session_data = ?, combat = ?, next_char_id = ? WHERE id = ?",
+                    (secrets.token_urlsafe(8), new_epoch(), state.get("session_name", "New Session"),
+                     state.get("created", datetime.now().isoformat()), state.get("gm_notes", ""),
+                     _dumps(state.get("session_data", _DEFAULT_SESSION_DATA)),
+                     _dumps(state.get("combat", _DEFAULT_COMBAT)), next_char_id(characters),
+                     self.id),
+                )
+                self.store.history(self.id).clear()
+                self._emit("reset", {})
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def close_store(self) -> None:
+        """Nothing to flush; every write is already committed."""
@@ -0,0 +1,147 @@
+"""
+Durable storage for the GM server session.
+
+Every session mutation is appended to a write-ahead log as one JSON line and
+fsync'd before it is applied, so a crash or shutdown loses nothing. Each
+record only holds the change itself, keeping writes proportional to the size
+of the change. Every ``compact_every`` records the full state is written to a
+snapshot and the log is truncated; startup replays the snapshot plus the log.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+SNAPSHOT_FILE = "snapshot.json"
+LOG_FILE = "session.log"
+
+# Log records written between snapshots
+COMPACT_EVERY = 1000
+
+
+def _fsync_dir(path: Path) -> None:
+    """Make a rename in ``path`` durable (no-op where unsupported)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class WriteAheadLog:
+    """Append-only mutation log with snapshot compaction.
+
+    Args:
+        directory: Directory holding the snapshot and log files
+        compact_every: Records to append before ``should_compact`` is True
+        fsync: Whether to fsync each record (disable only for tests/benchmarks)
+    """
+
+    def __init__(self, directory, compact_every: int = COMPACT_EVERY, fsync: bool = True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.snapshot_path = self.directory / SNAPSHOT_FILE
+        self.log_path = self.directory / LOG_FILE
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._pending = 0  # records since the last snapshot
+        self._file = None
+
+    def load(self) -> Tuple[Optional[Dict[str, Any]], Iterator[Tuple[str, Dict[str, Any]]]]:
+        """Read the snapshot and the records logged after it.
+
+        Returns:
+            (snapshot dict or None, iterator of (op, args) to replay)
+        """
+        snapshot = None
+        if self.snapshot_path.exists():
+            snapshot = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+        base_seq = snapshot.get("seq", 0) if snapshot else 0
+
+        records = []
+        good_end = 0  # byte offset just past the last whole record
+        if self.log_path.exists():
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("unterminated record")
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write from a crash: nothing after it was acknowledged
+                        break
+                    good_end += len(line)
+                    # Records already folded into the snapshot (crash mid-compaction)
+                    if record["seq"] > base_seq:
+                        records.append(record)
+
+        self._seq = records[-1]["seq"] if records else base_seq
+        self._pending = len(records)
+        self._open_log(truncate=False, keep=good_end)
+        return snapshot, ((r["op"], r["args"]) for r in records)
+
+    def _open_log(self, truncate: bool, keep: Optional[int] = None) -> None:
+        """Open the log for appending, emptying it or cutting it to ``keep`` bytes."""
+        if self._file:
+            self._file.close()
+        torn = keep is not None and self.log_path.exists() and self.log_path.stat().st_size > keep
+        if not truncate and torn:
+            # Drop a torn tail so the next record starts on a line of its own
+            with open(self.log_path, "r+b") as f:
+                f.truncate(keep)
+                if self.fsync:
+                    os.fsync(f.fileno())
+        self._file = open(self.log_path, "w" if truncate else "a", encoding="utf-8")
+
+    def append(self, op: str, args: Dict[str, Any]) -> None:
+        """Durably record one mutation before it is applied."""
+        with self._lock:
+            if self._file is None:
+                self._open_log(truncate=False)
+            self._seq += 1
+            line = json.dumps({"seq": self._seq, "op": op, "args": args}, separators=(",", ":"))
+            self._file.write(line + "\n")
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._pending += 1
+
+    @property
+    def should_compact(self) -> bool:
+        """True once enough records have built up since the last snapshot."""
+        return self._pending >= self.compact_every
+
+    def compact(self, snapshot: Dict[str, Any]) -> None:
+        """Write ``snapshot`` atomically and truncate the log.
+
+        The snapshot must reflect every record appended so far.
+        """
+        with self._lock:
+            snapshot = dict(snapshot, seq=self._seq)
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+            if self.fsync:
+                _fsync_dir(self.directory)
+            self._open_log(truncate=True)
+            self._pending = 0
+
+    def close(self) -> None:
+        """Close the log file."""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,62 @@
+"""
+Static assets for character sheets served by the GM server.
+
+The stylesheet and scripts are the same for every sheet, so the server
+sends them as separate files named by a hash of their content, which
+browsers can cache for as long as they like; each page then carries only
+its character's markup and settings. Standalone sheets inline the same
+text instead, so the file works on its own.
+"""
+
+import hashlib
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional
+
+from ..data import get_data_bundle
+from .css import STYLES
+from .js import SHEET_SYNC_JS, get_javascript_code
+
+# URL path the GM server serves assets under
+ASSET_PREFIX = "/assets/"
+
+
+class Asset(NamedTuple):
+    """One asset file: its content-hashed name, MIME type and bytes."""
+
+    filename: str
+    mimetype: str
+    content: bytes
+
+
+def _asset(name: str, mimetype: str, text: str) -> Asset:
+    content = text.encode("utf-8")
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    stem, extension = name.rsplit(".", 1)
+    return Asset(f"{stem}.{digest}.{extension}", mimetype, content)
+
+
+def sheet_assets() -> Dict[str, Asset]:
+    """The sheet's assets by plain name, built once per version of the tables."""
+    return _build_assets(get_data_bundle().digest)
+
+
+@lru_cache(maxsize=1)
+def _build_assets(data_digest: str) -> Dict[str, Asset]:
+    # data_digest is only the cache key: new tables mean a new sheet.js
+    return {
+        "sheet.css": _asset("sheet.css", "text/css", STYLES),
+        "sheet.js": _asset("sheet.js", "text/javascript", get_javascript_code()),
+        "sheet-sync.js": _asset("sheet-sync.js", "text/javascript", SHEET_SYNC_JS),
+    }
+
+
+def asset_url(name: str) -> str:
+    """URL of an asset by plain name, e.g. ``asset_url("sheet.css")``."""
+    return ASSET_PREFIX + sheet_assets()[name].filename
+
+
+def find_asset(filename: str) -> Optional[Asset]:
+    """Look up an asset by its hashed file name."""
+    return next(
+        (asset for asset in sheet_assets().values() if asset.filename == filename), None
+    )
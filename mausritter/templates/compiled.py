@@ -0,0 +1,44 @@
+"""Precompiled templates for character sheet pages."""
+
+from string import Formatter
+from typing import Any, List, Mapping, Tuple
+
+
+class Raw(str):
+    """Template text added as is, braces and all (stylesheets, scripts)."""
+
+
+class CompiledTemplate:
+    """A page split once into constant chunks and the named slots between them.
+
+    Built from ``str.format``-style text, where ``{name}`` marks a slot and
+    ``{{``/``}}`` are literal braces, and Raw text, which is never parsed.
+    Rendering fills the slots and joins everything in one pass, so a render
+    costs the size of the page and nothing more.
+
+    Args:
+        *parts: Template text and Raw text, in page order
+    """
+
+    def __init__(self, *parts: str):
+        chunks = [""]
+        slots: List[str] = []
+        for part in parts:
+            if isinstance(part, Raw):
+                chunks[-1] += part
+                continue
+            for literal, field, _, _ in Formatter().parse(part):
+                chunks[-1] += literal
+                if field is not None:
+                    slots.append(field)
+                    chunks.append("")
+        self.chunks: Tuple[str, ...] = tuple(chunks)
+        self.slots: Tuple[str, ...] = tuple(slots)
+
+    def render(self, values: Mapping[str, Any]) -> str:
+        """Fill every slot from ``values`` (formatted like an f-string would)."""
+        parts = [self.chunks[0]]
+        for slot, chunk in zip(self.slots, self.chunks[1:]):
+            parts.append(str(values[slot]))
+            parts.append(chunk)
+        return "".join(parts)
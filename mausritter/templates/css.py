@@ -1214,6 +1214,12 @@ body {
     color: #6a6a7a;
 }
 
+.dice-odds {
+    font-weight: normal;
+    font-size: 0.9em;
+    color: #6a6a7a;
+}
+
 .save-modifiers {
     display: flex;
     gap: 8px;
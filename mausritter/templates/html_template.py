@@ -1,25 +1,41 @@
 """HTML template generation for Mausritter character sheets."""
 
 import json
+import re
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
+from ..data import get_data_bundle
+from .assets import asset_url
+from .compiled import CompiledTemplate, Raw
 from .css import STYLES
 from .js import get_javascript_code
 
+# Indentation in front of a tag
+_TAG_INDENT = re.compile(r"\n[ \t]+<")
 
-def _build_head(character_name: str) -> str:
-    """Build the HTML head section."""
-    return f"""<!DOCTYPE html>
+# The section builders return template text: ``{name}`` is a slot filled
+# per character (see _sheet_values), and the page is compiled once
+
+
+def _build_head(inline: bool = True) -> List[str]:
+    """Build the HTML head section.
+
+    Args:
+        inline: Embed the stylesheet rather than linking the cached asset
+    """
+    if inline:
+        styles = ["    <style>\n", Raw(STYLES), "\n    </style>"]
+    else:
+        styles = [f'    <link rel="stylesheet" href="{asset_url("sheet.css")}">']
+    return ["""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Mausritter Character Sheet - {character_name}</title>
-    <style>
-{STYLES}
-    </style>
-</head>"""
+    <title>Mausritter Character Sheet - {name}</title>
+""", *styles, "\n</head>"]
 
 
 def _build_generate_button() -> str:
@@ -61,46 +77,40 @@ def _build_dice_roller() -> str:
     </div>"""
 
 
-def _build_header_section(character: Dict[str, Any]) -> str:
+def _build_header_section() -> str:
     """Build the header section with name, background, and appearance."""
-    appearance = character["appearance"]
-    return f"""
+    return """
     <div class="header-section">
         <div class="name-background-box">
             <div class="name-row">
                 <span class="name-label">Name</span>
-                <input type="text" class="name-input" value="{character['name']}" placeholder="Enter name" />
+                <input type="text" class="name-input" value="{name}" placeholder="Enter name" />
             </div>
             <div class="background-row">
                 <span class="background-label">Background</span>
-                <input type="text" class="background-input" value="{character['background']}" placeholder="Enter background" />
+                <input type="text" class="background-input" value="{background}" placeholder="Enter background" />
             </div>
         </div>
         <div class="appearance-box">
             <div class="appearance-row">
                 <span class="appearance-label">Birthsign</span>
-                <input type="text" value="{appearance['birthsign']} ({appearance['disposition']})" placeholder="Enter birthsign" />
+                <input type="text" value="{birthsign} ({disposition})" placeholder="Enter birthsign" />
             </div>
             <div class="appearance-row">
                 <span class="appearance-label">Coat</span>
-                <input type="text" value="{appearance['coat']}" placeholder="Enter coat" />
+                <input type="text" value="{coat}" placeholder="Enter coat" />
             </div>
             <div class="appearance-row">
                 <span class="appearance-label">Look</span>
-                <input type="text" value="{appearance['look']}" placeholder="Enter look" />
+                <input type="text" value="{look}" placeholder="Enter look" />
             </div>
         </div>
     </div>"""
 
 
-def _build_middle_section(character: Dict[str, Any]) -> str:
+def _build_middle_section() -> str:
     """Build the middle section with portrait and stats."""
-    attrs = character["attributes"]
-    hp = character["hp"]
-    pips = character["pips"]
-    pips_total = character["pips_total"]
-
-    return f"""
+    return """
     <div class="stats-section">
         <div class="section-header" onclick="toggleSection('stats')">
             <span class="section-title">Stats</span>
@@ -123,18 +133,18 @@ def _build_middle_section(character: Dict[str, Any]) -> str:
                         <div class="attributes-table">
                             <div class="attribute-row">
                                 <span class="attribute-label save-btn" onclick="rollSave('STR')" title="Click to roll STR save">STR</span>
-                                <input type="number" value="{attrs['STR']['max']}" min="1" max="12" />
-                                <input type="number" value="{attrs['STR']['current']}" min="0" max="12" />
+                                <input type="number" value="{str_max}" min="1" max="12" />
+                                <input type="number" value="{str_current}" min="0" max="12" />
                             </div>
                             <div class="attribute-row">
                                 <span class="attribute-label save-btn" onclick="rollSave('DEX')" title="Click to roll DEX save">DEX</span>
-                                <input type="number" value="{attrs['DEX']['max']}" min="1" max="12" />
-                                <input type="number" value="{attrs['DEX']['current']}" min="0" max="12" />
+                                <input type="number" value="{dex_max}" min="1" max="12" />
+                                <input type="number" value="{dex_current}" min="0" max="12" />
                             </div>
                             <div class="attribute-row">
                                 <span class="attribute-label save-btn" onclick="rollSave('WIL')" title="Click to roll WIL save">WIL</span>
-                                <input type="number" value="{attrs['WIL']['max']}" min="1" max="12" />
-                                <input type="number" value="{attrs['WIL']['current']}" min="0" max="12" />
+                                <input type="number" value="{wil_max}" min="1" max="12" />
+                                <input type="number" value="{wil_current}" min="0" max="12" />
                             </div>
                         </div>
                     </div>
@@ -142,8 +152,8 @@ def _build_middle_section(character: Dict[str, Any]) -> str:
                         <div class="hp-table">
                             <div class="hp-row">
                                 <span class="hp-label">HP</span>
-                                <input type="number" value="{hp['max']}" min="1" max="20" />
-                                <input type="number" value="{hp['current']}" min="0" max="20" />
+                                <input type="number" value="{hp_max}" min="1" max="20" />
+                                <input type="number" value="{hp_current}" min="0" max="20" />
                             </div>
                         </div>
                     </div>
@@ -162,18 +172,9 @@ def _build_middle_section(character: Dict[str, Any]) -> str:
     </div>"""
 
 
-def _build_inventory_section(character: Dict[str, Any]) -> str:
+def _build_inventory_section() -> str:
     """Build the inventory section with slot grid."""
-    inventory = character.get("inventory", {})
-    main_paw = inventory.get("main_paw", "")
-    off_paw = inventory.get("off_paw", "")
-    body = inventory.get("body", ["", ""])
-    pack = inventory.get("pack", ["", "", "", "", "", ""])
-
-    # Add needs-selection class if main_paw is "Select weapon"
-    main_paw_class = "needs-selection" if main_paw == "Select weapon" else ""
-
-    return f"""
+    return """
     <div class="inventory-section">
         <div class="inventory-header" onclick="toggleInventory()">
             <span class="inventory-title">Inventory</span>
@@ -231,7 +232,7 @@ def _build_inventory_section(character: Dict[str, Any]) -> str:
                             </span>
                         </div>
                         <div class="slot-content">
-                            <textarea placeholder="">{body[0]}</textarea>
+                            <textarea placeholder="">{body_0}</textarea>
                         </div>
                         <div class="usage-markers">
                             <span class="usage-marker" onclick="toggleUsage(this)"></span>
@@ -248,7 +249,7 @@ def _build_inventory_section(character: Dict[str, Any]) -> str:
                             </span>
                         </div>
                         <div class="slot-content">
-                            <textarea placeholder="">{body[1]}</textarea>
+                            <textarea placeholder="">{body_1}</textarea>
                         </div>
                         <div class="usage-markers">
                             <span class="usage-marker" onclick="toggleUsage(this)"></span>
@@ -270,7 +271,7 @@ def _build_inventory_section(character: Dict[str, Any]) -> str:
                             </span>
                         </div>
                         <div class="slot-content">
-                            <textarea placeholder="">{pack[0]}</textarea>
+                            <textarea placeholder="">{pack_0}</textarea>
                         </div>
                         <div class="usage-markers">
                             <span class="usage-marker" onclick="toggleUsage(this)"></span>
@@ -287,7 +288,7 @@ def _build_inventory_section(character: Dict[str, Any]) -> str:
                             </span>
                         </div>
                         <div class="slot-content">
-                            <textarea placeholder="">{pack[1]}</textarea>
+                            <textarea placeholder="">{pack_1}</textarea>
                         </div>
                         <div class="usage-markers">
                             <span class="usage-marker" onclick="toggleUsage(this)"></span>
@@ -304,7 +305,7 @@ def _build_inventory_section(character: Dict[str, Any]) -> str:
                             </span>
                         </div>
                         <div class="slot-content">
-                            <textarea placeholder="">{pack[2]}</textarea>
+                            <textarea placeholder="">{pack_2}</textarea>
                         </div>
                         <div class="usage-markers">
                             <span class="usage-marker" onclick="toggleUsage(this)"></span>
@@ -321,7 +322,7 @@ def _build_inventory_section(character: Dict[str, Any]) -> str:
                             </span>
                         </div>
                         <div class="slot-content">
-                            <textarea placeholder="">{pack[3]}</textarea>
+                            <textarea placeholder="">{pack_3}</textarea>
                         </div>
                         <div class="usage-markers">
                             <span class="usage-marker" onclick="toggleUsage(this)"></span>
@@ -338,7 +339,7 @@ def _build_inventory_section(character: Dict[str, Any]) -> str:
                             </span>
                         </div>
                         <div class="slot-content">
-                            <textarea placeholder="">{pack[4]}</textarea>
+                            <textarea placeholder="">{pack_4}</textarea>
                         </div>
                         <div class="usage-markers">
                             <span class="usage-marker" onclick="toggleUsage(this)"></span>
@@ -355,7 +356,7 @@ def _build_inventory_section(character: Dict[str, Any]) -> str:
                             </span>
                         </div>
                         <div class="slot-content">
-                            <textarea placeholder="">{pack[5]}</textarea>
+                            <textarea placeholder="">{pack_5}</textarea>
                         </div>
                         <div class="usage-markers">
                             <span class="usage-marker" onclick="toggleUsage(this)"></span>
@@ -371,13 +372,9 @@ def _build_inventory_section(character: Dict[str, Any]) -> str:
     </div>"""
 
 
-def _build_bottom_section(character: Dict[str, Any]) -> str:
+def _build_bottom_section() -> str:
     """Build the bottom section with level, grit, and banked items."""
-    level = character.get("level", 1)
-    xp = character.get("xp", 0)
-    grit = character.get("grit", 0)
-
-    return f"""
+    return """
     <div class="other-section">
         <div class="section-header" onclick="toggleSection('other')">
             <span class="section-title">Other</span>
@@ -441,10 +438,17 @@ def _build_hirelings_section() -> str:
     </div>"""
 
 
-def _build_footer() -> str:
-    """Build the footer section."""
-    js_code = get_javascript_code()
-    return f"""
+def _build_footer(inline: bool = True) -> List[str]:
+    """Build the footer section.
+
+    Args:
+        inline: Embed the sheet script rather than linking the cached asset
+    """
+    if inline:
+        script = ["    <script>\n", Raw(get_javascript_code()), "\n    </script>"]
+    else:
+        script = [f'    <script src="{asset_url("sheet.js")}"></script>']
+    return ["""
     <div class="custom-dialog-modal" id="gritAlertModal">
         <div class="custom-dialog-content">
             <div class="custom-dialog-header">Grit</div>
@@ -513,646 +517,159 @@ def _build_footer() -> str:
         This is a personal project. Original character sheet design © <a href="https://mausritter.com" target="_blank">Mausritter</a> by Losing Games.
     </div>
 
-    <script>
-{js_code}
-    </script>
+""", *script, """
 </body>
-</html>"""
+</html>"""]
 
 
-def generate_character_sheet_html(character: Dict[str, Any], server_mode: bool = False, token: str = "") -> str:
-    """Generate character sheet HTML as a string.
+def _build_server_script() -> str:
+    """Build the server connectivity settings and script."""
+    return f"""
+    <script>
+        // Server connectivity - auto-save changes
+        const API_TOKEN = '{{token}}';
+        const CHARACTER_ID = '{{char_id}}';
 
-    Args:
-        character: Dictionary containing character data
-        server_mode: If True, adds server connectivity JavaScript
-        token: Player token for server API authentication
+        // Stored character data for restoration on page load
+        const STORED_HIRELINGS = {{hirelings_json}};
+        const STORED_CONDITIONS = {{conditions_json}};
+        const STORED_INVENTORY_USAGE = {{inventory_usage_json}};
+        const STORED_MAX_GRIT = {{max_grit}};
+        const EVENTS_SINCE = '{{events_since}}';
+        const INITIAL_CHARACTER = {{character_json}};
+    </script>
+    <script src="{asset_url("sheet-sync.js")}"></script>
+"""
 
-    Returns:
-        HTML string for the character sheet
+
+@lru_cache(maxsize=8)
+def _page_template(server_mode: bool, connected: bool, data_digest: str) -> CompiledTemplate:
+    """The sheet page, compiled once per kind of page.
+
+    ``data_digest`` is only part of the cache key: the inlined script and
+    the asset names change with the game tables.
     """
-    html_parts = [
-        _build_head(character["name"]),
-        "<body>",
+    sections = [
+        _build_head(inline=not server_mode),
+        "<body>{chrome}",
         '    <div class="character-sheet">',
     ]
 
     # In server mode, don't show "Generate New Character" button
     if not server_mode:
-        html_parts.append(_build_generate_button())
+        sections.append(_build_generate_button())
 
-    html_parts.extend([
-        _build_header_section(character),
+    sections.extend([
+        _build_header_section(),
         _build_dice_roller(),
-        _build_middle_section(character),
-        _build_inventory_section(character),
-        _build_bottom_section(character),
+        _build_middle_section(),
+        _build_inventory_section(),
+        _build_bottom_section(),
         _build_hirelings_section(),
-        _build_footer(),
+        _build_footer(inline=not server_mode),
     ])
 
     # Add server connectivity script if in server mode
-    if server_mode and token:
-        # Prepare character data for restoration (hirelings, conditions, usage markers)
-        hirelings_json = json.dumps(character.get("hirelings", []))
-        conditions_json = json.dumps(character.get("conditions", []))
-        inventory_usage_json = json.dumps(character.get("inventory_usage", {}))
-        max_grit = character.get("max_grit", character.get("grit", 0))
-
-        server_script = f"""
-    <script>
-        // Server connectivity - auto-save changes
-        const API_TOKEN = '{token}';
-        const CHARACTER_ID = '{character.get("id", "")}';
-
-        // Stored character data for restoration on page load
-        const STORED_HIRELINGS = {hirelings_json};
-        const STORED_CONDITIONS = {conditions_json};
-        const STORED_INVENTORY_USAGE = {inventory_usage_json};
-        const STORED_MAX_GRIT = {max_grit};
-
-        function debounce(func, wait) {{
-            let timeout;
-            return function(...args) {{
-                clearTimeout(timeout);
-                timeout = setTimeout(() => func.apply(this, args), wait);
-            }};
-        }}
-
-        function getStatFromRow(statName) {{
-            // Find the attribute row by looking for the span with the stat name
-            const rows = document.querySelectorAll('.attribute-row');
-            for (const row of rows) {{
-                const label = row.querySelector('.attribute-label');
-                if (label && label.textContent.trim() === statName) {{
-                    const inputs = row.querySelectorAll('input[type="number"]');
-                    if (inputs.length >= 2) {{
-                        return {{
-                            max: parseInt(inputs[0].value) || 0,
-                            current: parseInt(inputs[1].value) || 0
-                        }};
-                    }}
-                }}
-            }}
-            return {{ max: 0, current: 0 }};
-        }}
-
-        function getHpValues() {{
-            const hpRow = document.querySelector('.hp-row');
-            if (hpRow) {{
-                const inputs = hpRow.querySelectorAll('input[type="number"]');
-                if (inputs.length >= 2) {{
-                    return {{
-                        max: parseInt(inputs[0].value) || 0,
-                        current: parseInt(inputs[1].value) || 0
-                    }};
-                }}
-            }}
-            return {{ max: 0, current: 0 }};
-        }}
-
-        function getInventory() {{
-            const inventory = {{
-                main_paw: '',
-                off_paw: '',
-                body: ['', ''],
-                pack: ['', '', '', '', '', '']
-            }};
-
-            // Paw slots - first two .paw-slot elements
-            const pawSlots = document.querySelectorAll('.paw-slot .slot-content textarea');
-            if (pawSlots[0]) inventory.main_paw = pawSlots[0].value || '';
-            if (pawSlots[1]) inventory.off_paw = pawSlots[1].value || '';
-
-            // Body slots
-            const bodySlots = document.querySelectorAll('.body-slot .slot-content textarea');
-            bodySlots.forEach((textarea, i) => {{
-                if (i < 2) inventory.body[i] = textarea.value || '';
-            }});
-
-            // Pack slots
-            const packSlots = document.querySelectorAll('.pack-slot .slot-content textarea');
-            packSlots.forEach((textarea, i) => {{
-                if (i < 6) inventory.pack[i] = textarea.value || '';
-            }});
-
-            return inventory;
-        }}
-
-        function getHirelings() {{
-            const hirelings = [];
-            const hirelingCards = document.querySelectorAll('.hireling-card');
-
-            hirelingCards.forEach(card => {{
-                // Get type from title text
-                const typeText = card.querySelector('.hireling-title-text')?.textContent || 'Hireling';
-
-                // Get look and disposition from the info row fields
-                const fields = card.querySelectorAll('.hireling-field');
-                let look = '';
-                let disposition = '';
-                fields.forEach(field => {{
-                    const label = field.querySelector('.hireling-field-label')?.textContent?.trim();
-                    const input = field.querySelector('input');
-                    if (label === 'Look' && input) look = input.value || '';
-                    if (label === 'Disposition' && input) disposition = input.value || '';
-                }});
-
-                const hireling = {{
-                    type: typeText,
-                    look: look,
-                    disposition: disposition,
-                    attributes: {{}},
-                    hp: {{ max: 1, current: 1 }},
-                    inventory: {{
-                        paws: ['', ''],
-                        pack: ['', '', '', '']
-                    }},
-                    usage: {{
-                        paws: [[false, false, false], [false, false, false]],
-                        pack: [[false, false, false], [false, false, false], [false, false, false], [false, false, false]]
-                    }}
-                }};
-
-                // Get hireling stats from .hireling-stat-row elements
-                const statRows = card.querySelectorAll('.hireling-stat-row');
-                statRows.forEach(row => {{
-                    const label = row.querySelector('.hireling-stat-label')?.textContent?.trim();
-                    const inputs = row.querySelectorAll('input[type="number"]');
-                    if (label && inputs.length >= 2) {{
-                        if (label === 'HP') {{
-                            hireling.hp = {{
-                                max: parseInt(inputs[0].value) || 1,
-                                current: parseInt(inputs[1].value) || 1
-                            }};
-                        }} else {{
-                            hireling.attributes[label] = {{
-                                max: parseInt(inputs[0].value) || 0,
-                                current: parseInt(inputs[1].value) || 0
-                            }};
-                        }}
-                    }}
-                }});
-
-                // Get hireling inventory - paw slots
-                const pawSlots = card.querySelectorAll('.hireling-inventory-slot[data-slot-type="paw"]');
-                pawSlots.forEach((slot, i) => {{
-                    if (i < 2) {{
-                        const textarea = slot.querySelector('.hireling-slot-content textarea');
-                        hireling.inventory.paws[i] = textarea?.value || '';
-                        // Get usage markers
-                        const markers = slot.querySelectorAll('.usage-marker');
-                        markers.forEach((marker, mi) => {{
-                            if (mi < 3) {{
-                                hireling.usage.paws[i][mi] = marker.classList.contains('used') ? 'used' :
-                                                            (marker.classList.contains('half-used') ? 'half' : false);
-                            }}
-                        }});
-                    }}
-                }});
-
-                // Get hireling inventory - pack slots
-                const packSlots = card.querySelectorAll('.hireling-inventory-slot[data-slot-type="pack"]');
-                packSlots.forEach((slot, i) => {{
-                    if (i < 4) {{
-                        const textarea = slot.querySelector('.hireling-slot-content textarea');
-                        hireling.inventory.pack[i] = textarea?.value || '';
-                        // Get usage markers
-                        const markers = slot.querySelectorAll('.usage-marker');
-                        markers.forEach((marker, mi) => {{
-                            if (mi < 3) {{
-                                hireling.usage.pack[i][mi] = marker.classList.contains('used') ? 'used' :
-                                                            (marker.classList.contains('half-used') ? 'half' : false);
-                            }}
-                        }});
-                    }}
-                }});
-
-                hirelings.push(hireling);
-            }});
-
-            return hirelings;
-        }}
-
-        function getConditions() {{
-            const conditions = [];
-            document.querySelectorAll('.ignored-condition-row').forEach(row => {{
-                const conditionName = row.dataset.condition || row.querySelector('.ignored-condition-name')?.textContent;
-                if (conditionName) {{
-                    conditions.push(conditionName);
-                }}
-            }});
-            return conditions;
-        }}
-
-        function getSlotState(slot) {{
-            // Capture all relevant state from a slot
-            const markers = slot.querySelectorAll('.usage-marker');
-            const markerStates = [];
-            markers.forEach((marker, mi) => {{
-                if (mi < 3) {{
-                    markerStates.push(marker.classList.contains('used') ? 'used' :
-                                     (marker.classList.contains('half-used') ? 'half' : false));
-                }}
-            }});
-
-            return {{
-                markers: markerStates,
-                twoSlotItem: slot.classList.contains('two-slot-item'),
-                twoSlotSecondary: slot.classList.contains('two-slot-secondary'),
-                conditionSlot: slot.classList.contains('condition-slot'),
-                depleted: slot.classList.contains('depleted'),
-                lightArmourSlot: slot.classList.contains('light-armour-slot')
-            }};
-        }}
-
-        function getInventoryUsage() {{
-            const usage = {{
-                main_paw: {{ markers: [false, false, false] }},
-                off_paw: {{ markers: [false, false, false] }},
-                body: [{{ markers: [false, false, false] }}, {{ markers: [false, false, false] }}],
-                pack: [{{ markers: [false, false, false] }}, {{ markers: [false, false, false] }},
-                       {{ markers: [false, false, false] }}, {{ markers: [false, false, false] }},
-                       {{ markers: [false, false, false] }}, {{ markers: [false, false, false] }}]
-            }};
-
-            // Paw slots
-            const pawSlots = document.querySelectorAll('.paw-slot');
-            pawSlots.forEach((slot, slotIdx) => {{
-                const key = slotIdx === 0 ? 'main_paw' : 'off_paw';
-                usage[key] = getSlotState(slot);
-            }});
-
-            // Body slots
-            const bodySlots = document.querySelectorAll('.body-slot');
-            bodySlots.forEach((slot, slotIdx) => {{
-                if (slotIdx < 2) {{
-                    usage.body[slotIdx] = getSlotState(slot);
-                }}
-            }});
-
-            // Pack slots
-            const packSlots = document.querySelectorAll('.pack-slot');
-            packSlots.forEach((slot, slotIdx) => {{
-                if (slotIdx < 6) {{
-                    usage.pack[slotIdx] = getSlotState(slot);
-                }}
-            }});
-
-            return usage;
-        }}
-
-        async function saveToServer() {{
-            if (!CHARACTER_ID) return;
-
-            // Get max grit from data attribute
-            const gritInput = document.querySelector('.grit-input');
-            const maxGrit = parseInt(gritInput?.dataset?.maxGrit) || 0;
-
-            // Collect current character state from DOM
-            const data = {{
-                name: document.querySelector('.name-input')?.value || '',
-                background: document.querySelector('.background-input')?.value || '',
-                attributes: {{
-                    STR: getStatFromRow('STR'),
-                    DEX: getStatFromRow('DEX'),
-                    WIL: getStatFromRow('WIL')
-                }},
-                hp: getHpValues(),
-                pips: parseInt(document.querySelector('.pips-input')?.value) || 0,
-                grit: parseInt(gritInput?.value) || 0,
-                max_grit: maxGrit,
-                level: parseInt(document.querySelector('.level-row input')?.value) || 1,
-                xp: parseInt(document.querySelector('.xp-row input')?.value) || 0,
-                inventory: getInventory(),
-                inventory_usage: getInventoryUsage(),
-                conditions: getConditions(),
-                hirelings: getHirelings()
-            }};
-
-            // Get appearance fields
-            const appearanceInputs = document.querySelectorAll('.appearance-row input');
-            if (appearanceInputs.length >= 3) {{
-                data.appearance = {{
-                    birthsign: appearanceInputs[0]?.value || '',
-                    coat: appearanceInputs[1]?.value || '',
-                    look: appearanceInputs[2]?.value || ''
-                }};
-            }}
-
-            // Get banked items
-            const bankedTextarea = document.querySelector('.banked-box textarea');
-            if (bankedTextarea) {{
-                data.banked = {{
-                    items: bankedTextarea.value || '',
-                    pips: 0
-                }};
-            }}
-
-            // Get notes/portrait
-            const portraitTextarea = document.querySelector('.portrait-input');
-            if (portraitTextarea) {{
-                data.notes = portraitTextarea.value || '';
-            }}
-
-            try {{
-                const response = await fetch(`/api/characters/${{CHARACTER_ID}}?token=${{API_TOKEN}}`, {{
-                    method: 'PATCH',
-                    headers: {{'Content-Type': 'application/json'}},
-                    body: JSON.stringify(data)
-                }});
-                if (response.ok) {{
-                    showSaveIndicator();
-                }} else {{
-                    console.error('Save failed:', await response.text());
-                }}
-            }} catch (e) {{
-                console.error('Failed to save:', e);
-            }}
-        }}
-
-        const debouncedSave = debounce(saveToServer, 1000);
-
-        // Restoration functions for loading saved state
-        function restoreSlotState(slot, slotState) {{
-            if (!slotState) return;
-
-            // Handle both old format (array) and new format (object with markers)
-            const markerStates = slotState.markers || slotState;
-            if (Array.isArray(markerStates)) {{
-                const markers = slot.querySelectorAll('.usage-marker');
-                markers.forEach((marker, mi) => {{
-                    if (markerStates[mi] === 'used') {{
-                        marker.classList.add('used');
-                    }} else if (markerStates[mi] === 'half') {{
-                        marker.classList.add('half-used');
-                    }}
-                }});
-            }}
-
-            // Restore slot classes
-            if (slotState.twoSlotItem) slot.classList.add('two-slot-item');
-            if (slotState.twoSlotSecondary) {{
-                slot.classList.add('two-slot-secondary');
-                // Make textarea readonly for secondary slot
-                const textarea = slot.querySelector('.slot-content textarea');
-                if (textarea) textarea.readOnly = true;
-            }}
-            if (slotState.depleted) slot.classList.add('depleted');
-            if (slotState.lightArmourSlot) slot.classList.add('light-armour-slot');
-
-            // Restore condition styling
-            if (slotState.conditionSlot) {{
-                slot.classList.add('condition-slot');
-                // Get the item name from the textarea to find the clear text
-                const textarea = slot.querySelector('.slot-content textarea');
-                if (textarea) {{
-                    const itemName = textarea.value.split('\\n')[0].trim();
-                    if (CONDITION_CLEAR[itemName]) {{
-                        const clearDiv = document.createElement('div');
-                        clearDiv.className = 'condition-clear';
-                        clearDiv.textContent = CONDITION_CLEAR[itemName];
-                        slot.querySelector('.slot-content').appendChild(clearDiv);
-                    }}
-                }}
-            }}
-        }}
-
-        function restoreInventoryUsage(usage) {{
-            if (!usage) return;
-
-            // Restore paw slots
-            const pawSlots = document.querySelectorAll('.paw-slot');
-            pawSlots.forEach((slot, slotIdx) => {{
-                const key = slotIdx === 0 ? 'main_paw' : 'off_paw';
-                restoreSlotState(slot, usage[key]);
-            }});
-
-            // Restore body slots
-            const bodySlots = document.querySelectorAll('.body-slot');
-            bodySlots.forEach((slot, slotIdx) => {{
-                if (usage.body && usage.body[slotIdx]) {{
-                    restoreSlotState(slot, usage.body[slotIdx]);
-                }}
-            }});
-
-            // Restore pack slots
-            const packSlots = document.querySelectorAll('.pack-slot');
-            packSlots.forEach((slot, slotIdx) => {{
-                if (usage.pack && usage.pack[slotIdx]) {{
-                    restoreSlotState(slot, usage.pack[slotIdx]);
-                }}
-            }});
-        }}
-
-        function restoreConditions(conditions, maxGrit) {{
-            if (!conditions || !Array.isArray(conditions)) return;
-
-            const gritInput = document.querySelector('.grit-input');
-            if (gritInput && maxGrit !== undefined) {{
-                gritInput.dataset.maxGrit = maxGrit;
-            }}
-
-            const conditionsList = document.querySelector('.ignored-conditions-list');
-            if (!conditionsList) return;
-
-            conditions.forEach(conditionName => {{
-                const row = document.createElement('div');
-                row.className = 'ignored-condition-row';
-                row.dataset.condition = conditionName;
-
-                const removeBtn = document.createElement('button');
-                removeBtn.className = 'slot-btn clear-btn';
-                removeBtn.textContent = '-';
-                removeBtn.onclick = function() {{
-                    removeIgnoredCondition(this);
-                }};
-
-                const content = document.createElement('div');
-                content.className = 'ignored-condition-content';
-
-                const nameSpan = document.createElement('span');
-                nameSpan.className = 'ignored-condition-name';
-                nameSpan.textContent = conditionName;
-
-                const clearSpan = document.createElement('span');
-                clearSpan.className = 'ignored-condition-clear';
-                clearSpan.textContent = CONDITION_CLEAR[conditionName] || '';
-
-                content.appendChild(nameSpan);
-                content.appendChild(clearSpan);
-
-                row.appendChild(removeBtn);
-                row.appendChild(content);
-
-                conditionsList.appendChild(row);
-            }});
-        }}
-
-        function restoreHirelings(hirelings) {{
-            if (!hirelings || !Array.isArray(hirelings)) return;
-
-            const container = document.getElementById('hirelingsContainer');
-            if (!container) return;
-
-            // Open the hirelings section if there are hirelings
-            if (hirelings.length > 0) {{
-                const content = document.getElementById('hirelingsContent');
-                const toggle = document.getElementById('hirelingsToggle');
-                if (content && !content.classList.contains('active')) {{
-                    content.classList.add('active');
-                    if (toggle) toggle.textContent = '▲';
-                }}
-            }}
-
-            hirelings.forEach(hireling => {{
-                // Use the existing addHirelingWithType but we need to set the values after
-                hirelingCounter++;
-                const stats = {{
-                    hp: hireling.hp?.max || 1,
-                    str: hireling.attributes?.STR?.max || 6,
-                    dex: hireling.attributes?.DEX?.max || 6,
-                    wil: hireling.attributes?.WIL?.max || 6,
-                    look: hireling.look || '',
-                    disposition: hireling.disposition || ''
-                }};
-
-                // Get display number for this type
-                const displayNumber = document.querySelectorAll(`.hireling-card[data-hireling-type="${{hireling.type}}"]`).length + 1;
-                const cardHTML = createHirelingCardHTML(hirelingCounter, stats, displayNumber, hireling.type);
-
-                container.insertAdjacentHTML('beforeend', cardHTML);
-
-                const hirelingCard = document.getElementById('hireling-' + hirelingCounter);
-                if (hirelingCard) {{
-                    setupHirelingStatListeners(hirelingCard);
-
-                    // Set current values (which may differ from max)
-                    const statRows = hirelingCard.querySelectorAll('.hireling-stat-row');
-                    statRows.forEach(row => {{
-                        const label = row.querySelector('.hireling-stat-label')?.textContent?.trim();
-                        const inputs = row.querySelectorAll('input[type="number"]');
-                        if (inputs.length >= 2) {{
-                            if (label === 'HP' && hireling.hp) {{
-                                inputs[1].value = hireling.hp.current || hireling.hp.max || 1;
-                            }} else if (hireling.attributes && hireling.attributes[label]) {{
-                                inputs[1].value = hireling.attributes[label].current || hireling.attributes[label].max || 0;
-                            }}
-                        }}
-                    }});
-
-                    // Restore hireling inventory
-                    if (hireling.inventory) {{
-                        const pawSlots = hirelingCard.querySelectorAll('.hireling-inventory-slot[data-slot-type="paw"]');
-                        pawSlots.forEach((slot, i) => {{
-                            if (hireling.inventory.paws && hireling.inventory.paws[i]) {{
-                                const textarea = slot.querySelector('.hireling-slot-content textarea');
-                                if (textarea) textarea.value = hireling.inventory.paws[i];
-                            }}
-                        }});
-
-                        const packSlots = hirelingCard.querySelectorAll('.hireling-inventory-slot[data-slot-type="pack"]');
-                        packSlots.forEach((slot, i) => {{
-                            if (hireling.inventory.pack && hireling.inventory.pack[i]) {{
-                                const textarea = slot.querySelector('.hireling-slot-content textarea');
-                                if (textarea) textarea.value = hireling.inventory.pack[i];
-                            }}
-                        }});
-                    }}
-
-                    // Restore hireling usage markers
-                    if (hireling.usage) {{
-                        const pawSlots = hirelingCard.querySelectorAll('.hireling-inventory-slot[data-slot-type="paw"]');
-                        pawSlots.forEach((slot, i) => {{
-                            if (hireling.usage.paws && hireling.usage.paws[i]) {{
-                                const markers = slot.querySelectorAll('.usage-marker');
-                                markers.forEach((marker, mi) => {{
-                                    if (hireling.usage.paws[i][mi] === 'used') {{
-                                        marker.classList.add('used');
-                                    }} else if (hireling.usage.paws[i][mi] === 'half') {{
-                                        marker.classList.add('half-used');
-                                    }}
-                                }});
-                            }}
-                        }});
-
-                        const packSlots = hirelingCard.querySelectorAll('.hireling-inventory-slot[data-slot-type="pack"]');
-                        packSlots.forEach((slot, i) => {{
-                            if (hireling.usage.pack && hireling.usage.pack[i]) {{
-                                const markers = slot.querySelectorAll('.usage-marker');
-                                markers.forEach((marker, mi) => {{
-                                    if (hireling.usage.pack[i][mi] === 'used') {{
-                                        marker.classList.add('used');
-                                    }} else if (hireling.usage.pack[i][mi] === 'half') {{
-                                        marker.classList.add('half-used');
-                                    }}
-                                }});
-                            }}
-                        }});
-                    }}
-                }}
-            }});
-        }}
-
-        function showSaveIndicator() {{
-            let indicator = document.getElementById('server-save-indicator');
-            if (!indicator) {{
-                indicator = document.createElement('div');
-                indicator.id = 'server-save-indicator';
-                indicator.style.cssText = 'position:fixed;bottom:20px;right:20px;background:#4a7a4a;color:white;padding:10px 20px;border-radius:8px;opacity:0;transition:opacity 0.3s;z-index:9999;';
-                indicator.textContent = 'Saved!';
-                document.body.appendChild(indicator);
-            }}
-            indicator.style.opacity = '1';
-            setTimeout(() => {{ indicator.style.opacity = '0'; }}, 1500);
-        }}
-
-        // Attach save listeners to all inputs and textareas
-        document.addEventListener('DOMContentLoaded', () => {{
-            // Restore saved state first (before attaching listeners to avoid triggering saves)
-            restoreInventoryUsage(STORED_INVENTORY_USAGE);
-            restoreConditions(STORED_CONDITIONS, STORED_MAX_GRIT);
-            restoreHirelings(STORED_HIRELINGS);
-
-            function attachListeners() {{
-                document.querySelectorAll('input, textarea').forEach(el => {{
-                    if (!el.dataset.saveListenerAttached) {{
-                        el.addEventListener('change', debouncedSave);
-                        el.addEventListener('blur', debouncedSave);
-                        el.addEventListener('input', debouncedSave);
-                        el.dataset.saveListenerAttached = 'true';
-                    }}
-                }});
-
-                // Also listen on usage markers for click events
-                document.querySelectorAll('.usage-marker').forEach(marker => {{
-                    if (!marker.dataset.saveListenerAttached) {{
-                        marker.addEventListener('click', () => setTimeout(debouncedSave, 100));
-                        marker.dataset.saveListenerAttached = 'true';
-                    }}
-                }});
-            }}
+    if connected:
+        sections.append(_build_server_script())
+
+    # Join the sections with newlines, merging template text between Raw parts
+    parts: List[str] = []
+    for section in sections:
+        for part in ([section] if isinstance(section, str) else section):
+            if parts and not isinstance(part, Raw) and not isinstance(parts[-1], Raw):
+                parts[-1] += part
+            else:
+                parts.append(part)
+        parts[-1] += "\n"
+    parts[-1] = parts[-1][:-1]
+    if server_mode:
+        # Served on every visit, so drop the indentation; the newline stays,
+        # so whitespace between elements renders the same
+        parts = [part if isinstance(part, Raw) else _TAG_INDENT.sub("\n<", part) for part in parts]
+    return CompiledTemplate(*parts)
+
+
+def _sheet_values(
+    character: Dict[str, Any], token: str, version: Optional[int], chrome: str
+) -> Dict[str, Any]:
+    """Values for every slot of the sheet page."""
+    appearance = character["appearance"]
+    attrs = character["attributes"]
+    hp = character["hp"]
+    inventory = character.get("inventory", {})
+    main_paw = inventory.get("main_paw", "")
+    body = inventory.get("body", ["", ""])
+    pack = inventory.get("pack", ["", "", "", "", "", ""])
 
-            // Initial attachment
-            attachListeners();
+    values = {
+        "chrome": chrome,
+        "name": character["name"],
+        "background": character["background"],
+        "birthsign": appearance["birthsign"],
+        "disposition": appearance["disposition"],
+        "coat": appearance["coat"],
+        "look": appearance["look"],
+        "hp_max": hp["max"],
+        "hp_current": hp["current"],
+        "pips": character["pips"],
+        "main_paw": main_paw,
+        # Add needs-selection class if main_paw is "Select weapon"
+        "main_paw_class": "needs-selection" if main_paw == "Select weapon" else "",
+        "off_paw": inventory.get("off_paw", ""),
+        "level": character.get("level", 1),
+        "xp": character.get("xp", 0),
+        "grit": character.get("grit", 0),
+    }
+    for stat in ("STR", "DEX", "WIL"):
+        values[f"{stat.lower()}_max"] = attrs[stat]["max"]
+        values[f"{stat.lower()}_current"] = attrs[stat]["current"]
+    for index in range(2):
+        values[f"body_{index}"] = body[index]
+    for index in range(6):
+        values[f"pack_{index}"] = pack[index]
+
+    if token:
+        # Prepare character data for restoration (hirelings, conditions, usage markers)
+        values.update(
+            token=token,
+            char_id=character.get("id", ""),
+            hirelings_json=json.dumps(character.get("hirelings", [])),
+            conditions_json=json.dumps(character.get("conditions", [])),
+            inventory_usage_json=json.dumps(character.get("inventory_usage", {})),
+            max_grit=character.get("max_grit", character.get("grit", 0)),
+            # Escape '<' so no value can close the script element
+            character_json=json.dumps(character).replace("<", "\\u003c"),
+            events_since="" if version is None else version,
+        )
+    return values
+
+
+def generate_character_sheet_html(
+    character: Dict[str, Any], server_mode: bool = False, token: str = "",
+    version: Optional[int] = None, chrome: str = "",
+) -> str:
+    """Generate character sheet HTML as a string.
 
-            // Watch for new elements (hirelings added dynamically)
-            const observer = new MutationObserver(() => {{
-                attachListeners();
-                debouncedSave();
-            }});
+    In server mode the stylesheet and scripts are linked as cached assets
+    (see ``assets``), so each page carries only the character's markup.
+    The page itself is compiled once; a render only fills in this
+    character's values.
 
-            observer.observe(document.body, {{
-                childList: true,
-                subtree: true,
-                characterData: true
-            }});
-        }});
-    </script>
-"""
-        html_parts.append(server_script)
+    Args:
+        character: Dictionary containing character data
+        server_mode: If True, adds server connectivity JavaScript
+        token: Player token for server API authentication
+        version: Session version the character was read at; live updates
+            start from there (default: whenever the page connects)
+        chrome: Extra markup placed first in the body, e.g. navigation
 
-    return "\n".join(html_parts)
+    Returns:
+        HTML string for the character sheet
+    """
+    connected = bool(server_mode and token)
+    template = _page_template(server_mode, connected, get_data_bundle().digest)
+    return template.render(_sheet_values(character, token if connected else "", version, chrome))
 
 
 def create_html_character_sheet(character: Dict[str, Any], output_path: Path) -> None:
@@ -1,27 +1,45 @@
 """JavaScript code for the Mausritter character sheet."""
 
-import json
-from ..data import get_all_data_as_json
+from typing import Dict
+
+from ..data import DataBundle, get_data_bundle
+
+# Sheet script by data bundle digest
+_javascript: Dict[str, str] = {}
 
 
 def get_javascript_code() -> str:
-    """Generate JavaScript code with game data injected from Python."""
-    data = get_all_data_as_json()
+    """JavaScript code with game data injected from Python.
+
+    Built once per version of the tables (see ``data.tables_changed``).
+    """
+    bundle = get_data_bundle()
+    code = _javascript.get(bundle.digest)
+    if code is None:
+        code = _build_javascript(bundle)
+        # Only the current tables are ever asked for again
+        _javascript.clear()
+        _javascript[bundle.digest] = code
+    return code
+
+
+def _build_javascript(bundle: DataBundle) -> str:
+    data = bundle.json
 
     return f"""
         // Game data (single source of truth from Python - SRD 2.3)
-        const BACKGROUND_TABLE = {json.dumps(data["BACKGROUND_TABLE"])};
-        const BIRTHSIGNS = {json.dumps(data["BIRTHSIGNS"])};
-        const COAT_COLORS = {json.dumps(data["COAT_COLORS"])};
-        const COAT_PATTERNS = {json.dumps(data["COAT_PATTERNS"])};
-        const PHYSICAL_DETAILS = {json.dumps(data["PHYSICAL_DETAILS"])};
-        const FIRST_NAMES = {json.dumps(data["FIRST_NAMES"])};
-        const LAST_NAMES = {json.dumps(data["LAST_NAMES"])};
-        const WEAPONS = {json.dumps(data["WEAPONS"])};
-        const INVENTORY_ITEMS = {json.dumps(data["INVENTORY_ITEMS"])};
-        const HIRELING_LOOKS = {json.dumps(data["HIRELING_LOOKS"])};
-        const HIRELING_DISPOSITIONS = {json.dumps(data["HIRELING_DISPOSITIONS"])};
-        const HIRELING_TYPES = {json.dumps(data["HIRELING_TYPES"])};
+        const BACKGROUND_TABLE = {data["BACKGROUND_TABLE"]};
+        const BIRTHSIGNS = {data["BIRTHSIGNS"]};
+        const COAT_COLORS = {data["COAT_COLORS"]};
+        const COAT_PATTERNS = {data["COAT_PATTERNS"]};
+        const PHYSICAL_DETAILS = {data["PHYSICAL_DETAILS"]};
+        const FIRST_NAMES = {data["FIRST_NAMES"]};
+        const LAST_NAMES = {data["LAST_NAMES"]};
+        const WEAPONS = {data["WEAPONS"]};
+        const INVENTORY_ITEMS = {data["INVENTORY_ITEMS"]};
+        const HIRELING_LOOKS = {data["HIRELING_LOOKS"]};
+        const HIRELING_DISPOSITIONS = {data["HIRELING_DISPOSITIONS"]};
+        const HIRELING_TYPES = {data["HIRELING_TYPES"]};
 
         // Condition clearing requirements lookup
         const CONDITION_CLEAR = {{
@@ -33,10 +51,50 @@ def get_javascript_code() -> str:
             'Stunned': 'Clear: A moment\\'s rest in a safe place'
         }};
 
+        // Dice RNG used by every roll on the sheet. Rolls are served from a
+        // buffer of random 32-bit values, refilled a block at a time from
+        // crypto.getRandomValues (or Math.random where that is unavailable).
+        // Swap the backend with setDiceRng(), e.g. for a seeded RNG in tests.
+        function createBufferedRng(fill, blockSize = 1024) {{
+            const buffer = new Uint32Array(blockSize);
+            let index = blockSize;
+            return {{
+                random() {{
+                    if (index >= blockSize) {{
+                        fill(buffer);
+                        index = 0;
+                    }}
+                    return buffer[index++] / 4294967296;
+                }},
+                int(sides) {{
+                    return Math.floor(this.random() * sides) + 1;
+                }},
+                choice(array) {{
+                    return array[Math.floor(this.random() * array.length)];
+                }}
+            }};
+        }}
+
+        function fillWithMathRandom(buffer) {{
+            for (let i = 0; i < buffer.length; i++) {{
+                buffer[i] = Math.floor(Math.random() * 4294967296);
+            }}
+        }}
+
+        let diceRng = createBufferedRng(
+            (typeof crypto !== 'undefined' && crypto.getRandomValues)
+                ? (buffer) => crypto.getRandomValues(buffer)
+                : fillWithMathRandom
+        );
+
+        function setDiceRng(rng) {{
+            diceRng = rng;
+        }}
+
         function rollDiceSum(numDice, sides) {{
             let total = 0;
             for (let i = 0; i < numDice; i++) {{
-                total += Math.floor(Math.random() * sides) + 1;
+                total += diceRng.int(sides);
             }}
             return total;
         }}
@@ -44,17 +102,13 @@ def get_javascript_code() -> str:
         function rollAttribute() {{
             // Roll 3d6 and keep the two highest dice (per SRD 2.3)
             // Returns a value between 2-12
-            const rolls = [
-                Math.floor(Math.random() * 6) + 1,
-                Math.floor(Math.random() * 6) + 1,
-                Math.floor(Math.random() * 6) + 1
-            ];
+            const rolls = [diceRng.int(6), diceRng.int(6), diceRng.int(6)];
             rolls.sort((a, b) => b - a);  // Sort descending
             return rolls[0] + rolls[1];   // Keep two highest
         }}
 
         function randomChoice(array) {{
-            return array[Math.floor(Math.random() * array.length)];
+            return diceRng.choice(array);
         }}
 
         function getBackground(hp, pips) {{
@@ -64,17 +118,16 @@ def get_javascript_code() -> str:
 
         function rollD66() {{
             // Roll d66: first d6 is tens digit, second is ones digit
-            const tens = Math.floor(Math.random() * 6) + 1;
-            const ones = Math.floor(Math.random() * 6) + 1;
+            const tens = diceRng.int(6);
+            const ones = diceRng.int(6);
             return tens * 10 + ones;
         }}
 
         function getRandomWeapon() {{
             // Get random weapon category, then random weapon from that category
             const categories = Object.keys(WEAPONS);
-            const category = categories[Math.floor(Math.random() * categories.length)];
-            const weapons = WEAPONS[category];
-            const weapon = weapons[Math.floor(Math.random() * weapons.length)];
+            const category = diceRng.choice(categories);
+            const weapon = diceRng.choice(WEAPONS[category]);
             // Format: "Name (Category, Damage)"
             return weapon[0] + ' (' + category.charAt(0).toUpperCase() + category.slice(1) + ', ' + weapon[1] + ')';
         }}
@@ -89,8 +142,8 @@ def get_javascript_code() -> str:
             const wil = rollAttribute();
 
             // Roll HP and Pips
-            const hp = Math.floor(Math.random() * 6) + 1;
-            const pips = Math.floor(Math.random() * 6) + 1;
+            const hp = diceRng.int(6);
+            const pips = diceRng.int(6);
 
             // Get background
             const [background, itemA, itemB] = getBackground(hp, pips);
@@ -100,8 +153,8 @@ def get_javascript_code() -> str:
             const equipment = ["Torches", "Rations", getRandomWeapon(), itemA, itemB];
 
             if (highestAttr <= 9) {{
-                const addHp = Math.floor(Math.random() * 6) + 1;
-                const addPips = Math.floor(Math.random() * 6) + 1;
+                const addHp = diceRng.int(6);
+                const addPips = diceRng.int(6);
                 const [addBg, addItemA, addItemB] = getBackground(addHp, addPips);
                 equipment.push(addItemA);
                 if (highestAttr <= 7) {{
@@ -381,7 +434,7 @@ def get_javascript_code() -> str:
         }}
 
         function rollDie(sides) {{
-            return Math.floor(Math.random() * sides) + 1;
+            return diceRng.int(sides);
         }}
 
         function rollDice() {{
@@ -443,6 +496,20 @@ def get_javascript_code() -> str:
         // Save roll state
         let currentSaveRoll = null;
 
+        // Exact odds come from the server's probability API, so they are
+        // only shown when the sheet is served by the GM server
+        function fetchOdds(path, onResult) {{
+            if (typeof API_TOKEN === 'undefined') return;
+            fetch(path)
+                .then(response => response.ok ? response.json() : null)
+                .then(data => {{ if (data) onResult(data); }})
+                .catch(() => {{}});
+        }}
+
+        function formatChance(chance) {{
+            return (chance * 100).toFixed(1).replace(/\\.0$/, '') + '%';
+        }}
+
         function showDiceSummary(results, diceData) {{
             const total = results.reduce((a, b) => a + b, 0) + diceData.modifier;
             const diceContent = document.getElementById('diceContent');
@@ -504,6 +571,17 @@ def get_javascript_code() -> str:
 
             summary.innerHTML = summaryText;
             resultsDiv.appendChild(summary);
+
+            if (!currentSaveRoll) {{
+                const modifier = diceData.modifier ? (diceData.modifier > 0 ? '+' : '') + diceData.modifier : '';
+                const notation = diceData.count + 'd' + diceData.sides + modifier;
+                fetchOdds('/api/odds?dice=' + encodeURIComponent(notation) + '&at_least=' + total, data => {{
+                    const odds = document.createElement('span');
+                    odds.className = 'dice-odds';
+                    odds.textContent = ' (' + formatChance(data.at_least.chance) + ' to roll this or higher)';
+                    summary.appendChild(odds);
+                }});
+            }}
         }}
 
         function clearSaveState() {{
@@ -563,6 +641,14 @@ def get_javascript_code() -> str:
                 saveStatName.textContent = stat + ' Save';
                 saveTarget.textContent = 'Target: ≤' + targetValue;
                 saveResultsRow.style.display = 'flex';
+
+                const saveRoll = currentSaveRoll;
+                fetchOdds('/api/odds/save?score=' + targetValue + '&mode=' + (modifier || 'normal'), data => {{
+                    // Ignore answers for a save that has since been replaced
+                    if (currentSaveRoll === saveRoll) {{
+                        saveTarget.textContent = 'Target: ≤' + targetValue + ' (' + formatChance(data.chance) + ' chance)';
+                    }}
+                }});
             }}
 
             // Clear both results areas (dice graphics will show in diceResults, summary in saveRollResults)
@@ -1218,7 +1304,7 @@ def get_javascript_code() -> str:
         function generateHirelingStats() {{
             // Per SRD 2.3: d6 hp, STR 2d6, DEX 2d6, WIL 2d6
             return {{
-                hp: Math.floor(Math.random() * 6) + 1,
+                hp: diceRng.int(6),
                 str: rollDiceSum(2, 6),
                 dex: rollDiceSum(2, 6),
                 wil: rollDiceSum(2, 6),
@@ -1815,3 +1901,986 @@ def get_javascript_code() -> str:
             }}
         }});
 """
+
+
+# Applies live update events (see mausritter.server.events) to a character.
+# Shared by the server's character sheet and the GM dashboard.
+LIVE_UPDATE_JS = """
+        function isPlainObject(value) {
+            return value !== null && typeof value === 'object' && !Array.isArray(value);
+        }
+
+        function mergeUpdate(target, updates) {
+            // Same rules as the server: nested objects merge, anything else replaces
+            const result = Object.assign({}, target);
+            for (const [key, value] of Object.entries(updates)) {
+                if (key === 'id' || key === 'player_token' || key === 'version') continue;
+                result[key] = isPlainObject(value) && isPlainObject(result[key])
+                    ? mergeUpdate(result[key], value) : value;
+            }
+            return result;
+        }
+
+        function applyJsonPatch(doc, ops) {
+            // The server has already validated the patch; throws if doc is out of step
+            doc = JSON.parse(JSON.stringify(doc));
+            const locate = pointer => {
+                const keys = pointer.split('/').slice(1)
+                    .map(key => key.replace(/~1/g, '/').replace(/~0/g, '~'));
+                const last = keys.pop();
+                return [keys.reduce((node, key) => node[key], doc), last];
+            };
+            const take = pointer => {
+                const [parent, key] = locate(pointer);
+                if (Array.isArray(parent)) return parent.splice(Number(key), 1)[0];
+                const value = parent[key];
+                delete parent[key];
+                return value;
+            };
+            const put = (pointer, value) => {
+                const [parent, key] = locate(pointer);
+                if (Array.isArray(parent)) {
+                    parent.splice(key === '-' ? parent.length : Number(key), 0, value);
+                } else {
+                    parent[key] = value;
+                }
+            };
+            for (const op of ops) {
+                if (op.op === 'add') put(op.path, op.value);
+                else if (op.op === 'remove') take(op.path);
+                else if (op.op === 'replace') { take(op.path); put(op.path, op.value); }
+                else if (op.op === 'move') put(op.path, take(op.from));
+                else if (op.op === 'copy') {
+                    const [parent, key] = locate(op.from);
+                    put(op.path, JSON.parse(JSON.stringify(parent[key])));
+                }
+            }
+            return doc;
+        }
+
+        function applyCharacterEvent(character, event) {
+            // A character event carries the whole character, a merge update or a
+            // patch, plus the character's new version
+            if (event.character) return event.character;
+            let result = character;
+            if (event.update) result = mergeUpdate(character, event.update);
+            else if (event.patch) result = applyJsonPatch(character, event.patch);
+            if (event.character_version === undefined) return result;
+            return Object.assign({}, result, {version: event.character_version});
+        }
+"""
+
+
+# Server connectivity for sheets served by the GM server: auto-save, live
+# updates and WebSocket sync. The same for every sheet; the page defines
+# API_TOKEN, CHARACTER_ID, the STORED_* values, EVENTS_SINCE and
+# INITIAL_CHARACTER before loading it.
+SHEET_SYNC_JS = """
+        function debounce(func, wait) {
+            let timeout;
+            return function(...args) {
+                clearTimeout(timeout);
+                timeout = setTimeout(() => func.apply(this, args), wait);
+            };
+        }
+
+        function getStatFromRow(statName) {
+            // Find the attribute row by looking for the span with the stat name
+            const rows = document.querySelectorAll('.attribute-row');
+            for (const row of rows) {
+                const label = row.querySelector('.attribute-label');
+                if (label && label.textContent.trim() === statName) {
+                    const inputs = row.querySelectorAll('input[type="number"]');
+                    if (inputs.length >= 2) {
+                        return {
+                            max: parseInt(inputs[0].value) || 0,
+                            current: parseInt(inputs[1].value) || 0
+                        };
+                    }
+                }
+            }
+            return { max: 0, current: 0 };
+        }
+
+        function getHpValues() {
+            const hpRow = document.querySelector('.hp-row');
+            if (hpRow) {
+                const inputs = hpRow.querySelectorAll('input[type="number"]');
+                if (inputs.length >= 2) {
+                    return {
+                        max: parseInt(inputs[0].value) || 0,
+                        current: parseInt(inputs[1].value) || 0
+                    };
+                }
+            }
+            return { max: 0, current: 0 };
+        }
+
+        function getInventory() {
+            const inventory = {
+                main_paw: '',
+                off_paw: '',
+                body: ['', ''],
+                pack: ['', '', '', '', '', '']
+            };
+
+            // Paw slots - first two .paw-slot elements
+            const pawSlots = document.querySelectorAll('.paw-slot .slot-content textarea');
+            if (pawSlots[0]) inventory.main_paw = pawSlots[0].value || '';
+            if (pawSlots[1]) inventory.off_paw = pawSlots[1].value || '';
+
+            // Body slots
+            const bodySlots = document.querySelectorAll('.body-slot .slot-content textarea');
+            bodySlots.forEach((textarea, i) => {
+                if (i < 2) inventory.body[i] = textarea.value || '';
+            });
+
+            // Pack slots
+            const packSlots = document.querySelectorAll('.pack-slot .slot-content textarea');
+            packSlots.forEach((textarea, i) => {
+                if (i < 6) inventory.pack[i] = textarea.value || '';
+            });
+
+            return inventory;
+        }
+
+        function getHirelings() {
+            const hirelings = [];
+            const hirelingCards = document.querySelectorAll('.hireling-card');
+
+            hirelingCards.forEach(card => {
+                // Get type from title text
+                const typeText = card.querySelector('.hireling-title-text')?.textContent || 'Hireling';
+
+                // Get look and disposition from the info row fields
+                const fields = card.querySelectorAll('.hireling-field');
+                let look = '';
+                let disposition = '';
+                fields.forEach(field => {
+                    const label = field.querySelector('.hireling-field-label')?.textContent?.trim();
+                    const input = field.querySelector('input');
+                    if (label === 'Look' && input) look = input.value || '';
+                    if (label === 'Disposition' && input) disposition = input.value || '';
+                });
+
+                const hireling = {
+                    type: typeText,
+                    look: look,
+                    disposition: disposition,
+                    attributes: {},
+                    hp: { max: 1, current: 1 },
+                    inventory: {
+                        paws: ['', ''],
+                        pack: ['', '', '', '']
+                    },
+                    usage: {
+                        paws: [[false, false, false], [false, false, false]],
+                        pack: [[false, false, false], [false, false, false], [false, false, false], [false, false, false]]
+                    }
+                };
+
+                // Get hireling stats from .hireling-stat-row elements
+                const statRows = card.querySelectorAll('.hireling-stat-row');
+                statRows.forEach(row => {
+                    const label = row.querySelector('.hireling-stat-label')?.textContent?.trim();
+                    const inputs = row.querySelectorAll('input[type="number"]');
+                    if (label && inputs.length >= 2) {
+                        if (label === 'HP') {
+                            hireling.hp = {
+                                max: parseInt(inputs[0].value) || 1,
+                                current: parseInt(inputs[1].value) || 1
+                            };
+                        } else {
+                            hireling.attributes[label] = {
+                                max: parseInt(inputs[0].value) || 0,
+                                current: parseInt(inputs[1].value) || 0
+                            };
+                        }
+                    }
+                });
+
+                // Get hireling inventory - paw slots
+                const pawSlots = card.querySelectorAll('.hireling-inventory-slot[data-slot-type="paw"]');
+                pawSlots.forEach((slot, i) => {
+                    if (i < 2) {
+                        const textarea = slot.querySelector('.hireling-slot-content textarea');
+                        hireling.inventory.paws[i] = textarea?.value || '';
+                        // Get usage markers
+                        const markers = slot.querySelectorAll('.usage-marker');
+                        markers.forEach((marker, mi) => {
+                            if (mi < 3) {
+                                hireling.usage.paws[i][mi] = marker.classList.contains('used') ? 'used' :
+                                                            (marker.classList.contains('half-used') ? 'half' : false);
+                            }
+                        });
+                    }
+                });
+
+                // Get hireling inventory - pack slots
+                const packSlots = card.querySelectorAll('.hireling-inventory-slot[data-slot-type="pack"]');
+                packSlots.forEach((slot, i) => {
+                    if (i < 4) {
+                        const textarea = slot.querySelector('.hireling-slot-content textarea');
+                        hireling.inventory.pack[i] = textarea?.value || '';
+                        // Get usage markers
+                        const markers = slot.querySelectorAll('.usage-marker');
+                        markers.forEach((marker, mi) => {
+                            if (mi < 3) {
+                                hireling.usage.pack[i][mi] = marker.classList.contains('used') ? 'used' :
+                                                            (marker.classList.contains('half-used') ? 'half' : false);
+                            }
+                        });
+                    }
+                });
+
+                hirelings.push(hireling);
+            });
+
+            return hirelings;
+        }
+
+        function getConditions() {
+            const conditions = [];
+            document.querySelectorAll('.ignored-condition-row').forEach(row => {
+                const conditionName = row.dataset.condition || row.querySelector('.ignored-condition-name')?.textContent;
+                if (conditionName) {
+                    conditions.push(conditionName);
+                }
+            });
+            return conditions;
+        }
+
+        function getSlotState(slot) {
+            // Capture all relevant state from a slot
+            const markers = slot.querySelectorAll('.usage-marker');
+            const markerStates = [];
+            markers.forEach((marker, mi) => {
+                if (mi < 3) {
+                    markerStates.push(marker.classList.contains('used') ? 'used' :
+                                     (marker.classList.contains('half-used') ? 'half' : false));
+                }
+            });
+
+            return {
+                markers: markerStates,
+                twoSlotItem: slot.classList.contains('two-slot-item'),
+                twoSlotSecondary: slot.classList.contains('two-slot-secondary'),
+                conditionSlot: slot.classList.contains('condition-slot'),
+                depleted: slot.classList.contains('depleted'),
+                lightArmourSlot: slot.classList.contains('light-armour-slot')
+            };
+        }
+
+        function getInventoryUsage() {
+            const usage = {
+                main_paw: { markers: [false, false, false] },
+                off_paw: { markers: [false, false, false] },
+                body: [{ markers: [false, false, false] }, { markers: [false, false, false] }],
+                pack: [{ markers: [false, false, false] }, { markers: [false, false, false] },
+                       { markers: [false, false, false] }, { markers: [false, false, false] },
+                       { markers: [false, false, false] }, { markers: [false, false, false] }]
+            };
+
+            // Paw slots
+            const pawSlots = document.querySelectorAll('.paw-slot');
+            pawSlots.forEach((slot, slotIdx) => {
+                const key = slotIdx === 0 ? 'main_paw' : 'off_paw';
+                usage[key] = getSlotState(slot);
+            });
+
+            // Body slots
+            const bodySlots = document.querySelectorAll('.body-slot');
+            bodySlots.forEach((slot, slotIdx) => {
+                if (slotIdx < 2) {
+                    usage.body[slotIdx] = getSlotState(slot);
+                }
+            });
+
+            // Pack slots
+            const packSlots = document.querySelectorAll('.pack-slot');
+            packSlots.forEach((slot, slotIdx) => {
+                if (slotIdx < 6) {
+                    usage.pack[slotIdx] = getSlotState(slot);
+                }
+            });
+
+            return usage;
+        }
+
+        function collectCharacterData() {
+            // Get max grit from data attribute
+            const gritInput = document.querySelector('.grit-input');
+            const maxGrit = parseInt(gritInput?.dataset?.maxGrit) || 0;
+
+            // Collect current character state from DOM
+            const data = {
+                name: document.querySelector('.name-input')?.value || '',
+                background: document.querySelector('.background-input')?.value || '',
+                attributes: {
+                    STR: getStatFromRow('STR'),
+                    DEX: getStatFromRow('DEX'),
+                    WIL: getStatFromRow('WIL')
+                },
+                hp: getHpValues(),
+                pips: parseInt(document.querySelector('.pips-input')?.value) || 0,
+                grit: parseInt(gritInput?.value) || 0,
+                max_grit: maxGrit,
+                level: parseInt(document.querySelector('.level-row input')?.value) || 1,
+                xp: parseInt(document.querySelector('.xp-row input')?.value) || 0,
+                inventory: getInventory(),
+                inventory_usage: getInventoryUsage(),
+                conditions: getConditions(),
+                hirelings: getHirelings()
+            };
+
+            // Get appearance fields
+            const appearanceInputs = document.querySelectorAll('.appearance-row input');
+            if (appearanceInputs.length >= 3) {
+                data.appearance = {
+                    birthsign: appearanceInputs[0]?.value || '',
+                    coat: appearanceInputs[1]?.value || '',
+                    look: appearanceInputs[2]?.value || ''
+                };
+            }
+
+            // Get banked items
+            const bankedTextarea = document.querySelector('.banked-box textarea');
+            if (bankedTextarea) {
+                data.banked = {
+                    items: bankedTextarea.value || '',
+                    pips: 0
+                };
+            }
+
+            // Get notes/portrait
+            const portraitTextarea = document.querySelector('.portrait-input');
+            if (portraitTextarea) {
+                data.notes = portraitTextarea.value || '';
+            }
+
+            return data;
+        }
+
+        function escapePointer(key) {
+            return String(key).replace(/~/g, '~0').replace(/\\//g, '~1');
+        }
+
+        function diffPatch(before, after, path = '', ops = []) {
+            // JSON Patch (RFC 6902) turning before into after. Objects and
+            // same-length arrays are compared member by member, so an edit
+            // yields only the paths that changed.
+            const isObject = v => v !== null && typeof v === 'object';
+            if (isObject(before) && isObject(after) &&
+                Array.isArray(before) === Array.isArray(after) &&
+                (!Array.isArray(after) || before.length === after.length)) {
+                for (const key of Object.keys(before)) {
+                    if (!(key in after)) ops.push({ op: 'remove', path: `${path}/${escapePointer(key)}` });
+                }
+                for (const key of Object.keys(after)) {
+                    const childPath = `${path}/${escapePointer(key)}`;
+                    if (key in before) {
+                        diffPatch(before[key], after[key], childPath, ops);
+                    } else {
+                        ops.push({ op: 'add', path: childPath, value: after[key] });
+                    }
+                }
+            } else if (JSON.stringify(before) !== JSON.stringify(after)) {
+                ops.push({ op: 'replace', path: path, value: after });
+            }
+            return ops;
+        }
+
+        // Sheet as last acknowledged by the server; null sends the whole sheet
+        let lastSaved = null;
+        // Sheet being sent right now
+        let savingData = null;
+
+        async function saveToServer() {
+            if (!CHARACTER_ID) return;
+
+            const data = collectCharacterData();
+            const ops = lastSaved ? diffPatch(lastSaved, data) : null;
+            if (ops && ops.length === 0) return;
+
+            savingData = data;
+            try {
+                const result = await sendChanges(ops, data);
+                if (result.ok) {
+                    lastSaved = data;
+                    await acknowledge(ops, data, result.version);
+                    showSaveIndicator();
+                } else if (result.version !== undefined && await catchUp(result)) {
+                    // Someone else changed the character first. Their values
+                    // win where we both edited; send the rest of ours again
+                    debouncedSave();
+                } else {
+                    // Resync with a full save next time
+                    lastSaved = null;
+                }
+            } catch (e) {
+                console.error('Failed to save:', e);
+                lastSaved = null;
+            } finally {
+                savingData = null;
+            }
+        }
+
+        async function sendChanges(ops, data) {
+            // Over the sync socket when it's open, otherwise a REST round trip.
+            // Edits only apply to the version of the character we last saw.
+            // Resolves to {ok, version}; a version conflict instead has the
+            // current version and the delta (or character) to catch up with
+            const version = serverCharacter.version ?? 0;
+            if (syncSocket && syncSocket.readyState === WebSocket.OPEN) {
+                const frame = ops ? { patch: ops } : { update: data };
+                return sendOverSocket({ ...frame, if_match: version });
+            }
+            const response = await fetch(`/api/characters/${CHARACTER_ID}?token=${API_TOKEN}`, {
+                method: 'PATCH',
+                headers: {
+                    'Content-Type': ops ? 'application/json-patch+json' : 'application/json',
+                    'If-Match': `"${version}"`
+                },
+                body: JSON.stringify(ops || data)
+            });
+            const reply = await response.json().catch(() => ({}));
+            if (response.ok) {
+                return { ok: true, version: reply.version ?? reply.character?.version };
+            }
+            console.error('Save failed:', reply.error);
+            return response.status === 409 ? reply : { ok: false };
+        }
+
+        async function fetchCharacter() {
+            // The server's copy, for when serverCharacter is out of step
+            const response = await fetch(`/api/characters/${CHARACTER_ID}?token=${API_TOKEN}`);
+            return response.ok ? response.json() : null;
+        }
+
+        async function acknowledge(ops, data, version) {
+            // Fold a saved edit into serverCharacter, unless its live update got here first
+            if (version === undefined || version <= (serverCharacter.version ?? 0)) return;
+            try {
+                const saved = ops ? applyJsonPatch(serverCharacter, ops) : mergeUpdate(serverCharacter, data);
+                serverCharacter = Object.assign({}, saved, { version });
+            } catch (e) {
+                serverCharacter = await fetchCharacter() || serverCharacter;
+            }
+        }
+
+        async function catchUp(conflict) {
+            // Apply what changed since the version our edit was based on
+            const before = serverCharacter;
+            let current = conflict.character;
+            if (conflict.delta) {
+                try {
+                    current = applyJsonPatch(serverCharacter, conflict.delta);
+                } catch (e) {
+                    current = await fetchCharacter();
+                }
+            }
+            if (!current) return false;
+            serverCharacter = current;
+            refreshSheet(before, serverCharacter);
+            return true;
+        }
+
+        // Live updates: the character as the server last sent it, kept
+        // current by live update events so changes made elsewhere (usually
+        // by the GM) show up without a reload
+        let serverCharacter = INITIAL_CHARACTER;
+""" + LIVE_UPDATE_JS + """
+        function sheetInputs() {
+            // Inputs that follow changes made elsewhere, by path into the character
+            const inputs = {
+                'name': document.querySelector('.name-input'),
+                'background': document.querySelector('.background-input'),
+                'pips': document.querySelector('.pips-input'),
+                'grit': document.querySelector('.grit-input'),
+                'level': document.querySelector('.level-row input'),
+                'xp': document.querySelector('.xp-row input')
+            };
+            document.querySelectorAll('.attribute-row').forEach(row => {
+                const stat = row.querySelector('.attribute-label')?.textContent.trim();
+                const values = row.querySelectorAll('input[type="number"]');
+                if (stat && values.length >= 2) {
+                    inputs[`attributes/${stat}/max`] = values[0];
+                    inputs[`attributes/${stat}/current`] = values[1];
+                }
+            });
+            const hp = document.querySelectorAll('.hp-row input[type="number"]');
+            if (hp.length >= 2) {
+                inputs['hp/max'] = hp[0];
+                inputs['hp/current'] = hp[1];
+            }
+            return inputs;
+        }
+
+        function valueAt(obj, path) {
+            return path.split('/').reduce((value, key) => value == null ? undefined : value[key], obj);
+        }
+
+        function setValueAt(obj, path, value) {
+            const keys = path.split('/');
+            const last = keys.pop();
+            let node = obj;
+            for (const key of keys) {
+                if (!isPlainObject(node[key])) node[key] = {};
+                node = node[key];
+            }
+            node[last] = value;
+        }
+
+        function refreshSheet(before, after) {
+            // Only touch fields this change made, so unsaved edits elsewhere survive
+            for (const [path, input] of Object.entries(sheetInputs())) {
+                const value = valueAt(after, path);
+                if (!input || value === undefined || value === valueAt(before, path)) continue;
+                // Our own save coming back; the input may have moved on since
+                if ([savingData, lastSaved].some(sent => sent && valueAt(sent, path) === value)) continue;
+                input.value = value;
+                // Already on the server, so the next save needn't send it
+                if (lastSaved) setValueAt(lastSaved, path, value);
+            }
+            const conditions = after.conditions || [];
+            if (JSON.stringify(before.conditions) !== JSON.stringify(conditions) &&
+                JSON.stringify(getConditions()) !== JSON.stringify(conditions)) {
+                document.querySelectorAll('.ignored-condition-row').forEach(row => row.remove());
+                restoreConditions(conditions, after.max_grit);
+                if (lastSaved) lastSaved.conditions = getConditions();
+            }
+        }
+
+        async function onCharacterEvent(event) {
+            if (event.id !== CHARACTER_ID) return;
+            if (event.deleted) {
+                reloadSheet();
+                return;
+            }
+            // Already folded in by a save's ack or a conflict's delta
+            if (event.character_version <= (serverCharacter.version ?? 0)) return;
+            const before = serverCharacter;
+            try {
+                serverCharacter = applyCharacterEvent(serverCharacter, event);
+            } catch (e) {
+                // Out of step with the server: take its copy of the character
+                const current = await fetchCharacter();
+                if (!current) return;
+                serverCharacter = current;
+            }
+            refreshSheet(before, serverCharacter);
+        }
+
+        // Transports: the sync socket carries edits, acks and live updates on
+        // one connection. While it's down, saves use REST and live updates
+        // come from the event stream.
+        const SYNC_RETRY = 5000;
+        let syncSocket = null;
+        let eventSource = null;
+        let reloading = false;
+        let nextSeq = 1;
+        const pendingAcks = new Map();
+        // Newest event applied, so switching transports never applies one twice
+        let lastEventVersion = EVENTS_SINCE === '' ? null : Number(EVENTS_SINCE);
+
+        function handleEvent(type, event) {
+            if (lastEventVersion !== null && event.version <= lastEventVersion) return;
+            lastEventVersion = event.version;
+            if (type === 'character') {
+                onCharacterEvent(event);
+            } else if (type === 'reset' || type === 'resync') {
+                // The session was replaced, or we fell too far behind to catch up
+                reloadSheet();
+            }
+        }
+
+        function reloadSheet() {
+            reloading = true;
+            if (syncSocket) syncSocket.close();
+            if (eventSource) eventSource.close();
+            location.reload();
+        }
+
+        function listenForChanges() {
+            if (syncSocket || eventSource || reloading || !window.EventSource) return;
+            const source = new EventSource(`/api/events?token=${API_TOKEN}&since=${lastEventVersion ?? ''}`);
+            eventSource = source;
+            ['character', 'reset', 'resync'].forEach(type => source.addEventListener(
+                type, message => handleEvent(type, JSON.parse(message.data))
+            ));
+            source.onopen = stopPolling;
+            source.onerror = () => {
+                // Dropped connections reconnect by themselves; a refusal (the
+                // server has no stream to spare) closes the source for good
+                if (source.readyState !== EventSource.CLOSED) return;
+                if (eventSource === source) eventSource = null;
+                pollForChanges();
+                setTimeout(listenForChanges, STREAM_RETRY);
+            };
+        }
+
+        // Without a stream, poll the character. The browser revalidates its
+        // copy with the ETag, so an unchanged character is a bodiless 304.
+        const POLL_INTERVAL = 5000;
+        const STREAM_RETRY = 60000;
+        let pollTimer = null;
+
+        function pollForChanges() {
+            if (pollTimer) return;
+            pollTimer = setInterval(async () => {
+                const current = await fetchCharacter();
+                if (!current || (current.version ?? 0) <= (serverCharacter.version ?? 0)) return;
+                const before = serverCharacter;
+                serverCharacter = current;
+                refreshSheet(before, serverCharacter);
+            }, POLL_INTERVAL);
+        }
+
+        function stopPolling() {
+            clearInterval(pollTimer);
+            pollTimer = null;
+        }
+
+        function sendOverSocket(frame) {
+            // Resolves like sendChanges when the server acks or refuses the edit
+            return new Promise(resolve => {
+                const seq = nextSeq++;
+                pendingAcks.set(seq, resolve);
+                syncSocket.send(JSON.stringify({ seq, ...frame }));
+            });
+        }
+
+        function onSyncMessage(message) {
+            const frame = JSON.parse(message.data);
+            if (frame.event) {
+                handleEvent(frame.event, frame);
+                return;
+            }
+            const seq = frame.ack ?? frame.nack;
+            const resolve = pendingAcks.get(seq);
+            if (!resolve) return;
+            pendingAcks.delete(seq);
+            if (frame.ack !== undefined) {
+                resolve({ ok: true, version: frame.character_version });
+                return;
+            }
+            console.error('Save failed:', frame.error);
+            resolve(frame.status === 409 && frame.character_version !== undefined
+                ? { version: frame.character_version, delta: frame.delta, character: frame.character }
+                : { ok: false });
+        }
+
+        function connectSync() {
+            if (!window.WebSocket) {
+                listenForChanges();
+                return;
+            }
+            const scheme = location.protocol === 'https:' ? 'wss' : 'ws';
+            const socket = new WebSocket(
+                `${scheme}://${location.host}/api/sync?token=${API_TOKEN}` +
+                `&character=${CHARACTER_ID}&since=${lastEventVersion ?? ''}`
+            );
+            let opened = false;
+            socket.onopen = () => {
+                opened = true;
+                syncSocket = socket;
+                stopPolling();
+                if (eventSource) {
+                    eventSource.close();
+                    eventSource = null;
+                }
+            };
+            socket.onmessage = onSyncMessage;
+            socket.onclose = () => {
+                if (syncSocket === socket) syncSocket = null;
+                pendingAcks.forEach(resolve => resolve({ ok: false }));
+                pendingAcks.clear();
+                if (reloading) return;
+                listenForChanges();
+                // A server without WebSocket support never opens one; don't keep asking
+                if (opened) setTimeout(connectSync, SYNC_RETRY);
+            };
+        }
+
+        const debouncedSave = debounce(saveToServer, 1000);
+
+        // Restoration functions for loading saved state
+        function restoreSlotState(slot, slotState) {
+            if (!slotState) return;
+
+            // Handle both old format (array) and new format (object with markers)
+            const markerStates = slotState.markers || slotState;
+            if (Array.isArray(markerStates)) {
+                const markers = slot.querySelectorAll('.usage-marker');
+                markers.forEach((marker, mi) => {
+                    if (markerStates[mi] === 'used') {
+                        marker.classList.add('used');
+                    } else if (markerStates[mi] === 'half') {
+                        marker.classList.add('half-used');
+                    }
+                });
+            }
+
+            // Restore slot classes
+            if (slotState.twoSlotItem) slot.classList.add('two-slot-item');
+            if (slotState.twoSlotSecondary) {
+                slot.classList.add('two-slot-secondary');
+                // Make textarea readonly for secondary slot
+                const textarea = slot.querySelector('.slot-content textarea');
+                if (textarea) textarea.readOnly = true;
+            }
+            if (slotState.depleted) slot.classList.add('depleted');
+            if (slotState.lightArmourSlot) slot.classList.add('light-armour-slot');
+
+            // Restore condition styling
+            if (slotState.conditionSlot) {
+                slot.classList.add('condition-slot');
+                // Get the item name from the textarea to find the clear text
+                const textarea = slot.querySelector('.slot-content textarea');
+                if (textarea) {
+                    const itemName = textarea.value.split('\\n')[0].trim();
+                    if (CONDITION_CLEAR[itemName]) {
+                        const clearDiv = document.createElement('div');
+                        clearDiv.className = 'condition-clear';
+                        clearDiv.textContent = CONDITION_CLEAR[itemName];
+                        slot.querySelector('.slot-content').appendChild(clearDiv);
+                    }
+                }
+            }
+        }
+
+        function restoreInventoryUsage(usage) {
+            if (!usage) return;
+
+            // Restore paw slots
+            const pawSlots = document.querySelectorAll('.paw-slot');
+            pawSlots.forEach((slot, slotIdx) => {
+                const key = slotIdx === 0 ? 'main_paw' : 'off_paw';
+                restoreSlotState(slot, usage[key]);
+            });
+
+            // Restore body slots
+            const bodySlots = document.querySelectorAll('.body-slot');
+            bodySlots.forEach((slot, slotIdx) => {
+                if (usage.body && usage.body[slotIdx]) {
+                    restoreSlotState(slot, usage.body[slotIdx]);
+                }
+            });
+
+            // Restore pack slots
+            const packSlots = document.querySelectorAll('.pack-slot');
+            packSlots.forEach((slot, slotIdx) => {
+                if (usage.pack && usage.pack[slotIdx]) {
+                    restoreSlotState(slot, usage.pack[slotIdx]);
+                }
+            });
+        }
+
+        function restoreConditions(conditions, maxGrit) {
+            if (!conditions || !Array.isArray(conditions)) return;
+
+            const gritInput = document.querySelector('.grit-input');
+            if (gritInput && maxGrit !== undefined) {
+                gritInput.dataset.maxGrit = maxGrit;
+            }
+
+            const conditionsList = document.querySelector('.ignored-conditions-list');
+            if (!conditionsList) return;
+
+            conditions.forEach(conditionName => {
+                const row = document.createElement('div');
+                row.className = 'ignored-condition-row';
+                row.dataset.condition = conditionName;
+
+                const removeBtn = document.createElement('button');
+                removeBtn.className = 'slot-btn clear-btn';
+                removeBtn.textContent = '-';
+                removeBtn.onclick = function() {
+                    removeIgnoredCondition(this);
+                };
+
+                const content = document.createElement('div');
+                content.className = 'ignored-condition-content';
+
+                const nameSpan = document.createElement('span');
+                nameSpan.className = 'ignored-condition-name';
+                nameSpan.textContent = conditionName;
+
+                const clearSpan = document.createElement('span');
+                clearSpan.className = 'ignored-condition-clear';
+                clearSpan.textContent = CONDITION_CLEAR[conditionName] || '';
+
+                content.appendChild(nameSpan);
+                content.appendChild(clearSpan);
+
+                row.appendChild(removeBtn);
+                row.appendChild(content);
+
+                conditionsList.appendChild(row);
+            });
+        }
+
+        function restoreHirelings(hirelings) {
+            if (!hirelings || !Array.isArray(hirelings)) return;
+
+            const container = document.getElementById('hirelingsContainer');
+            if (!container) return;
+
+            // Open the hirelings section if there are hirelings
+            if (hirelings.length > 0) {
+                const content = document.getElementById('hirelingsContent');
+                const toggle = document.getElementById('hirelingsToggle');
+                if (content && !content.classList.contains('active')) {
+                    content.classList.add('active');
+                    if (toggle) toggle.textContent = '▲';
+                }
+            }
+
+            hirelings.forEach(hireling => {
+                // Use the existing addHirelingWithType but we need to set the values after
+                hirelingCounter++;
+                const stats = {
+                    hp: hireling.hp?.max || 1,
+                    str: hireling.attributes?.STR?.max || 6,
+                    dex: hireling.attributes?.DEX?.max || 6,
+                    wil: hireling.attributes?.WIL?.max || 6,
+                    look: hireling.look || '',
+                    disposition: hireling.disposition || ''
+                };
+
+                // Get display number for this type
+                const displayNumber = document.querySelectorAll(`.hireling-card[data-hireling-type="${hireling.type}"]`).length + 1;
+                const cardHTML = createHirelingCardHTML(hirelingCounter, stats, displayNumber, hireling.type);
+
+                container.insertAdjacentHTML('beforeend', cardHTML);
+
+                const hirelingCard = document.getElementById('hireling-' + hirelingCounter);
+                if (hirelingCard) {
+                    setupHirelingStatListeners(hirelingCard);
+
+                    // Set current values (which may differ from max)
+                    const statRows = hirelingCard.querySelectorAll('.hireling-stat-row');
+                    statRows.forEach(row => {
+                        const label = row.querySelector('.hireling-stat-label')?.textContent?.trim();
+                        const inputs = row.querySelectorAll('input[type="number"]');
+                        if (inputs.length >= 2) {
+                            if (label === 'HP' && hireling.hp) {
+                                inputs[1].value = hireling.hp.current || hireling.hp.max || 1;
+                            } else if (hireling.attributes && hireling.attributes[label]) {
+                                inputs[1].value = hireling.attributes[label].current || hireling.attributes[label].max || 0;
+                            }
+                        }
+                    });
+
+                    // Restore hireling inventory
+                    if (hireling.inventory) {
+                        const pawSlots = hirelingCard.querySelectorAll('.hireling-inventory-slot[data-slot-type="paw"]');
+                        pawSlots.forEach((slot, i) => {
+                            if (hireling.inventory.paws && hireling.inventory.paws[i]) {
+                                const textarea = slot.querySelector('.hireling-slot-content textarea');
+                                if (textarea) textarea.value = hireling.inventory.paws[i];
+                            }
+                        });
+
+                        const packSlots = hirelingCard.querySelectorAll('.hireling-inventory-slot[data-slot-type="pack"]');
+                        packSlots.forEach((slot, i) => {
+                            if (hireling.inventory.pack && hireling.inventory.pack[i]) {
+                                const textarea = slot.querySelector('.hireling-slot-content textarea');
+                                if (textarea) textarea.value = hireling.inventory.pack[i];
+                            }
+                        });
+                    }
+
+                    // Restore hireling usage markers
+                    if (hireling.usage) {
+                        const pawSlots = hirelingCard.querySelectorAll('.hireling-inventory-slot[data-slot-type="paw"]');
+                        pawSlots.forEach((slot, i) => {
+                            if (hireling.usage.paws && hireling.usage.paws[i]) {
+                                const markers = slot.querySelectorAll('.usage-marker');
+                                markers.forEach((marker, mi) => {
+                                    if (hireling.usage.paws[i][mi] === 'used') {
+                                        marker.classList.add('used');
+                                    } else if (hireling.usage.paws[i][mi] === 'half') {
+                                        marker.classList.add('half-used');
+                                    }
+                                });
+                            }
+                        });
+
+                        const packSlots = hirelingCard.querySelectorAll('.hireling-inventory-slot[data-slot-type="pack"]');
+                        packSlots.forEach((slot, i) => {
+                            if (hireling.usage.pack && hireling.usage.pack[i]) {
+                                const markers = slot.querySelectorAll('.usage-marker');
+                                markers.forEach((marker, mi) => {
+                                    if (hireling.usage.pack[i][mi] === 'used') {
+                                        marker.classList.add('used');
+                                    } else if (hireling.usage.pack[i][mi] === 'half') {
+                                        marker.classList.add('half-used');
+                                    }
+                                });
+                            }
+                        });
+                    }
+                }
+            });
+        }
+
+        function showSaveIndicator() {
+            let indicator = document.getElementById('server-save-indicator');
+            if (!indicator) {
+                indicator = document.createElement('div');
+                indicator.id = 'server-save-indicator';
+                indicator.style.cssText = 'position:fixed;bottom:20px;right:20px;background:#4a7a4a;color:white;padding:10px 20px;border-radius:8px;opacity:0;transition:opacity 0.3s;z-index:9999;';
+                indicator.textContent = 'Saved!';
+                document.body.appendChild(indicator);
+            }
+            indicator.style.opacity = '1';
+            setTimeout(() => { indicator.style.opacity = '0'; }, 1500);
+        }
+
+        // Attach save listeners to all inputs and textareas
+        document.addEventListener('DOMContentLoaded', () => {
+            // Restore saved state first (before attaching listeners to avoid triggering saves)
+            restoreInventoryUsage(STORED_INVENTORY_USAGE);
+            restoreConditions(STORED_CONDITIONS, STORED_MAX_GRIT);
+            restoreHirelings(STORED_HIRELINGS);
+
+            // Later saves send only what changed since the sheet was loaded
+            lastSaved = collectCharacterData();
+            connectSync();
+
+            function attachListeners() {
+                document.querySelectorAll('input, textarea').forEach(el => {
+                    if (!el.dataset.saveListenerAttached) {
+                        el.addEventListener('change', debouncedSave);
+                        el.addEventListener('blur', debouncedSave);
+                        el.addEventListener('input', debouncedSave);
+                        el.dataset.saveListenerAttached = 'true';
+                    }
+                });
+
+                // Also listen on usage markers for click events
+                document.querySelectorAll('.usage-marker').forEach(marker => {
+                    if (!marker.dataset.saveListenerAttached) {
+                        marker.addEventListener('click', () => setTimeout(debouncedSave, 100));
+                        marker.dataset.saveListenerAttached = 'true';
+                    }
+                });
+            }
+
+            // Initial attachment
+            attachListeners();
+
+            // Watch for new elements (hirelings added dynamically)
+            const observer = new MutationObserver(() => {
+                attachListeners();
+                debouncedSave();
+            });
+
+            observer.observe(document.body, {
+                childList: true,
+                subtree: true,
+                characterData: true
+            });
+        });
+"""
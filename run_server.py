@@ -4,8 +4,10 @@ Mausritter GM Server
 Run this to start the local server for multiplayer sessions.
 """
 
+import argparse
 import socket
 import sys
+from pathlib import Path
 
 
 def get_local_ip() -> str:
@@ -22,22 +24,79 @@ def get_local_ip() -> str:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Run the Mausritter GM server.")
+    parser.add_argument(
+        "--data-dir", default="mausritter_session",
+        help="directory for the durable session logs (default: %(default)s)",
+    )
+    storage = parser.add_mutually_exclusive_group()
+    storage.add_argument(
+        "--sqlite", action="store_true",
+        help="keep every table in DATA_DIR/sessions.db instead of per-table logs",
+    )
+    storage.add_argument(
+        "--memory", action="store_true",
+        help="keep sessions in memory only; they are lost when the server stops",
+    )
+    parser.add_argument(
+        "--port", type=int, default=5001,
+        help="port to listen on (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--production", action="store_true",
+        help="serve with waitress (pip install waitress) instead of Flask's development server",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="worker processes sharing the tables; needs --sqlite, implies --production "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=None,
+        help="worker threads in production mode; open sheets' live updates use up to half "
+             "(default: 64)",
+    )
+    parser.add_argument(
+        "--connection-limit", type=int, default=None,
+        help="connections accepted at once in production mode (default: 1000)",
+    )
+    args = parser.parse_args()
+    if args.workers > 1 and not args.sqlite:
+        parser.error("--workers needs --sqlite, so the workers share their tables")
+    args.production = args.production or args.workers > 1
+
     # Import here to avoid import errors if Flask not installed
     try:
         from mausritter.server import create_app
-        from mausritter.server.session import game_session
+        from mausritter.server.session import MemorySessionStore, game_session, set_store
+        from mausritter.server.sqlite_store import SQLiteSessionStore
+        from mausritter.server import production
     except ImportError as e:
         print(f"Error: Could not import required modules: {e}")
         print("Make sure Flask is installed: pip install flask")
         sys.exit(1)
 
+    if args.production and production.create_server is None:
+        print("Error: Production mode needs waitress: pip install waitress")
+        sys.exit(1)
+
+    if args.sqlite:
+        Path(args.data_dir).mkdir(parents=True, exist_ok=True)
+        store = SQLiteSessionStore(Path(args.data_dir) / "sessions.db")
+    else:
+        store = MemorySessionStore(None if args.memory else args.data_dir)
+        store.add(game_session)
+        store.load()
+    set_store(store)
+    tables = store.list_sessions()
+
     app = create_app()
 
     # Get network info
     host = "0.0.0.0"  # Listen on all interfaces
-    port = 5001  # Using 5001 as 5000 is often used by macOS AirPlay
+    port = args.port  # 5001 by default, as 5000 is often used by macOS AirPlay
     local_ip = get_local_ip()
-    gm_token = game_session.gm_token
+    gm_token = store.default().gm_token
 
     # Print startup info
     print()
@@ -45,6 +104,10 @@ def main():
     print("          MAUSRITTER GM SERVER")
     print("=" * 60)
     print()
+    if not args.memory and any(table["characters"] for table in tables):
+        characters = sum(len(table["characters"]) for table in tables)
+        print(f"  Resumed {len(tables)} table(s) ({characters} characters) from {args.data_dir}/")
+        print()
     print(f"  GM Dashboard:  http://{local_ip}:{port}/gm?token={gm_token}")
     print()
     print(f"  Player Join:   http://{local_ip}:{port}/join")
@@ -54,11 +117,34 @@ def main():
     print("  Keep the GM Dashboard URL secret!")
     print("-" * 60)
     print()
+    if args.production:
+        threads = args.threads or production.DEFAULT_THREADS
+        if args.workers > 1:
+            print(f"  Production mode: {args.workers} worker processes, {threads} threads each")
+        else:
+            print(f"  Production mode: waitress with {threads} worker threads")
+        print()
     print("Press Ctrl+C to stop the server.")
     print()
 
     # Run the server
-    app.run(host=host, port=port, debug=False)
+    if args.production:
+        options = {}
+        if args.threads:
+            options["threads"] = args.threads
+        if args.connection_limit:
+            options["connection_limit"] = args.connection_limit
+        if args.workers > 1:
+            # Each worker opens the database itself
+            store.close()
+            production.serve_workers(store.path, host, port, args.workers, **options)
+        else:
+            production.serve(app, store, host, port, **options)
+        return
+    try:
+        app.run(host=host, port=port, debug=False)
+    finally:
+        store.close()
 
 
 if __name__ == "__main__":
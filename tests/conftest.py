@@ -0,0 +1,16 @@
+"""Shared fixtures for the test suite."""
+
+import pytest
+
+
+@pytest.fixture
+def client():
+    """Flask test client with a fresh session."""
+    pytest.importorskip("flask")
+    from mausritter.server import create_app
+    from mausritter.server.session import game_session
+
+    game_session.reset()
+    app = create_app()
+    app.config["TESTING"] = True
+    return app.test_client()
@@ -0,0 +1,349 @@
+"""Tests for the GM server REST API."""
+
+import pytest
+
+pytest.importorskip("flask")
+
+from mausritter.server.session import GameSession, game_session  # noqa: E402
+
+
+class TestOddsEndpoints:
+    """Tests for the probability endpoints."""
+
+    def test_dice_odds(self, client):
+        """Should return the exact distribution and requested tail chances."""
+        response = client.get("/api/odds?dice=2d6&at_least=12&at_most=2")
+        assert response.status_code == 200
+        data = response.get_json()
+        assert (data["min"], data["max"]) == (2, 12)
+        assert data["mean"] == 7
+        assert data["at_least"]["chance"] == pytest.approx(1 / 36)
+        assert data["at_most"]["chance"] == pytest.approx(1 / 36)
+
+    def test_invalid_notation(self, client):
+        """Bad notation should be a 400."""
+        assert client.get("/api/odds?dice=lots").status_code == 400
+
+    def test_save_odds(self, client):
+        """Should return the chance to pass a save."""
+        data = client.get("/api/odds/save?score=10&mode=advantage").get_json()
+        assert data["chance"] == pytest.approx(0.75)
+        assert client.get("/api/odds/save?score=10&mode=sideways").status_code == 400
+        assert client.get("/api/odds/save").status_code == 400
+
+    def test_character_odds(self, client):
+        """Should report attribute odds and bonus item chances."""
+        data = client.get("/api/odds/character").get_json()
+        assert data["attribute"]["min"] == 2
+        assert 0 < data["extra_items"]["two"] < data["extra_items"]["at_least_one"] < 1
+
+
+class TestCombatEndpoint:
+    """Tests for the combat simulation endpoint."""
+
+    def test_requires_gm(self, client):
+        """Players should not be able to run simulations."""
+        assert client.post("/api/combat/simulate", json={}).status_code == 401
+
+    def test_simulate_session_party(self, client):
+        """Without a party, the session's characters should fight."""
+        pytest.importorskip("numpy")
+        token = game_session.gm_token
+        client.post(f"/api/characters?token={token}")
+        response = client.post(f"/api/combat/simulate?token={token}", json={
+            "enemies": [{"name": "Rat", "hp": 3, "str": 6, "damage": "d6"}],
+            "fights": 500,
+            "seed": 1,
+        })
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["fights"] == 500
+        assert len(data["party_casualties"]["dead"]) == 2
+
+    def test_bad_request(self, client):
+        """Bad stat blocks and fight counts should be a 400."""
+        pytest.importorskip("numpy")
+        token = game_session.gm_token
+        url = f"/api/combat/simulate?token={token}"
+        assert client.post(url, json={"enemies": [{"hp": 1, "str": 1}], "fights": 0}).status_code == 400
+        assert client.post(url, json={"party": [{"hp": 1, "str": 1}], "enemies": [{"hp": 1}]}).status_code == 400
+        rat = {"hp": 3, "str": 6}
+        for body in (
+            {"party": [{"hp": 40000, "str": 6}], "enemies": [rat]},
+            {"party": [5], "enemies": [rat]},
+            {"party": [rat], "enemies": [None]},
+            {"party": [rat], "enemies": rat},
+            [rat],
+        ):
+            assert client.post(url, json=body).status_code == 400, body
+
+
+class TestMultipleTables:
+    """Tests for hosting several tables from one server."""
+
+    def test_tables_are_separate(self, client):
+        """Each table's GM token should only see its own characters."""
+        response = client.post("/api/sessions")
+        assert response.status_code == 201
+        other_token = response.get_json()["gm_token"]
+
+        client.post(f"/api/characters?token={game_session.gm_token}")
+        client.post(f"/api/characters?token={other_token}")
+        client.post(f"/api/characters?token={other_token}")
+
+        assert len(client.get(f"/api/characters?token={game_session.gm_token}").get_json()) == 1
+        assert len(client.get(f"/api/characters?token={other_token}").get_json()) == 2
+        client.delete(f"/api/session?token={other_token}")
+
+    def test_player_token_finds_table(self, client):
+        """A player's token should reach their character on any table."""
+        other_token = client.post("/api/sessions").get_json()["gm_token"]
+        character = client.post(f"/api/characters?token={other_token}").get_json()["character"]
+        player_token = character["player_token"]
+
+        response = client.get(f"/api/characters/{character['id']}?token={player_token}")
+        assert response.get_json()["name"] == character["name"]
+        assert client.get(f"/player/{player_token}").status_code == 200
+        assert client.patch(
+            f"/api/characters/{character['id']}?token={player_token}", json={"notes": "hi"}
+        ).get_json()["character"]["notes"] == "hi"
+        client.delete(f"/api/session?token={other_token}")
+
+    def test_only_host_can_shut_down(self, client):
+        """GMs of extra tables shouldn't be able to stop the server."""
+        other_token = client.post("/api/sessions").get_json()["gm_token"]
+        assert client.post(f"/api/server/shutdown?token={other_token}").status_code == 403
+        client.delete(f"/api/session?token={other_token}")
+
+
+class TestCharacterPatch:
+    """Tests for JSON Patch updates to a character."""
+
+    def _character(self, client):
+        return client.post(f"/api/characters?token={game_session.gm_token}").get_json()["character"]
+
+    def _patch(self, client, character, operations):
+        return client.patch(
+            f"/api/characters/{character['id']}?token={character['player_token']}",
+            json=operations,
+            content_type="application/json-patch+json",
+        )
+
+    def test_patch_applies(self, client):
+        """A JSON Patch should change only the paths it names."""
+        character = self._character(client)
+        response = self._patch(client, character, [
+            {"op": "replace", "path": "/notes", "value": "Owes the baker"},
+        ])
+        assert response.status_code == 200
+        saved = game_session.get_character(character["id"])
+        assert saved["notes"] == "Owes the baker"
+        assert saved["name"] == character["name"]
+
+    def test_failed_test_is_conflict(self, client):
+        """A failed test operation should be a 409 and change nothing."""
+        character = self._character(client)
+        response = self._patch(client, character, [
+            {"op": "test", "path": "/name", "value": "Somebody Else"},
+            {"op": "replace", "path": "/notes", "value": "x"},
+        ])
+        assert response.status_code == 409
+        assert game_session.get_character(character["id"])["notes"] == character["notes"]
+
+    def test_invalid_patch(self, client):
+        """Malformed patches and protected fields should be a 400."""
+        character = self._character(client)
+        assert self._patch(client, character, [{"op": "replace", "path": "/id", "value": "x"}]).status_code == 400
+        assert self._patch(client, character, [{"op": "nope", "path": "/notes"}]).status_code == 400
+        assert self._patch(client, {"id": "char_999", "player_token": game_session.gm_token}, [
+            {"op": "replace", "path": "/notes", "value": "x"},
+        ]).status_code == 404
+
+    def test_body_must_be_object_or_patch(self, client):
+        """JSON that is neither an object nor a patch should be a 400."""
+        character = self._character(client)
+        url = f"/api/characters/{character['id']}?token={character['player_token']}"
+        for body in (5, "notes", True):
+            assert client.patch(url, json=body).status_code == 400
+
+    def test_deleted_during_update(self, client, monkeypatch):
+        """A character deleted between lookup and update should be a 404."""
+        character = self._character(client)
+        url = f"/api/characters/{character['id']}?token={character['player_token']}"
+
+        def delete_first(char_id, updates, expected=None):
+            game_session.delete_character(char_id)
+            return GameSession.update_character(game_session, char_id, updates, expected)
+
+        monkeypatch.setattr(game_session, "update_character", delete_first)
+        assert client.patch(url, json={"notes": "x"}).status_code == 404
+
+    def test_if_match(self, client):
+        """Edits against a stale version should be a 409 with the changes since."""
+        character = self._character(client)
+        url = f"/api/characters/{character['id']}?token={character['player_token']}"
+        edit = [{"op": "replace", "path": "/notes", "value": "mine"}]
+        tag = f'"{game_session.epoch}-2"'
+        response = client.patch(url, json=edit, headers={"If-Match": '"1"'})
+        assert response.status_code == 200
+        assert response.headers["ETag"] == tag and response.get_json()["version"] == 2
+
+        response = client.patch(url, json={"notes": "late"}, headers={"If-Match": '"1"'})
+        assert response.status_code == 409
+        assert response.headers["ETag"] == tag
+        body = response.get_json()
+        assert body["version"] == 2
+        assert {"op": "replace", "path": "/notes", "value": "mine"} in body["delta"]
+        assert game_session.get_character(character["id"])["notes"] == "mine"
+
+        assert client.patch(url, json=edit, headers={"If-Match": "soon"}).status_code == 400
+        assert client.patch(url, json=edit, headers={"If-Match": "*"}).status_code == 200
+        assert client.patch(url, json=edit, headers={"If-Match": f'"{game_session.epoch}-3"'}).status_code == 200
+        assert client.patch(url, json=edit, headers={"If-Match": '"0ld3p0ch-4"'}).status_code == 409
+
+
+class TestConditionalGet:
+    """Read endpoints should answer unchanged resources with 304."""
+
+    def _revalidate(self, client, url):
+        first = client.get(url)
+        assert first.status_code == 200 and first.headers["ETag"]
+        again = client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        return first, again
+
+    def test_session_and_list(self, client):
+        """Session-wide reads should be tagged with the session version."""
+        for url in (f"/api/session?token={game_session.gm_token}",
+                    f"/api/characters?token={game_session.gm_token}"):
+            first, again = self._revalidate(client, url)
+            assert again.status_code == 304 and not again.data
+            assert again.headers["ETag"] == first.headers["ETag"]
+
+        etag = client.get(f"/api/session?token={game_session.gm_token}").headers["ETag"]
+        game_session.set_session_name("Changed")
+        response = client.get(
+            f"/api/session?token={game_session.gm_token}", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.get_json()["session_name"] == "Changed"
+
+    def test_character_reads(self, client):
+        """A character's reads should only change when that character does."""
+        char_id = game_session.add_character({"name": "Pip"})
+        other = game_session.add_character({"name": "Tam"})
+        token = game_session.get_character(char_id)["player_token"]
+        tag = f'"{game_session.epoch}-1"'
+        for url in (f"/api/characters/{char_id}?token={token}", f"/api/player/{token}"):
+            first, again = self._revalidate(client, url)
+            assert first.headers["ETag"] == tag
+            assert again.status_code == 304
+
+        game_session.update_character(other, {"name": "Tib"})
+        assert client.get(f"/api/player/{token}", headers={"If-None-Match": tag}).status_code == 304
+        game_session.update_character(char_id, {"name": "Pipkin"})
+        response = client.get(f"/api/player/{token}", headers={"If-None-Match": tag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] == f'"{game_session.epoch}-2"'
+
+    def test_load_changes_tags(self, client):
+        """A loaded file's characters shouldn't match tags from before the load."""
+        char_id = game_session.add_character({"name": "Pip"})
+        token = game_session.get_character(char_id)["player_token"]
+        saved = game_session.to_json()
+        before = client.get(f"/api/player/{token}").headers["ETag"]
+
+        game_session.update_character(char_id, {"name": "Pipkin"})
+        client.post(f"/api/session/load?token={game_session.gm_token}", data=saved,
+                    content_type="application/json")
+        # Same token and version as before, different content
+        response = client.get(f"/api/player/{token}", headers={"If-None-Match": before})
+        assert response.status_code == 200
+        assert response.get_json()["name"] == "Pip"
+        assert response.headers["ETag"] != before
+
+
+class TestEventStream:
+    """Tests for the live update stream."""
+
+    def _open(self, client, token, since):
+        response = client.get(f"/api/events?token={token}&since={since}")
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        return (chunk.decode() for chunk in response.response)
+
+    def test_requires_token(self, client):
+        """Unknown tokens shouldn't get a stream."""
+        assert client.get("/api/events?token=nope").status_code == 401
+
+    def test_gm_receives_changes(self, client):
+        """Changes since the page was rendered should stream in order."""
+        since = game_session.version
+        char_id = game_session.add_character({"name": "Pip", "notes": ""})
+        game_session.update_character(char_id, {"notes": "map"})
+
+        stream = self._open(client, game_session.gm_token, since)
+        assert next(stream).startswith("retry:")
+        chunk = next(stream)
+        assert chunk.count("event: character") == 2
+        assert f"id: {game_session.version}\n" in chunk
+        assert '"update":{"notes":"map"}' in chunk
+
+        # A reset ends the stream: the old token no longer belongs here
+        game_session.reset()
+        assert "event: reset" in next(stream)
+        assert next(stream, None) is None
+
+    def test_player_sees_only_own_character(self, client):
+        """Players shouldn't receive other characters or GM notes."""
+        mine = game_session.add_character({"name": "Pip"})
+        token = game_session.get_character(mine)["player_token"]
+        since = game_session.version
+        game_session.update_character("char_999", {"name": "nobody"})
+        other = game_session.add_character({"name": "Tam"})
+        game_session.set_gm_notes("the cheese is a trap")
+        game_session.update_character(mine, {"notes": "mine"})
+        game_session.delete_character(other)
+        game_session.update_session_data({"turn_count": 2})
+
+        stream = self._open(client, token, since)
+        next(stream)
+        chunk = next(stream)
+        assert "mine" in chunk and "turn_count" in chunk
+        assert "Tam" not in chunk and "cheese" not in chunk
+        assert chunk.count("event: ") == 2
+
+    def test_resume_from_last_event_id(self, client):
+        """Browsers reconnecting with Last-Event-ID should resume after it."""
+        game_session.add_character({"name": "Pip"})
+        last_seen = game_session.version
+        game_session.set_session_name("Mill Ambush")
+        response = client.get(
+            f"/api/events?token={game_session.gm_token}&since=0",
+            headers={"Last-Event-ID": str(last_seen)},
+        )
+        stream = (chunk.decode() for chunk in response.response)
+        next(stream)
+        chunk = next(stream)
+        assert chunk.count("event: ") == 1 and "Mill Ambush" in chunk
+
+    def test_streams_are_capped(self, client):
+        """Past the limit, new streams should be refused until one ends."""
+        client.application.config["MAX_EVENT_STREAMS"] = 1
+        slots = client.application.extensions["event_streams"]
+        token = game_session.gm_token
+        first = client.get(f"/api/events?token={token}")
+        assert first.status_code == 200
+
+        refused = client.get(f"/api/events?token={token}")
+        assert refused.status_code == 503
+        assert refused.headers["Retry-After"]
+        # Turned-away pages poll instead, so their saves still get through
+        char_id = game_session.add_character({"name": "Pip"})
+        assert client.patch(f"/api/characters/{char_id}?token={token}",
+                            json={"notes": "map"}).status_code == 200
+
+        first.close()
+        assert slots.open == 0
+        second = client.get(f"/api/events?token={token}")
+        assert second.status_code == 200
+        second.close()
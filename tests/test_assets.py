@@ -0,0 +1,61 @@
+"""Tests for the character sheet's cached static assets."""
+
+import re
+
+import pytest
+
+pytest.importorskip("flask")
+
+from mausritter.generator import generate_character  # noqa: E402
+from mausritter.server.session import game_session  # noqa: E402
+from mausritter.templates.assets import find_asset, sheet_assets  # noqa: E402
+from mausritter.templates.css import STYLES  # noqa: E402
+from mausritter.templates.html_template import generate_character_sheet_html  # noqa: E402
+
+
+def _asset_urls(html):
+    return re.findall(r'(?:href|src)="(/assets/[^"]+)"', html)
+
+
+class TestSheetAssets:
+    """Served sheets should link shared assets instead of inlining them."""
+
+    def test_names_follow_content(self):
+        """Asset names should carry a hash of their content."""
+        assets = sheet_assets()
+        assert set(assets) == {"sheet.css", "sheet.js", "sheet-sync.js"}
+        css = assets["sheet.css"]
+        assert re.fullmatch(r"sheet\.[0-9a-f]{12}\.css", css.filename)
+        assert css.content == STYLES.encode("utf-8")
+        assert find_asset(css.filename) is css
+        assert find_asset("sheet.000000000000.css") is None
+
+    def test_page_links_assets(self, client):
+        """A player's page should only carry its own markup and settings."""
+        char_id = game_session.add_character(generate_character())
+        token = game_session.get_character(char_id)["player_token"]
+        page = client.get(f"/player/{token}").get_data(as_text=True)
+        urls = _asset_urls(page)
+        assert len(urls) == 3
+        assert STYLES not in page and "function debounce" not in page
+        assert f"const CHARACTER_ID = '{char_id}'" in page
+
+        assets = sum(len(client.get(url).data) for url in urls)
+        assert len(page) < 0.1 * (len(page) + assets)
+
+    def test_long_lived_cache(self, client):
+        """Assets should be cacheable for a year and revalidate to 304."""
+        url = _asset_urls(generate_character_sheet_html(
+            generate_character(), server_mode=True, token="abc"
+        ))[0]
+        response = client.get(url)
+        assert response.status_code == 200
+        assert "immutable" in response.headers["Cache-Control"]
+        assert client.get(url, headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+        assert client.get("/assets/sheet.000000000000.css").status_code == 404
+
+    def test_standalone_sheet_is_self_contained(self):
+        """Sheets saved to a file should still inline everything."""
+        html = generate_character_sheet_html(generate_character())
+        assert STYLES in html
+        assert not _asset_urls(html)
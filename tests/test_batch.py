@@ -0,0 +1,128 @@
+"""Unit tests for batch character generation."""
+
+from collections import Counter
+
+import pytest
+
+from mausritter import batch
+from mausritter.batch import generate_characters
+from mausritter.data import (
+    BACKGROUND_TABLE, BIRTHSIGNS, COAT_COLORS, COAT_PATTERNS, FIRST_NAMES, LAST_NAMES, WEAPONS,
+)
+from mausritter.generator import WEAPON_CATEGORIES, assemble_character, generate_character
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    """Run each test against NumPy (if installed) and the pure-Python fallback."""
+    if request.param == "numpy":
+        if batch.np is None:
+            pytest.skip("NumPy not installed")
+    else:
+        monkeypatch.setattr(batch, "np", None)
+    return request.param
+
+
+def _assemble_row(attrs, hp, pips, add_hp, add_pips, birthsign, coat_color, coat_pattern,
+                  detail_roll, first_name, last_name, category_idx, weapon_idx):
+    """assemble_character for one row of a batch's columns; the reference for CharacterBatch."""
+    category = WEAPON_CATEGORIES[category_idx]
+    return assemble_character(
+        dict(zip(("STR", "DEX", "WIL"), attrs)), hp, pips, (add_hp, add_pips),
+        BIRTHSIGNS[birthsign], COAT_COLORS[coat_color], COAT_PATTERNS[coat_pattern],
+        detail_roll, FIRST_NAMES[first_name], LAST_NAMES[last_name], category,
+        WEAPONS[category][weapon_idx],
+    )
+
+
+class TestGenerateCharacters:
+    """Tests for the generate_characters function."""
+
+    def test_length(self, backend):
+        """Batch should contain exactly n characters."""
+        assert len(generate_characters(250, seed=1)) == 250
+        assert len(generate_characters(0, seed=1)) == 0
+
+    def test_negative_count_rejected(self, backend):
+        """A negative count is an error."""
+        with pytest.raises(ValueError):
+            generate_characters(-1)
+
+    def test_same_structure_as_single_character(self, backend):
+        """Batch characters should have the same keys as generate_character."""
+        single = generate_character()
+        for character in generate_characters(20, seed=2):
+            assert character.keys() == single.keys()
+            assert character["appearance"].keys() == single["appearance"].keys()
+            assert character["inventory"].keys() == single["inventory"].keys()
+
+    def test_deterministic_with_seed(self, backend):
+        """The same seed should give the same batch."""
+        assert list(generate_characters(100, seed=7)) == list(generate_characters(100, seed=7))
+        assert list(generate_characters(100, seed=7)) != list(generate_characters(100, seed=8))
+
+    def test_matches_assemble_character(self, backend):
+        """Table-built characters should equal assemble_character's for the same rolls."""
+        characters = generate_characters(3000, seed=6)
+        cols = {name: batch._to_list(col) for name, col in characters.columns.items()}
+        for i, character in enumerate(characters):
+            expected = _assemble_row(
+                cols["attributes"][i], cols["hp"][i], cols["pips"][i],
+                cols["additional_hp"][i], cols["additional_pips"][i], cols["birthsign"][i],
+                cols["coat_color"][i], cols["coat_pattern"][i], cols["detail_roll"][i],
+                cols["first_name"][i], cols["last_name"][i], cols["weapon_category"][i],
+                cols["weapon"][i],
+            )
+            assert character == expected
+
+    def test_characters_share_no_lists(self, backend):
+        """Editing one character must not change another built from the same tables."""
+        first, second = generate_characters(2, seed=9)
+        first["inventory"]["pack"][0] = "Changed"
+        first["equipment"].append("Changed")
+        first["banked"]["items"].append("Changed")
+        assert "Changed" not in second["inventory"]["pack"]
+        assert "Changed" not in second["equipment"]
+        assert second["banked"]["items"] == []
+
+    def test_indexing_matches_iteration(self, backend):
+        """Indexing, negative indexing and slicing should agree with iteration."""
+        characters = generate_characters(30, seed=3)
+        as_list = list(characters)
+        assert characters[0] == as_list[0]
+        assert characters[-1] == as_list[-1]
+        assert characters[5:10] == as_list[5:10]
+        with pytest.raises(IndexError):
+            characters[30]
+
+    def test_values_in_valid_ranges(self, backend):
+        """Every rolled value should come from the SRD tables."""
+        valid_backgrounds = {bg for bg, _, _ in BACKGROUND_TABLE.values()}
+        for character in generate_characters(2000, seed=4):
+            for attr in character["attributes"].values():
+                assert 2 <= attr["max"] <= 12
+            assert 1 <= character["hp"]["max"] <= 6
+            assert 1 <= character["pips"] <= 6
+            assert character["background"] in valid_backgrounds
+            first, last = character["name"].split()
+            assert first in FIRST_NAMES
+            assert last in LAST_NAMES
+            highest = max(attr["max"] for attr in character["attributes"].values())
+            extra = 2 if highest <= 7 else 1 if highest <= 9 else 0
+            assert len(character["equipment"]) == 5 + extra
+
+    def test_distributions_match_rules(self, backend):
+        """Attribute, HP and birthsign frequencies should match the dice odds."""
+        characters = generate_characters(60000, seed=5)
+        attributes = Counter(int(v) for row in characters.attributes for v in row)
+        total = sum(attributes.values())
+        # 3d6 keep two highest: P(12) = 16/216, P(2) = 1/216
+        assert attributes[12] / total == pytest.approx(16 / 216, abs=0.005)
+        assert attributes[2] / total == pytest.approx(1 / 216, abs=0.002)
+
+        hp = Counter(int(v) for v in characters.hp)
+        for face in range(1, 7):
+            assert hp[face] / len(characters) == pytest.approx(1 / 6, abs=0.01)
+
+        signs = Counter(int(v) for v in characters.birthsign)
+        assert len(signs) == len(BIRTHSIGNS)
@@ -0,0 +1,103 @@
+"""Unit tests for the headless generation CLI and export formats."""
+
+import csv
+import io
+import json
+import types
+
+import pytest
+
+from mausritter import batch
+from mausritter.cli import generate, main
+from mausritter.export import CSV_FIELDS, render_batch, write_stream
+
+
+def run_cli(tmp_path, *args) -> str:
+    """Run the CLI writing to a temp file and return the output text."""
+    output = tmp_path / "out.txt"
+    assert main(["generate", *args, "--output", str(output)]) == 0
+    return output.read_text(encoding="utf-8")
+
+
+class TestGenerateCommand:
+    """Tests for `python -m mausritter generate`."""
+
+    def test_ndjson_one_character_per_line(self, tmp_path):
+        """NDJSON output should have one parseable character per line."""
+        lines = run_cli(tmp_path, "--count", "5", "--seed", "1").splitlines()
+        assert len(lines) == 5
+        for line in lines:
+            assert "attributes" in json.loads(line)
+
+    def test_json_array(self, tmp_path):
+        """JSON output should be a single array."""
+        data = json.loads(run_cli(tmp_path, "--count", "4", "--format", "json", "--seed", "1"))
+        assert len(data) == 4
+
+    def test_json_empty_array(self, tmp_path):
+        """A count of zero should still produce valid JSON."""
+        assert json.loads(run_cli(tmp_path, "--count", "0", "--format", "json")) == []
+
+    def test_csv_rows(self, tmp_path):
+        """CSV output should have a header and one row per character."""
+        rows = list(csv.reader(io.StringIO(run_cli(tmp_path, "-n", "3", "-f", "csv", "--seed", "1"))))
+        assert rows[0] == CSV_FIELDS
+        assert len(rows) == 4
+
+    def test_seed_is_reproducible(self, tmp_path):
+        """The same seed should give byte-identical output."""
+        first = run_cli(tmp_path, "--count", "50", "--seed", "9")
+        second = run_cli(tmp_path, "--count", "50", "--seed", "9")
+        assert first == second
+        assert first != run_cli(tmp_path, "--count", "50", "--seed", "10")
+
+    def test_negative_count_rejected(self, tmp_path):
+        """A negative count should be a usage error."""
+        with pytest.raises(SystemExit):
+            main(["generate", "--count", "-1"])
+
+
+class TestStreaming:
+    """Tests for batch-wise streaming."""
+
+    def test_iter_batches_is_lazy(self):
+        """Batches should be rolled on demand, not all up front."""
+        batches = batch.iter_batches(10 ** 9, seed=1, batch_size=10)
+        assert isinstance(batches, types.GeneratorType)
+        assert len(next(batches)) == 10
+
+    def test_batches_cover_count(self):
+        """The last batch should hold the remainder."""
+        sizes = [len(b) for b in batch.iter_batches(25, seed=1, batch_size=10)]
+        assert sizes == [10, 10, 5]
+
+    def test_json_separators_between_batches(self):
+        """Multiple batches should join into one valid JSON array."""
+        out = io.StringIO()
+        rendered = (render_batch(b, "json") for b in batch.iter_batches(25, seed=1, batch_size=10))
+        write_stream(rendered, "json", out)
+        assert len(json.loads(out.getvalue())) == 25
+
+
+class TestWorkers:
+    """Tests for multi-process generation."""
+
+    @pytest.mark.parametrize("fmt", ["ndjson", "csv", "json"])
+    def test_output_identical_across_worker_counts(self, fmt):
+        """The same seed should give byte-identical output at any worker count."""
+        outputs = []
+        for workers in (1, 2, 3):
+            out = io.StringIO()
+            generate(95, fmt, 1234, out, workers=workers, batch_size=10)
+            outputs.append(out.getvalue())
+        assert outputs[0] == outputs[1] == outputs[2]
+
+    def test_workers_flag(self, tmp_path):
+        """--workers should produce the same file as a single process."""
+        single = run_cli(tmp_path, "--count", "30", "--seed", "5")
+        assert run_cli(tmp_path, "--count", "30", "--seed", "5", "--workers", "2") == single
+
+    def test_invalid_worker_count(self):
+        """Zero workers should be a usage error."""
+        with pytest.raises(SystemExit):
+            main(["generate", "--workers", "0"])
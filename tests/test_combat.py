@@ -0,0 +1,112 @@
+"""Unit tests for the Monte Carlo combat simulator."""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from mausritter.combat import (  # noqa: E402
+    Combatant, combatant_from_character, combatant_from_dict, simulate_combat,
+)
+from mausritter.generator import generate_character  # noqa: E402
+from mausritter.rng import SeededRNG  # noqa: E402
+
+MOUSE = Combatant("Mouse", hp=4, strength=10, dexterity=10, armour=0, damage=6)
+RAT = Combatant("Rat", hp=3, strength=6, dexterity=10, armour=0, damage=6)
+
+
+class TestSimulateCombat:
+    """Tests for simulate_combat."""
+
+    def test_rates_sum_to_one(self):
+        """Win, loss and draw rates and every distribution should sum to 1."""
+        result = simulate_combat([MOUSE, MOUSE], [RAT] * 3, fights=2000, seed=1)
+        total = result["party_win_rate"] + result["party_loss_rate"] + result["draw_rate"]
+        assert total == pytest.approx(1)
+        assert sum(result["rounds"]["distribution"]) == pytest.approx(1)
+        for side in ("party_casualties", "enemy_casualties"):
+            for dist in result[side].values():
+                assert sum(dist) == pytest.approx(1)
+        assert len(result["party_casualties"]["dead"]) == 3
+        assert len(result["enemy_casualties"]["dead"]) == 4
+
+    def test_seed_reproducible(self):
+        """The same seed should give the same report."""
+        first = simulate_combat([MOUSE], [RAT], fights=1000, seed=7)
+        assert simulate_combat([MOUSE], [RAT], fights=1000, seed=7) == first
+
+    def test_one_sided_fight(self):
+        """An armoured party that can't be hurt should always win."""
+        knight = Combatant("Knight", hp=6, strength=12, armour=1, damage=10)
+        weak = Combatant("Gnat", hp=1, strength=1, damage=1)
+        result = simulate_combat([knight], [weak] * 2, fights=500, seed=2)
+        assert result["party_win_rate"] == 1
+        assert result["party_casualties"]["out_of_action"] == [1.0, 0.0]
+        assert result["enemy_casualties"]["out_of_action"][-1] == 1.0
+
+    def test_first_round_kill(self):
+        """A 1 HP, 1 STR target hit for d6 should drop in round one."""
+        target = Combatant("Moth", hp=0, strength=1, damage=1)
+        result = simulate_combat([MOUSE], [target], fights=500, seed=3)
+        assert result["rounds"]["max"] == 1
+        assert result["enemy_casualties"]["dead"] == [0.0, 1.0]
+
+    def test_stalemate_is_draw(self):
+        """Fights nobody can win should stop at max_rounds as draws."""
+        wall = Combatant("Wall", hp=5, strength=10, armour=1, damage=1)
+        result = simulate_combat([wall], [wall], fights=100, seed=4, max_rounds=5)
+        assert result["draw_rate"] == 1
+        assert result["rounds"]["max"] == 5
+
+    def test_stronger_side_wins_more(self):
+        """More creatures should lower the party's win rate."""
+        easy = simulate_combat([MOUSE] * 3, [RAT], fights=5000, seed=5)
+        hard = simulate_combat([MOUSE] * 3, [RAT] * 6, fights=5000, seed=5)
+        assert easy["party_win_rate"] > hard["party_win_rate"]
+
+    def test_invalid_input(self):
+        """Empty sides and bad fight counts should raise ValueError."""
+        with pytest.raises(ValueError):
+            simulate_combat([], [RAT])
+        with pytest.raises(ValueError):
+            simulate_combat([MOUSE], [RAT], fights=0)
+
+
+class TestStatBlocks:
+    """Tests for building stat blocks."""
+
+    def test_from_dict(self):
+        """Dice notation and numbers should both work for damage."""
+        rat = combatant_from_dict({"name": "Rat", "hp": 3, "str": 6, "damage": "d8"})
+        assert rat == Combatant("Rat", 3, 6, 10, 0, 8)
+        assert combatant_from_dict({"hp": 3, "str": 6, "damage": 4}).damage == 4
+
+    def test_from_dict_invalid(self):
+        """Missing or impossible stats should raise ValueError."""
+        with pytest.raises(ValueError):
+            combatant_from_dict({"hp": 3})
+        with pytest.raises(ValueError):
+            combatant_from_dict({"hp": 3, "str": 0})
+        with pytest.raises(ValueError):
+            combatant_from_dict({"hp": 40000, "str": 6})
+        with pytest.raises(ValueError):
+            combatant_from_dict({"hp": 3, "str": 6, "damage": "d40000"})
+        with pytest.raises(ValueError):
+            combatant_from_dict(["hp", 3])
+
+    def test_huge_character_stats_rejected(self):
+        """Character stats that would overflow the fight arrays should raise ValueError."""
+        character = generate_character(rng=SeededRNG(2))
+        character["hp"]["current"] = 40000
+        with pytest.raises(ValueError):
+            combatant_from_character(character)
+
+    def test_from_character(self):
+        """Should use current stats, the weapon's first die and worn armour."""
+        character = generate_character(rng=SeededRNG(1))
+        character["weapon"] = "Sword (Medium, d6/d8)"
+        character["inventory"]["body"][0] = "Light armour"
+        combatant = combatant_from_character(character)
+        assert combatant.hp == character["hp"]["current"]
+        assert combatant.strength == character["attributes"]["STR"]["current"]
+        assert combatant.damage == 6
+        assert combatant.armour == 1
@@ -0,0 +1,40 @@
+"""Tests for precompiled character sheet templates."""
+
+from mausritter.generator import generate_character
+from mausritter.rng import SeededRNG
+from mausritter.templates.compiled import CompiledTemplate, Raw
+from mausritter.templates.html_template import generate_character_sheet_html
+
+
+class TestCompiledTemplate:
+    """Tests for splitting templates into chunks and slots."""
+
+    def test_chunks_and_slots(self):
+        """Slots should sit between constant chunks and may repeat."""
+        template = CompiledTemplate("<b>{name}</b> ", "{{{grit}}} {grit}")
+        assert template.chunks == ("<b>", "</b> {", "} ", "")
+        assert template.slots == ("name", "grit", "grit")
+        assert template.render({"name": "Pip", "grit": 2}) == "<b>Pip</b> {2} 2"
+
+    def test_raw_text_is_not_parsed(self):
+        """Stylesheets and scripts should go in untouched, braces and all."""
+        template = CompiledTemplate("<style>", Raw("a { color: red }"), "</style>{n}")
+        assert template.slots == ("n",)
+        assert template.render({"n": 1}) == "<style>a { color: red }</style>1"
+
+
+class TestSheetRendering:
+    """Rendered sheets should carry each character's own values."""
+
+    def test_values_and_chrome(self):
+        """Every character fills the same page; chrome opens the body."""
+        first = generate_character(rng=SeededRNG(1))
+        second = generate_character(rng=SeededRNG(2))
+        html = generate_character_sheet_html(first, server_mode=True, token="abc", chrome="<nav>Back</nav>")
+        assert "<body><nav>Back</nav>" in html
+        assert f'class="name-input" value="{first["name"]}"' in html
+        assert "const API_TOKEN = 'abc';" in html
+
+        other = generate_character_sheet_html(second, server_mode=True, token="abc")
+        assert f'class="name-input" value="{second["name"]}"' in other
+        assert "<body>\n" in other and "Back</nav>" not in other
@@ -0,0 +1,104 @@
+"""Tests for compressed responses and compact JSON."""
+
+import gzip
+import json
+
+import pytest
+
+pytest.importorskip("flask")
+
+from mausritter.generator import generate_character  # noqa: E402
+from mausritter.server.session import game_session  # noqa: E402
+from mausritter.templates.assets import sheet_assets  # noqa: E402
+
+
+def _gzip(**headers):
+    return {"Accept-Encoding": "gzip", **headers}
+
+
+class TestResponseCompression:
+    """Text responses should be compressed when the client accepts it."""
+
+    def test_gzip_page(self, client):
+        """A player's sheet should arrive gzipped and decode to the same page."""
+        char_id = game_session.add_character(generate_character())
+        token = game_session.get_character(char_id)["player_token"]
+        plain = client.get(f"/player/{token}")
+        zipped = client.get(f"/player/{token}", headers=_gzip())
+        assert "Content-Encoding" not in plain.headers
+        assert zipped.headers["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in zipped.headers["Vary"]
+        assert gzip.decompress(zipped.data) == plain.data
+        assert len(zipped.data) < len(plain.data) / 3
+
+    def test_brotli_preferred(self, client):
+        """Brotli should win when the client accepts both."""
+        brotli = pytest.importorskip("brotli")
+        game_session.add_character(generate_character())
+        response = client.get(
+            f"/api/session?token={game_session.gm_token}",
+            headers={"Accept-Encoding": "gzip, deflate, br"},
+        )
+        assert response.headers["Content-Encoding"] == "br"
+        assert len(json.loads(brotli.decompress(response.data))["characters"]) == 1
+
+    def test_small_and_streamed_bodies_pass_through(self, client):
+        """Tiny bodies and the event stream shouldn't be compressed."""
+        small = client.get("/api/session?token=wrong", headers=_gzip())
+        assert small.status_code == 401 and "Content-Encoding" not in small.headers
+        stream = client.get(
+            f"/api/events?token={game_session.gm_token}", headers=_gzip(), buffered=False
+        )
+        assert "Content-Encoding" not in stream.headers
+        stream.close()
+
+    def test_etag_still_revalidates(self, client):
+        """Compressed reads should carry a weak ETag that still answers 304."""
+        for i in range(20):
+            game_session.add_character({"name": f"Mouse {i}", "notes": "x" * 40})
+        url = f"/api/session?token={game_session.gm_token}"
+        response = client.get(url, headers=_gzip())
+        assert response.headers["Content-Encoding"] == "gzip"
+        etag = response.headers["ETag"]
+        assert etag.startswith("W/")
+        assert client.get(url, headers=_gzip(**{"If-None-Match": etag})).status_code == 304
+
+
+class TestPrecompressedAssets:
+    """Assets should be served from variants compressed at startup."""
+
+    def test_variants(self, client):
+        """Each encoding should have its own ETag and decode to the asset."""
+        asset = sheet_assets()["sheet.js"]
+        url = f"/assets/{asset.filename}"
+        response = client.get(url, headers=_gzip())
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.data) == asset.content
+        etag = response.headers["ETag"]
+        assert etag != client.get(url).headers["ETag"]
+        assert client.get(url, headers=_gzip(**{"If-None-Match": etag})).status_code == 304
+        assert "immutable" in response.headers["Cache-Control"]
+
+
+class TestCompactJson:
+    """JSON should be compact unless a request asks for ``?pretty``."""
+
+    def test_api_responses(self, client):
+        """Responses should only be indented when asked."""
+        game_session.add_character({"name": "Pip"})
+        url = f"/api/characters?token={game_session.gm_token}"
+        compact = client.get(url).get_data(as_text=True)
+        pretty = client.get(url + "&pretty").get_data(as_text=True)
+        assert "\n " not in compact and ": " not in compact
+        assert "\n  " in pretty
+        assert json.loads(compact) == json.loads(pretty)
+
+    def test_session_export(self, client):
+        """Saved sessions should be compact, with the indented form on request."""
+        game_session.add_character({"name": "Pip"})
+        url = f"/api/session/save?token={game_session.gm_token}"
+        compact = client.post(url).get_data(as_text=True)
+        pretty = client.post(url + "&pretty=1").get_data(as_text=True)
+        assert "\n" not in compact
+        assert json.loads(compact)["session"] == json.loads(pretty)["session"]
+        assert len(compact) < len(pretty)
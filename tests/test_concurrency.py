@@ -0,0 +1,148 @@
+"""Stress tests for concurrent access to a GameSession."""
+
+import threading
+
+import pytest
+
+pytest.importorskip("flask")
+
+from mausritter.server import create_app  # noqa: E402
+from mausritter.server.session import (  # noqa: E402
+    GameSession, MemorySessionStore, get_store, set_store,
+)
+
+THREADS = 64
+UPDATES_PER_THREAD = 20
+
+
+def _run(target, count=THREADS):
+    """Start count threads on target(index) together and wait for them."""
+    barrier = threading.Barrier(count)
+    errors = []
+
+    def run(index):
+        barrier.wait()
+        try:
+            target(index)
+        except Exception as e:  # surfaced by the assertion below
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+@pytest.fixture
+def server(tmp_path):
+    """App backed by a logged session, restoring the default store afterwards."""
+    previous = get_store()
+    store = MemorySessionStore(tmp_path)
+    session = GameSession()
+    store.add(session)
+    set_store(store)
+    app = create_app()
+    app.config["TESTING"] = True
+    yield app, session, tmp_path
+    store.close()
+    set_store(previous)
+
+
+class TestConcurrentSession:
+    """Hammer one session from many threads and check nothing is lost."""
+
+    def test_id_allocation_is_atomic(self, server):
+        """Parallel creates should get distinct IDs and tokens."""
+        _, session, _ = server
+        ids = []
+        _run(lambda i: ids.append(session.add_character({"name": f"Mouse {i}"})))
+        assert len(set(ids)) == THREADS
+        tokens = {c["player_token"] for c in session.get_all_characters().values()}
+        assert len(tokens) == THREADS
+
+    def test_parallel_patches_lose_nothing(self, server):
+        """64 threads patching shared characters should all land, and replay the same."""
+        app, session, tmp_path = server
+        char_ids = [session.add_character({"name": f"Mouse {i}", "log": {}}) for i in range(8)]
+        token = session.gm_token
+
+        def patch(index):
+            client = app.test_client()
+            char_id = char_ids[index % len(char_ids)]
+            for n in range(UPDATES_PER_THREAD):
+                response = client.patch(
+                    f"/api/characters/{char_id}?token={token}",
+                    json={"log": {f"t{index}_{n}": n}, "hp": {"current": n}},
+                )
+                assert response.status_code == 200
+
+        _run(patch)
+
+        expected = THREADS * UPDATES_PER_THREAD
+        characters = session.get_all_characters()
+        assert sum(len(char["log"]) for char in characters.values()) == expected
+        for index in range(THREADS):
+            log = characters[char_ids[index % len(char_ids)]]["log"]
+            assert all(log[f"t{index}_{n}"] == n for n in range(UPDATES_PER_THREAD))
+
+        # The write-ahead log must agree with memory
+        restarted = MemorySessionStore(tmp_path)
+        restarted.add(GameSession())
+        assert restarted.default().get_all_characters() == characters
+
+    def test_readers_during_writes(self, server):
+        """Reads and exports during updates should never fail or tear."""
+        _, session, _ = server
+        char_id = session.add_character({"name": "Pip", "stats": {}})
+
+        def work(index):
+            for n in range(UPDATES_PER_THREAD):
+                if index % 2:
+                    session.update_character(char_id, {"stats": {f"{index}_{n}": n}})
+                else:
+                    session.to_json()
+                    session.get_character(char_id)
+
+        _run(work)
+        assert len(session.get_character(char_id)["stats"]) == THREADS // 2 * UPDATES_PER_THREAD
+
+    def test_adds_during_loads(self, server):
+        """An add racing a load should never overwrite a character the load brought in."""
+        _, session, _ = server
+        loaded = GameSession()
+        for i in range(20):
+            loaded.add_character({"name": f"Loaded {i + 1}"})
+        saved = loaded.to_json()
+
+        def work(index):
+            for _ in range(UPDATES_PER_THREAD):
+                if index % 8:
+                    session.add_character({"name": "Mouse"})
+                else:
+                    # A reset numbers adds from char_001 again, into the loaded IDs
+                    session.reset()
+                    assert session.from_json(saved)
+
+        _run(work, count=16)
+        characters = session.get_all_characters()
+        for i in range(20):
+            assert characters[f"char_{i + 1:03d}"]["name"] == f"Loaded {i + 1}"
+
+    def test_add_after_load_takes_next_free_id(self, server, monkeypatch):
+        """A load landing between taking an ID and its lock should push the add on."""
+        _, session, _ = server
+        loaded = GameSession()
+        loaded.add_character({"name": "Loaded"})
+        saved = loaded.to_json()
+        lock_for = session._lock_for
+
+        def load_first(char_id):
+            monkeypatch.setattr(session, "_lock_for", lock_for)
+            assert session.from_json(saved)
+            return lock_for(char_id)
+
+        monkeypatch.setattr(session, "_lock_for", load_first)
+        assert session.add_character({"name": "Pip"}) == "char_002"
+        assert session.get_character("char_001")["name"] == "Loaded"
@@ -0,0 +1,59 @@
+"""Tests for the cached game data bundle."""
+
+from mausritter import data
+from mausritter.batch import generate_characters
+from mausritter.generator import generate_character
+from mausritter.rng import SeededRNG
+from mausritter.templates.assets import sheet_assets
+from mausritter.templates.js import get_javascript_code
+
+
+class TestDataBundle:
+    """The tables should be serialized once and rebuilt only when told."""
+
+    def test_built_once(self):
+        """Repeated calls should reuse the same bundle and script."""
+        assert data.get_data_bundle() is data.get_data_bundle()
+        assert data.get_all_data_as_json() is data.get_data_bundle().tables
+        assert get_javascript_code() is get_javascript_code()
+
+    def test_tables_changed(self):
+        """Custom tables should show up in the script and assets once announced."""
+        before = data.get_data_bundle()
+        script, assets = get_javascript_code(), sheet_assets()
+        data.FIRST_NAMES.append("Zebedee")
+        try:
+            data.tables_changed()
+            assert data.get_data_bundle().digest != before.digest
+            assert "Zebedee" in get_javascript_code()
+            assert sheet_assets()["sheet.js"].filename != assets["sheet.js"].filename
+            assert sheet_assets()["sheet.css"] == assets["sheet.css"]
+        finally:
+            data.FIRST_NAMES.pop()
+            data.tables_changed()
+        assert data.get_data_bundle().digest == before.digest
+        assert get_javascript_code() == script
+
+    def test_generator_follows_custom_tables(self):
+        """Characters generated after tables_changed should use the custom tables."""
+        backgrounds = dict(data.BACKGROUND_TABLE)
+        weapons = dict(data.WEAPONS)
+        data.BACKGROUND_TABLE.update(
+            {key: ("Cheesemonger", "Wheel of cheese", "Apron") for key in backgrounds}
+        )
+        data.WEAPONS.clear()
+        data.WEAPONS["improvised"] = [("Ladle", "d4", 1, "Better than nothing")]
+        try:
+            data.tables_changed()
+            for character in (generate_character(rng=SeededRNG(3)),
+                              *generate_characters(50, seed=3)):
+                assert character["background"] == "Cheesemonger"
+                assert character["weapon"] == "Ladle (Improvised, d4)"
+                assert "Wheel of cheese" in character["equipment"]
+        finally:
+            data.BACKGROUND_TABLE.clear()
+            data.BACKGROUND_TABLE.update(backgrounds)
+            data.WEAPONS.clear()
+            data.WEAPONS.update(weapons)
+            data.tables_changed()
+        assert generate_character(rng=SeededRNG(3))["background"] != "Cheesemonger"
@@ -0,0 +1,129 @@
+"""Tests for live session update events."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from mausritter.server.events import EventBroker
+from mausritter.server.session import GameSession, MemorySessionStore
+from mausritter.server.sqlite_store import SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def session(request, tmp_path):
+    """A session from each store backend."""
+    if request.param == "memory":
+        yield MemorySessionStore().create()
+    else:
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        yield store.create()
+        store.close()
+
+
+def _data(event):
+    return json.loads(event.data)
+
+
+class TestEventBroker:
+    """Tests for publishing and waiting on events."""
+
+    def test_wait_returns_newer_events(self):
+        """Subscribers should get every event after the version they have."""
+        broker = EventBroker(version=3)
+        for version in (4, 5, 6):
+            broker.publish(version, "session", {"fields": {"n": version}})
+        assert [e.version for e in broker.wait(4, timeout=0)] == [5, 6]
+        assert _data(broker.wait(5, timeout=0)[0]) == {"version": 6, "fields": {"n": 6}}
+
+    def test_idle_wait_blocks_until_publish(self):
+        """A waiting subscriber should wake as soon as an event is published."""
+        broker = EventBroker()
+        received = []
+        waiter = threading.Thread(target=lambda: received.extend(broker.wait(0, timeout=5)))
+        waiter.start()
+        time.sleep(0.05)
+        assert waiter.is_alive() and not received
+        broker.publish(1, "session", {})
+        waiter.join(timeout=5)
+        assert [e.version for e in received] == [1]
+
+    def test_timeout_and_close(self):
+        """Timeouts should return no events; a closed broker returns None."""
+        broker = EventBroker()
+        assert broker.wait(0, timeout=0.01) == []
+        broker.close()
+        assert broker.wait(0) is None
+
+    def test_resync_when_history_is_gone(self):
+        """Clients too far behind (or ahead) should be told to resync."""
+        broker = EventBroker(history=2)
+        for version in range(1, 6):
+            broker.publish(version, "session", {})
+        assert [e.type for e in broker.wait(1, timeout=0)] == ["resync"]
+        assert [e.version for e in broker.wait(3, timeout=0)] == [4, 5]
+        assert [e.type for e in broker.wait(9, timeout=0)] == ["resync"]
+
+    def test_visibility(self):
+        """Players should only see their own character and public session events."""
+        broker = EventBroker()
+        broker.publish(1, "character", {"id": "char_001"}, char_id="char_001")
+        broker.publish(2, "character", {"id": "char_002"}, char_id="char_002")
+        broker.publish(3, "session", {"fields": {"gm_notes": "x"}}, gm_only=True)
+        broker.publish(4, "session", {"fields": {"session_name": "x"}})
+        events = broker.wait(0, timeout=0)
+        assert [e.version for e in events if e.visible_to(None)] == [1, 2, 3, 4]
+        assert [e.version for e in events if e.visible_to("char_001")] == [1, 4]
+
+
+class TestSessionEvents:
+    """Every backend should publish one event per change."""
+
+    def test_each_change_publishes(self, session):
+        """Events should carry the new version and the change itself."""
+        broker = session.events
+        start = session.version
+        char_id = session.add_character({"name": "Pip", "hp": {"current": 3}})
+        session.update_character(char_id, {"hp": {"current": 2}})
+        session.patch_character(char_id, [{"op": "replace", "path": "/name", "value": "Tam"}])
+        session.update_session_data({"turn_count": 4})
+        session.set_gm_notes("trap")
+        session.delete_character(char_id)
+
+        events = broker.wait(start, timeout=0)
+        assert [e.version for e in events] == list(range(start + 1, session.version + 1))
+        added, updated, patched, turn, notes, deleted = [_data(e) for e in events]
+        assert added["character"]["name"] == "Pip"
+        assert updated["update"] == {"hp": {"current": 2}}
+        assert patched["patch"][0]["value"] == "Tam"
+        assert turn["fields"]["session_data"]["turn_count"] == 4
+        assert events[4].gm_only and notes["fields"] == {"gm_notes": "trap"}
+        assert deleted == {"version": session.version, "id": char_id, "deleted": True}
+
+    def test_rejected_changes_publish_nothing(self, session):
+        """Failed updates shouldn't bump the version or publish."""
+        broker = session.events
+        version = session.version
+        assert not session.update_character("char_999", {"name": "x"})
+        assert session.version == version
+        assert broker.wait(version, timeout=0) == []
+
+    def test_reset_publishes(self, session):
+        """Resetting should tell subscribers to start over."""
+        broker = session.events
+        version = session.version
+        session.reset()
+        assert [e.type for e in broker.wait(version, timeout=0)] == ["reset"]
+
+    def test_replay_starts_after_restore(self, tmp_path):
+        """A restored session's stream should start at its restored version."""
+        store = MemorySessionStore(tmp_path)
+        store.add(GameSession())
+        store.default().add_character({"name": "Pip"})
+
+        restarted = MemorySessionStore(tmp_path)
+        restarted.add(GameSession())
+        session = restarted.default()
+        assert session.events.version == session.version
+        assert session.events.wait(session.version, timeout=0) == []
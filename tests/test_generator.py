@@ -8,6 +8,9 @@ from mausritter.generator import (
     generate_attributes,
     get_background,
     generate_character,
+    assemble_character,
+    lookup_background,
+    BACKGROUND_LOOKUP,
 )
 from mausritter.data import (
     BACKGROUND_TABLE,
@@ -109,6 +112,41 @@ class TestGetBackground:
         assert all(isinstance(s, str) for s in result)
 
 
+class TestBackgroundLookup:
+    """Tests for the precomputed background table."""
+
+    def test_has_entry_per_roll(self):
+        """There should be one entry for each of the 36 HP/Pips rolls."""
+        assert len(BACKGROUND_LOOKUP) == 36
+        for (hp, pips), (background, item_a, item_b) in BACKGROUND_TABLE.items():
+            entry = lookup_background(hp, pips)
+            assert (entry.background, entry.item_a, entry.item_b) == (background, item_a, item_b)
+
+    def test_items_preformatted(self):
+        """Bracketed details should already be on a new line."""
+        entry = lookup_background(2, 5)  # Blacksmith
+        assert entry.pack == ("Torches", "Rations", "Hammer\n(Medium, d6/d8)", "Metal file")
+        assert entry.body == ()
+
+    def test_armour_placed_in_body(self):
+        """Armour from the background should start in a body slot."""
+        entry = lookup_background(1, 1)  # Test subject
+        assert entry.body == ("Lead coat\n(Heavy armour)",)
+        assert entry.pack == ("Torches", "Rations", "Spell: Magic missile")
+
+    def test_extra_armour_fills_body_then_pack(self):
+        """Bonus armour should use the free body slot, then overflow to the pack."""
+        attributes = {"STR": 5, "DEX": 5, "WIL": 5}
+        character = assemble_character(
+            attributes, 1, 2, (1, 5), BIRTHSIGNS[0], COAT_COLORS[0], COAT_PATTERNS[0],
+            11, FIRST_NAMES[0], LAST_NAMES[0], "light", WEAPONS["light"][0],
+        )
+        inventory = character["inventory"]
+        jerkin = "Shield & jerkin\n(Light armour)"
+        assert inventory["body"] == [jerkin, jerkin]
+        assert inventory["pack"] == ["Torches", "Rations", "Cookpots", "Shears", "", ""]
+
+
 class TestGenerateCharacter:
     """Tests for the generate_character function."""
 
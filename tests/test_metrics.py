@@ -0,0 +1,85 @@
+"""Tests for request metrics and the /api/metrics endpoint."""
+
+import re
+
+import pytest
+
+pytest.importorskip("flask")
+
+from mausritter.server.metrics import Metrics, metrics  # noqa: E402
+from mausritter.server.session import game_session  # noqa: E402
+
+
+def _sample(text, name, **labels):
+    """Value of one sample in Prometheus text, or None."""
+    for line in text.splitlines():
+        match = re.fullmatch(r"(\w+)(?:\{(.*)\})? (\S+)", line)
+        if match and match.group(1) == name:
+            found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+            if all(found.get(key) == value for key, value in labels.items()):
+                return float(match.group(3))
+    return None
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics():
+    """Start every test with no metrics recorded."""
+    metrics.clear()
+
+
+class TestMetrics:
+    """Tests for recording and rendering metrics."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Buckets should count everything at or below their bound."""
+        registry = Metrics()
+        registry.describe("t_seconds", "histogram", "A timer.")
+        for value in (0.5, 1.0, 3.0):
+            registry.observe("t_seconds", value, buckets=(1.0, 2.0), stage="x")
+        text = registry.render()
+        assert "# TYPE t_seconds histogram" in text
+        assert _sample(text, "t_seconds_bucket", stage="x", le="1.0") == 2
+        assert _sample(text, "t_seconds_bucket", stage="x", le="2.0") == 2
+        assert _sample(text, "t_seconds_bucket", stage="x", le="+Inf") == 3
+        assert _sample(text, "t_seconds_sum", stage="x") == 4.5
+        assert _sample(text, "t_seconds_count", stage="x") == 3
+
+    def test_label_values_are_escaped(self):
+        """Quotes and newlines in label values shouldn't break the format."""
+        registry = Metrics()
+        registry.inc("n_total", route='a"b\nc')
+        assert 'n_total{route="a\\"b\\nc"} 1' in registry.render()
+
+
+class TestMetricsEndpoint:
+    """Tests for /api/metrics."""
+
+    def test_host_gm_only(self, client):
+        """Only the host table's GM should read the server's metrics."""
+        assert client.get("/api/metrics").status_code == 401
+        other_token = client.post("/api/sessions").get_json()["gm_token"]
+        assert client.get(f"/api/metrics?token={other_token}").status_code == 403
+        client.delete(f"/api/session?token={other_token}")
+
+    def test_routes_and_stages(self, client):
+        """Requests should be timed by route, with their stages and sizes."""
+        token = game_session.gm_token
+        character = client.post(f"/api/characters?token={token}").get_json()["character"]
+        char_id = character["id"]
+        client.patch(f"/api/characters/{char_id}?token={token}", json={"notes": "map"})
+        client.get(f"/player/{character['player_token']}")
+
+        response = client.get(f"/api/metrics?token={token}")
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        text = response.get_data(as_text=True)
+        route = {"method": "PATCH", "route": "/api/characters/<char_id>"}
+        assert _sample(text, "mausritter_request_duration_seconds_count", **route) == 1
+        assert _sample(text, "mausritter_requests_total", status="200", **route) == 1
+        assert _sample(text, "mausritter_request_bytes_total", **route) > 0
+        assert _sample(
+            text, "mausritter_response_bytes_total", method="GET", route="/player/<player_token>"
+        ) > 1000
+        for stage in ("json_decode", "json_encode", "merge_updates",
+                      "session.update_character", "render_sheet"):
+            assert _sample(text, "mausritter_stage_duration_seconds_count", stage=stage) >= 1
@@ -0,0 +1,119 @@
+"""Tests for JSON Patch support on characters."""
+
+import pytest
+
+from mausritter.server.patch import PatchConflict, PatchError, apply_patch, diff, parse_pointer
+
+
+@pytest.fixture
+def character():
+    """A small character document."""
+    return {
+        "id": "char_001",
+        "player_token": "abc",
+        "name": "Pip",
+        "hp": {"current": 3, "max": 3},
+        "inventory": {"pack": ["Torches", "Rations"]},
+        "a/b": {"~x": 1},
+    }
+
+
+class TestPointers:
+    """Tests for JSON Pointer parsing."""
+
+    def test_escapes(self):
+        """~1 and ~0 should unescape to / and ~."""
+        assert parse_pointer("/a~1b/~0x") == ["a/b", "~x"]
+        assert parse_pointer("") == []
+
+    def test_invalid(self):
+        """Pointers must start with a slash."""
+        with pytest.raises(PatchError):
+            parse_pointer("hp/current")
+
+
+class TestApplyPatch:
+    """Tests for each operation and for atomicity."""
+
+    def test_replace_and_add(self, character):
+        """Should change only the named paths."""
+        patched = apply_patch(character, [
+            {"op": "replace", "path": "/hp/current", "value": 1},
+            {"op": "add", "path": "/inventory/pack/1", "value": "Rope"},
+            {"op": "add", "path": "/inventory/pack/-", "value": "Lantern"},
+            {"op": "add", "path": "/a~1b/~0x", "value": 2},
+        ])
+        assert patched["hp"] == {"current": 1, "max": 3}
+        assert patched["inventory"]["pack"] == ["Torches", "Rope", "Rations", "Lantern"]
+        assert patched["a/b"] == {"~x": 2}
+
+    def test_original_unchanged(self, character):
+        """The input document should never be modified; untouched parts are shared."""
+        patched = apply_patch(character, [{"op": "remove", "path": "/inventory/pack/0"}])
+        assert character["inventory"]["pack"] == ["Torches", "Rations"]
+        assert patched["inventory"]["pack"] == ["Rations"]
+        assert patched["hp"] is character["hp"]
+
+    def test_move_copy_remove(self, character):
+        """move, copy and remove should follow RFC 6902."""
+        patched = apply_patch(character, [
+            {"op": "copy", "from": "/hp", "path": "/old_hp"},
+            {"op": "move", "from": "/inventory/pack/1", "path": "/inventory/pack/0"},
+            {"op": "remove", "path": "/a~1b"},
+        ])
+        assert patched["old_hp"] == character["hp"]
+        assert patched["inventory"]["pack"] == ["Rations", "Torches"]
+        assert "a/b" not in patched
+
+    def test_test_conflict(self, character):
+        """A failed test should raise PatchConflict and apply nothing."""
+        apply_patch(character, [{"op": "test", "path": "/hp/current", "value": 3}])
+        with pytest.raises(PatchConflict):
+            apply_patch(character, [
+                {"op": "replace", "path": "/name", "value": "Tam"},
+                {"op": "test", "path": "/hp/current", "value": 2},
+            ])
+        assert character["name"] == "Pip"
+
+    @pytest.mark.parametrize("operations", [
+        {"op": "replace", "path": "/name", "value": "Tam"},
+        [{"op": "replace", "path": "/id", "value": "char_999"}],
+        [{"op": "remove", "path": "/player_token"}],
+        [{"op": "copy", "from": "/player_token", "path": "/token"}],
+        [{"op": "replace", "path": "", "value": {}}],
+        [{"op": "replace", "path": "/missing", "value": 1}],
+        [{"op": "add", "path": "/inventory/pack/9", "value": "x"}],
+        [{"op": "add", "path": "/inventory/pack/01", "value": "x"}],
+        [{"op": "move", "from": "/hp", "path": "/hp/old"}],
+        [{"op": "replace", "path": "/name"}],
+        [{"op": "frobnicate", "path": "/name"}],
+    ])
+    def test_invalid_patches(self, character, operations):
+        """Malformed patches and server-owned fields should be rejected."""
+        with pytest.raises(PatchError):
+            apply_patch(character, operations)
+
+
+class TestDiff:
+    """Tests for building a patch between two versions."""
+
+    def test_round_trip(self, character):
+        """Applying the diff should give the newer document."""
+        newer = apply_patch(character, [
+            {"op": "replace", "path": "/hp/current", "value": 1},
+            {"op": "add", "path": "/inventory/pack/-", "value": "Rope"},
+            {"op": "remove", "path": "/a~1b"},
+            {"op": "add", "path": "/notes", "value": "map"},
+        ])
+        ops = diff(character, newer)
+        assert apply_patch(character, ops) == newer
+        assert {"op": "replace", "path": "/hp/current", "value": 1} in ops
+
+    def test_only_changed_paths(self, character):
+        """Unchanged and shared parts shouldn't appear in the diff."""
+        assert diff(character, dict(character)) == []
+        newer = apply_patch(character, [{"op": "replace", "path": "/inventory/pack/1", "value": "Rope"}])
+        assert diff(character, newer) == [
+            {"op": "replace", "path": "/inventory/pack/1", "value": "Rope"},
+        ]
+        assert diff({"n": 1}, {"n": True}) == [{"op": "replace", "path": "/n", "value": True}]
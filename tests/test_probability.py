@@ -0,0 +1,103 @@
+"""Unit tests for exact dice probabilities."""
+
+import itertools
+from collections import Counter
+from fractions import Fraction
+
+import pytest
+
+from mausritter import probability
+from mausritter.probability import Distribution, dice, keep_highest, keep_lowest, parse
+
+
+def brute_force(count, sides, pick=sum):
+    """Exact distribution by enumerating every outcome."""
+    counts = Counter(pick(roll) for roll in itertools.product(range(1, sides + 1), repeat=count))
+    total = sides ** count
+    return {value: Fraction(n, total) for value, n in counts.items()}
+
+
+class TestDistribution:
+    """Tests for building and combining distributions."""
+
+    @pytest.mark.parametrize("count,sides", [(1, 6), (2, 6), (3, 6), (2, 20), (4, 4)])
+    def test_sum_of_dice(self, count, sides):
+        """XdY should match enumerating every roll."""
+        assert dice(count, sides).probabilities() == brute_force(count, sides)
+
+    @pytest.mark.parametrize("count,sides,keep", [(3, 6, 2), (4, 6, 3), (2, 20, 1), (5, 4, 2)])
+    def test_keep_highest(self, count, sides, keep):
+        """Keep-highest should match enumerating every roll."""
+        expected = brute_force(count, sides, lambda r: sum(sorted(r)[-keep:]))
+        assert keep_highest(count, sides, keep).probabilities() == expected
+
+    @pytest.mark.parametrize("count,sides,keep", [(2, 20, 1), (4, 6, 2)])
+    def test_keep_lowest(self, count, sides, keep):
+        """Keep-lowest should match enumerating every roll."""
+        expected = brute_force(count, sides, lambda r: sum(sorted(r)[:keep]))
+        assert keep_lowest(count, sides, keep).probabilities() == expected
+
+    def test_attribute_roll(self):
+        """3d6 keep two highest ranges 2-12 with P(12) = 16/216."""
+        attribute = probability.ATTRIBUTE
+        assert (attribute.min, attribute.max) == (2, 12)
+        assert attribute.pmf(12) == Fraction(16, 216)
+        assert sum(attribute.probabilities().values()) == 1
+
+    def test_modifier_and_mean(self):
+        """A flat modifier should shift the range and mean."""
+        roll = dice(2, 6) + 3
+        assert (roll.min, roll.max) == (5, 15)
+        assert roll.mean() == 10
+
+    def test_compare(self):
+        """compare should match enumerating both rolls."""
+        less, equal, greater = dice(2, 6).compare(Distribution.die(12))
+        outcomes = [(sum(a), b) for a in itertools.product(range(1, 7), repeat=2) for b in range(1, 13)]
+        assert less == Fraction(sum(x < y for x, y in outcomes), len(outcomes))
+        assert equal == Fraction(sum(x == y for x, y in outcomes), len(outcomes))
+        assert greater == Fraction(sum(x > y for x, y in outcomes), len(outcomes))
+
+    def test_highest_of_two(self):
+        """highest() of two d20s should equal 2d20 keep highest."""
+        d20 = Distribution.die(20)
+        assert d20.highest(d20) == keep_highest(2, 20, 1)
+        assert d20.lowest(d20) == keep_lowest(2, 20, 1)
+
+
+class TestRules:
+    """Tests for Mausritter-specific odds."""
+
+    def test_save_chance(self):
+        """A save passes on a d20 roll at or under the score."""
+        assert probability.save_chance(10) == Fraction(1, 2)
+        assert probability.save_chance(10, "advantage") == Fraction(3, 4)
+        assert probability.save_chance(10, "disadvantage") == Fraction(1, 4)
+        assert probability.save_chance(0) == 0
+        assert probability.save_chance(20) == 1
+
+    def test_extra_items_chance(self):
+        """Bonus items depend on the highest of three attribute rolls."""
+        one, two = probability.extra_items_chance()
+        expected = brute_force(3, 6, lambda r: sum(sorted(r)[1:]))
+        at_most_9 = sum(p for v, p in expected.items() if v <= 9)
+        assert one == at_most_9 ** 3
+        assert two < one
+
+
+class TestParse:
+    """Tests for dice notation parsing."""
+
+    def test_notations(self):
+        """Common notations should parse to the matching distribution."""
+        assert parse("3d6k2") == keep_highest(3, 6, 2)
+        assert parse("2d20kl1") == keep_lowest(2, 20, 1)
+        assert parse("d20") == Distribution.die(20)
+        assert parse("1d8+2").min == 3
+        assert parse("2d6-1").max == 11
+
+    @pytest.mark.parametrize("notation", ["", "abc", "2d", "0d6", "2d0", "100d100", "3d6k4"])
+    def test_invalid(self, notation):
+        """Invalid or oversized notation should raise ValueError."""
+        with pytest.raises(ValueError):
+            parse(notation)
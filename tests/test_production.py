@@ -0,0 +1,120 @@
+"""Tests for serving the GM server in production mode."""
+
+import json
+import re
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("waitress")
+
+from mausritter.server.session import MemorySessionStore  # noqa: E402
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start(*args):
+    """Start run_server.py on a free port; returns (process, API base URL, GM token)."""
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-u", str(ROOT / "run_server.py"), "--port", str(port), *args],
+        cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    token = None
+    for line in server.stdout:
+        token = token or next(iter(re.findall(r"/gm\?token=(\S+)", line)), None)
+        if line.startswith("Press Ctrl+C"):
+            break
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}/api", token
+
+
+def _add_character(base, token, name):
+    request = urllib.request.Request(
+        f"{base}/characters?token={token}", data=json.dumps({"name": name}).encode(),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    response = urllib.request.urlopen(request, timeout=5)
+    assert response.status == 201
+    return json.loads(response.read())["character"]
+
+
+def test_streams_leave_threads_for_requests():
+    """Live update streams should never take every worker thread."""
+    from mausritter.server.production import stream_limit
+
+    assert stream_limit(64) == 32
+    assert stream_limit(1) == 0
+
+
+class TestProductionServer:
+    """The waitress server should serve the app and stop without losing state."""
+
+    def test_serves_and_flushes_on_sigterm(self, tmp_path):
+        """SIGTERM should end open streams and leave everything in a snapshot."""
+        server, base, token = _start("--production", "--threads", "4", "--data-dir", str(tmp_path))
+        try:
+            _add_character(base, token, "Pip")
+            stream = urllib.request.urlopen(f"{base}/events?token={token}", timeout=5)
+
+            start = time.monotonic()
+            server.send_signal(signal.SIGTERM)
+            assert server.wait(timeout=10) == 0
+            assert time.monotonic() - start < 4
+            stream.read()
+        finally:
+            server.kill()
+            server.stdout.close()
+
+        log = next(tmp_path.glob("*/session.log"))
+        assert log.stat().st_size == 0
+        store = MemorySessionStore(tmp_path)
+        store.load()
+        [table] = store.list_sessions()
+        assert store.get(table["id"]).get_all_characters()
+
+    def test_workers_share_tables_and_events(self, tmp_path):
+        """Every worker should serve the same tables and stream every change."""
+        server, base, token = _start(
+            "--sqlite", "--workers", "2", "--threads", "8", "--data-dir", str(tmp_path)
+        )
+        try:
+            streams = [urllib.request.urlopen(f"{base}/events?token={token}", timeout=5)
+                       for _ in range(4)]
+            names = [f"Mouse {i}" for i in range(8)]
+            for name in names:
+                _add_character(base, token, name)
+            listed = json.loads(urllib.request.urlopen(f"{base}/characters?token={token}").read())
+            assert sorted(c["name"] for c in listed.values()) == names
+
+            for stream in streams:
+                seen = []
+                while len(seen) < len(names):
+                    line = stream.readline().decode()
+                    if line.startswith("data: "):
+                        seen.append(json.loads(line[6:])["character"]["name"])
+                assert seen == names
+
+            server.send_signal(signal.SIGTERM)
+            assert server.wait(timeout=15) == 0
+        finally:
+            server.kill()
+            server.stdout.close()
@@ -0,0 +1,123 @@
+"""Tests for profiling the running server."""
+
+import sys
+import threading
+
+import pytest
+
+pytest.importorskip("flask")
+
+from mausritter.server.profiling import _sampling, sample_stacks  # noqa: E402
+from mausritter.server.session import game_session  # noqa: E402
+
+
+def busy_mouse(stop):
+    """Keep a thread working until told to stop."""
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class TestSampling:
+    """Tests for sampling thread stacks."""
+
+    def test_busy_threads_are_sampled(self):
+        """Working threads should show up; waiting ones only when asked for."""
+        stop = threading.Event()
+        busy = threading.Thread(target=busy_mouse, args=(stop,), name="busy")
+        idle = threading.Thread(target=stop.wait, name="idle")
+        busy.start()
+        idle.start()
+        try:
+            stacks = sample_stacks(0.2)
+            with_idle = sample_stacks(0.2, include_idle=True)
+        finally:
+            stop.set()
+            busy.join()
+            idle.join()
+
+        lines = stacks.splitlines()
+        assert any(line.startswith("busy;") and "busy_mouse (test_profiling.py:" in line
+                   for line in lines)
+        assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+        assert not any(line.startswith("idle;") for line in lines)
+        assert any(line.startswith("idle;") for line in with_idle.splitlines())
+
+    def test_one_run_at_a_time(self):
+        """A second run while one is going should be refused."""
+        with _sampling:
+            assert sample_stacks(0.01) is None
+
+
+class TestProfileEndpoints:
+    """Tests for the debug profiling endpoints."""
+
+    def test_host_gm_only(self, client):
+        """Profiles should be for the host table's GM alone."""
+        assert client.get("/api/debug/profile?seconds=0.01").status_code == 401
+        other_token = client.post("/api/sessions").get_json()["gm_token"]
+        assert client.get(f"/api/debug/profile?token={other_token}").status_code == 403
+        response = client.get(
+            "/api/characters", headers={"X-Profile": other_token}
+        )
+        assert "X-Profile-Id" not in response.headers
+        client.delete(f"/api/session?token={other_token}")
+
+    def test_sample(self, client):
+        """A short run should return collapsed stacks as text."""
+        token = game_session.gm_token
+        assert client.get(f"/api/debug/profile?token={token}&seconds=x").status_code == 400
+        assert client.get(f"/api/debug/profile?token={token}&seconds=600").status_code == 400
+        response = client.get(f"/api/debug/profile?token={token}&seconds=0.05&idle=1")
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+
+    def test_request_profile(self, client, tmp_path):
+        """A request with the header should be profiled and its profile kept."""
+        import pstats
+
+        token = game_session.gm_token
+        char_id = game_session.add_character({"name": "Pip"})
+        response = client.patch(
+            f"/api/characters/{char_id}?token={token}", json={"notes": "map"},
+            headers={"X-Profile": token},
+        )
+        assert response.status_code == 200
+        profile_id = response.headers["X-Profile-Id"]
+        assert "X-Profile-Id" not in client.get(f"/api/characters?token={token}").headers
+
+        report = client.get(f"/api/debug/profile/{profile_id}?token={token}")
+        assert "update_character" in report.get_data(as_text=True)
+        dump = client.get(f"/api/debug/profile/{profile_id}?token={token}&format=pstats")
+        path = tmp_path / "request.pstats"
+        path.write_bytes(dump.data)
+        functions = {name for _, _, name in pstats.Stats(str(path)).stats}
+        assert "update_character" in functions
+        assert client.get(f"/api/debug/profile/999999?token={token}").status_code == 404
+
+    def test_profiling_doesnt_outlive_a_failed_request(self, client):
+        """A request that errors shouldn't leave the profiler running."""
+        token = game_session.gm_token
+        client.application.config["TESTING"] = False
+
+        @client.application.route("/boom")
+        def boom():
+            raise RuntimeError("boom")
+
+        # The test client runs the request on this thread
+        assert client.get("/boom", headers={"X-Profile": token}).status_code == 500
+        assert sys.getprofile() is None
+
+    def test_overlapping_profile_is_skipped(self, client, monkeypatch):
+        """A profile that can't start (3.12+, one already running) shouldn't fail the request."""
+        from mausritter.server import profiling
+
+        class BusyProfile:
+            def enable(self):
+                raise ValueError("Another profiling tool is already active")
+
+        monkeypatch.setattr(profiling.cProfile, "Profile", BusyProfile)
+        token = game_session.gm_token
+        response = client.get(f"/api/characters?token={token}", headers={"X-Profile": token})
+        assert response.status_code == 200
+        assert "X-Profile-Id" not in response.headers
+        assert response.headers["X-Profile-Skipped"]
@@ -0,0 +1,107 @@
+"""Tests for sharing one SQLite session database between workers."""
+
+import json
+import threading
+
+import pytest
+
+from mausritter.server.pubsub import LocalPubSub, PubSub, SQLitePubSub
+from mausritter.server.sqlite_store import SQLiteSessionStore
+
+
+@pytest.fixture(params=["local", "sqlite"])
+def workers(request, tmp_path):
+    """Two stores on one database, as two worker processes would have."""
+    path = tmp_path / "sessions.db"
+    if request.param == "local":
+        shared = LocalPubSub()
+        stores = [SQLiteSessionStore(path, pubsub=shared) for _ in range(2)]
+    else:
+        stores = [SQLiteSessionStore(path, pubsub=SQLitePubSub(path)) for _ in range(2)]
+    yield stores
+    for store in stores:
+        store.close()
+
+
+def _versions(broker, after, count):
+    """Versions of the next ``count`` events after ``after``, waiting for them."""
+    seen = []
+    while len(seen) < count:
+        events = broker.wait(after, timeout=5)
+        assert events, f"timed out after {seen}"
+        seen += [event.version for event in events]
+        after = seen[-1]
+    return seen
+
+
+class TestSharedSessions:
+    """Every worker should see the same sessions and the same events."""
+
+    def test_state_is_shared(self, workers):
+        """A change through one worker should be read back through the other."""
+        first, second = workers
+        session = first.create()
+        char_id = session.add_character({"name": "Pip"})
+        other = second.get(session.id)
+        assert other.get_character(char_id)["name"] == "Pip"
+        assert second.find_by_gm_token(session.gm_token).id == session.id
+
+    def test_events_reach_every_worker(self, workers):
+        """A stream served by one worker should carry another worker's changes."""
+        first, second = workers
+        session = first.create()
+        start = session.version
+        broker = second.get(session.id).events
+        char_id = session.add_character({"name": "Pip"})
+        session.update_character(char_id, {"notes": "map"})
+        assert _versions(broker, start, 2) == [start + 1, start + 2]
+        update = json.loads(broker.wait(start + 1, timeout=5)[0].data)
+        assert update["update"] == {"notes": "map"}
+
+    def test_concurrent_writers_publish_in_order(self, workers):
+        """Writes racing through both workers should reach both in version order."""
+        session = workers[0].create()
+        start = session.version
+        brokers = [store.get(session.id).events for store in workers]
+        char_id = session.add_character({"name": "Pip", "hp": 0})
+
+        def edit(store, n):
+            for i in range(n):
+                store.get(session.id).update_character(char_id, {"notes": str(i)})
+
+        threads = [threading.Thread(target=edit, args=(store, 25)) for store in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        expected = list(range(start + 1, start + 52))
+        assert [_versions(broker, start, 51) for broker in brokers] == [expected, expected]
+
+    def test_new_stream_catches_up(self, workers):
+        """A client that saw another worker's change shouldn't be told to resync."""
+        first, second = workers
+        session = first.create()
+        second.get(session.id).events
+        session.set_gm_notes("trap")
+        assert second.get(session.id).events.version == session.version
+
+    def test_delete_ends_streams_everywhere(self, workers):
+        """Deleting a session should end its streams in every worker."""
+        first, second = workers
+        session = first.create()
+        broker = second.get(session.id).events
+        assert first.delete(session.id)
+        assert broker.wait(broker.version, timeout=5) is None
+
+
+class TestPubSubInterface:
+    """Tests for the PubSub base class."""
+
+    def test_incomplete_pubsub_rejected(self):
+        """A pub/sub that can't stage or fetch should fail when created."""
+        class StageOnly(PubSub):
+            def stage(self, db, message):
+                pass
+
+        with pytest.raises(TypeError):
+            StageOnly()
@@ -0,0 +1,87 @@
+"""Unit tests for the dice RNG backends."""
+
+import random
+import threading
+from collections import Counter
+
+import pytest
+
+from mausritter.generator import generate_character, roll_attribute, roll_dice
+from mausritter.rng import BufferedRNG, DefaultRNG, DiceRNG, SeededRNG
+
+
+class TestBackends:
+    """Tests for the DiceRNG implementations."""
+
+    @pytest.mark.parametrize("rng", [DefaultRNG(), SeededRNG(1), BufferedRNG(1, block_size=16)])
+    def test_ranges(self, rng):
+        """d6, d66, randint and choice should stay within their ranges."""
+        d66 = {tens * 10 + ones for tens in range(1, 7) for ones in range(1, 7)}
+        for _ in range(200):
+            assert 1 <= rng.d6() <= 6
+            assert rng.d66() in d66
+            assert 1 <= rng.randint(1, 20) <= 20
+            assert rng.choice("abc") in "abc"
+
+    def test_default_follows_global_seed(self):
+        """The default backend should be reproducible with random.seed."""
+        random.seed(3)
+        first = generate_character(rng=DefaultRNG())
+        random.seed(3)
+        assert generate_character() == first
+
+    @pytest.mark.parametrize("backend", [SeededRNG, BufferedRNG])
+    def test_seeded_backends_reproducible(self, backend):
+        """The same seed should give the same characters."""
+        first = [generate_character(rng=backend(11)) for _ in range(5)]
+        second = [generate_character(rng=backend(11)) for _ in range(5)]
+        assert first == second
+
+    def test_seeded_backend_ignores_global_state(self):
+        """A private backend should not be affected by random.seed."""
+        rng_a, rng_b = SeededRNG(5), SeededRNG(5)
+        random.seed(1)
+        first = roll_dice(4, 6, rng_a)
+        random.seed(2)
+        assert roll_dice(4, 6, rng_b) == first
+
+    def test_buffered_reseed_discards_buffer(self):
+        """Re-seeding should restart the sequence from the new seed."""
+        rng = BufferedRNG(9)
+        first = [rng.d6() for _ in range(10)]
+        rng.seed(9)
+        assert [rng.d6() for _ in range(10)] == first
+
+    def test_buffered_distribution(self):
+        """Buffered d6 rolls should be uniform across block refills."""
+        rng = BufferedRNG(2, block_size=100)
+        counts = Counter(rng.d6() for _ in range(60000))
+        for face in range(1, 7):
+            assert counts[face] / 60000 == pytest.approx(1 / 6, abs=0.01)
+        attrs = Counter(roll_attribute(rng) for _ in range(20000))
+        assert min(attrs) >= 2 and max(attrs) <= 12
+
+    def test_buffered_shared_between_threads(self):
+        """Threads sharing a buffered backend should all get valid rolls."""
+        rng = BufferedRNG(4, block_size=64)
+        results = []
+
+        def roll():
+            results.extend(rng.d6() for _ in range(5000))
+
+        threads = [threading.Thread(target=roll) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 40000
+        assert set(results) == {1, 2, 3, 4, 5, 6}
+
+    def test_incomplete_backend_rejected(self):
+        """A backend missing randint or choice should fail when created."""
+        class OnlyRandint(DiceRNG):
+            def randint(self, a, b):
+                return a
+
+        with pytest.raises(TypeError):
+            OnlyRandint()
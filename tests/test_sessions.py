@@ -0,0 +1,402 @@
+"""Tests for the session stores behind the GM server."""
+
+import sqlite3
+import threading
+
+import pytest
+
+from mausritter.generator import generate_character
+from mausritter.rng import SeededRNG
+from mausritter.server.patch import PatchConflict, PatchError, VersionConflict
+from mausritter.server.session import (
+    CHARACTER_HISTORY,
+    GameSession,
+    MemorySessionStore,
+    SessionStore,
+)
+from mausritter.server.sqlite_store import SCHEMA, SQLiteSessionStore
+from mausritter.server.store import WriteAheadLog
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Each store backend, empty."""
+    if request.param == "memory":
+        yield MemorySessionStore()
+    else:
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        yield store
+        store.close()
+
+
+class TestSessionStore:
+    """Behaviour every SessionStore must share."""
+
+    def test_sessions_are_isolated(self, store):
+        """Characters added to one table shouldn't appear in another."""
+        first, second = store.create(), store.create()
+        first_id = first.add_character(generate_character(rng=SeededRNG(1)))
+        second_id = second.add_character(generate_character(rng=SeededRNG(2)))
+        assert first_id == second_id == "char_001"
+        assert first.get_character(first_id)["name"] != second.get_character(second_id)["name"]
+        assert len(first.get_all_characters()) == len(second.get_all_characters()) == 1
+
+    def test_lookup_by_token(self, store):
+        """GM and player tokens should find their own session."""
+        first, second = store.create(), store.create()
+        char_id = second.add_character({"name": "Pip"})
+        player_token = second.get_character(char_id)["player_token"]
+
+        assert store.find_by_gm_token(first.gm_token).id == first.id
+        assert store.find_by_gm_token(second.gm_token).id == second.id
+        session, character = store.find_by_player_token(player_token)
+        assert session.id == second.id and character["name"] == "Pip"
+        assert store.find_by_gm_token("nope") is None
+        assert store.find_by_gm_token("") is None
+        assert store.find_by_player_token("nope") is None
+
+    def test_session_interface(self, store):
+        """Session objects should behave like GameSession."""
+        session = store.create()
+        char_id = session.add_character(generate_character(rng=SeededRNG(3)))
+        assert session.update_character(char_id, {"hp": {"current": 1}, "id": "hacked"})
+        assert session.get_character(char_id)["hp"]["current"] == 1
+        assert session.get_character(char_id)["id"] == char_id
+        assert not session.update_character("char_999", {"notes": "x"})
+
+        session.set_session_name("Mill Ambush")
+        session.set_gm_notes("secret door")
+        session.update_session_data({"turn_count": 3})
+        state = session.get_state()
+        assert state["session_name"] == "Mill Ambush"
+        assert state["gm_notes"] == "secret door"
+        assert state["session_data"]["turn_count"] == 3
+        assert list(state["characters"]) == [char_id]
+
+        assert session.delete_character(char_id)
+        assert not session.delete_character(char_id)
+        assert session.get_all_characters() == {}
+
+    def test_reset_and_json_round_trip(self, store):
+        """Reset should clear a table; from_json should restore it with a new GM token."""
+        session = store.create()
+        session.add_character({"name": "Pip"})
+        session.set_session_name("Saved")
+        exported = session.to_json()
+        old_token = session.gm_token
+
+        session.reset()
+        assert session.get_all_characters() == {}
+        assert session.gm_token != old_token
+
+        assert session.from_json(exported)
+        assert session.get_state()["session_name"] == "Saved"
+        assert session.add_character({"name": "Next"}) == "char_002"
+        assert not session.from_json("not json")
+
+    def test_invalid_file_changes_nothing(self, store):
+        """A malformed file should be rejected without touching the table."""
+        session = store.create()
+        session.add_character({"name": "Pip"})
+        state, gm_token = session.get_state(), session.gm_token
+        for bad in ('{"session": {"characters": {"char_001": 5}}}',
+                    '{"session": {"session_name": "x", "combat": []}}',
+                    '{"session": []}', '[]', '{}'):
+            assert not session.from_json(bad)
+            assert session.get_state() == state
+            assert session.gm_token == gm_token
+
+    def test_load_into_second_table(self, store):
+        """Loading one file into two tables should give each its own player tokens."""
+        first, second = store.create(), store.create()
+        first.add_character({"name": "Pip"})
+        assert second.from_json(first.to_json())
+        (pip,) = first.get_all_characters().values()
+        (copy,) = second.get_all_characters().values()
+        assert copy["name"] == "Pip" and copy["player_token"] != pip["player_token"]
+        assert store.find_by_player_token(pip["player_token"])[0].id == first.id
+        assert store.find_by_player_token(copy["player_token"])[0].id == second.id
+
+    def test_epoch_changes_on_reset_and_load(self, store):
+        """Each reset and load should start a new epoch; edits shouldn't."""
+        session = store.create()
+        epoch = session.epoch
+        session.add_character({"name": "Pip"})
+        assert session.epoch == epoch
+        exported = session.to_json()
+        session.reset()
+        assert session.epoch != epoch
+        epoch = session.epoch
+        assert session.from_json(exported)
+        assert session.epoch != epoch
+
+    def test_patch_character(self, store):
+        """JSON Patches should apply atomically on every backend."""
+        session = store.create()
+        char_id = session.add_character({"name": "Pip", "hp": {"current": 3, "max": 3}})
+        version = session.version
+        assert session.patch_character(char_id, [{"op": "replace", "path": "/hp/current", "value": 1}])
+        assert session.get_character(char_id)["hp"] == {"current": 1, "max": 3}
+        assert session.version > version
+
+        with pytest.raises(PatchConflict):
+            session.patch_character(char_id, [
+                {"op": "replace", "path": "/name", "value": "Tam"},
+                {"op": "test", "path": "/hp/current", "value": 3},
+            ])
+        assert session.get_character(char_id)["name"] == "Pip"
+        assert not session.patch_character("char_999", [])
+
+    def test_character_versions(self, store):
+        """Each change to a character should bump its own version."""
+        session = store.create()
+        char_id = session.add_character({"name": "Pip", "notes": ""})
+        other = session.add_character({"name": "Tam"})
+        assert session.get_character(char_id)["version"] == 1
+        assert session.update_character(char_id, {"notes": "map", "version": 9}) == 2
+        assert session.patch_character(char_id, [{"op": "test", "path": "/version", "value": 2}]) == 3
+        assert session.get_character(char_id)["version"] == 3
+        assert session.get_character(other)["version"] == 1
+        with pytest.raises(PatchError):
+            session.patch_character(char_id, [{"op": "replace", "path": "/version", "value": 1}])
+
+    def test_stale_version_conflicts(self, store):
+        """Edits based on an old version should fail with what changed since."""
+        session = store.create()
+        char_id = session.add_character({"name": "Pip", "hp": {"current": 3}})
+        session.update_character(char_id, {"hp": {"current": 2}})
+
+        with pytest.raises(VersionConflict) as conflict:
+            session.patch_character(
+                char_id, [{"op": "replace", "path": "/name", "value": "Tam"}], expected_version=1
+            )
+        assert conflict.value.version == 2
+        assert {"op": "replace", "path": "/hp/current", "value": 2} in conflict.value.delta
+        assert session.get_character(char_id)["name"] == "Pip"
+        assert session.update_character(char_id, {"name": "Tam"}, expected_version=2) == 3
+
+        for n in range(CHARACTER_HISTORY):
+            session.update_character(char_id, {"notes": str(n)})
+        with pytest.raises(VersionConflict) as conflict:
+            session.update_character(char_id, {"name": "Pip"}, expected_version=1)
+        assert conflict.value.delta is None
+        assert conflict.value.character["name"] == "Tam"
+
+    def test_list_and_delete(self, store):
+        """Listing should show every table; deleting removes one."""
+        first, second = store.create(), store.create()
+        first.add_character({"name": "Pip"})
+        tables = {table["id"]: table for table in store.list_sessions()}
+        assert tables[first.id]["characters"][0]["name"] == "Pip"
+        assert tables[second.id]["characters"] == []
+
+        assert store.delete(first.id)
+        assert store.get(first.id) is None
+        assert not store.delete(first.id)
+        assert store.default().id == second.id
+
+    def test_concurrent_updates(self, store):
+        """Parallel updates to different characters should all land."""
+        session = store.create()
+        ids = [session.add_character({"name": f"Mouse {i}", "notes": ""}) for i in range(4)]
+
+        def write(char_id):
+            for n in range(25):
+                session.update_character(char_id, {"notes": str(n)})
+
+        threads = [threading.Thread(target=write, args=(char_id,)) for char_id in ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(session.get_character(char_id)["notes"] == "24" for char_id in ids)
+
+
+    def test_incomplete_store_rejected(self):
+        """A store missing part of the interface should fail when created."""
+        class NoDelete(SessionStore):
+            def create(self):
+                return None
+
+        with pytest.raises(TypeError):
+            NoDelete()
+
+
+class TestPersistence:
+    """Restarting a server should bring its tables back."""
+
+    def test_memory_store_logs_each_table(self, tmp_path):
+        """Per-table logs should restore every table."""
+        store = MemorySessionStore(tmp_path)
+        store.add(GameSession())
+        table = store.create()
+        table.add_character({"name": "Pip"})
+
+        restarted = MemorySessionStore(tmp_path)
+        restarted.add(GameSession())
+        assert restarted.load() == 1
+        assert restarted.get(table.id).get_state() == table.get_state()
+
+    def test_sqlite_store_reopens(self, tmp_path):
+        """A reopened database should have the same tables."""
+        store = SQLiteSessionStore(tmp_path / "sessions.db")
+        table = store.create()
+        table.add_character({"name": "Pip"})
+        store.close()
+
+        reopened = SQLiteSessionStore(tmp_path / "sessions.db")
+        assert reopened.find_by_gm_token(table.gm_token).get_state() == table.get_state()
+        assert reopened.get(table.id).epoch == table.epoch
+        reopened.close()
+
+    def test_sqlite_store_adds_epoch_column(self, tmp_path):
+        """A database from before epochs should be upgraded on open."""
+        path = tmp_path / "sessions.db"
+        db = sqlite3.connect(path)
+        db.executescript(SCHEMA.replace(",\n    epoch TEXT NOT NULL DEFAULT ''", ""))
+        db.close()
+        store = SQLiteSessionStore(path)
+        assert store.create().epoch
+        store.close()
+
+    def test_epoch_survives_restart(self, tmp_path):
+        """A restarted memory store should keep each table's epoch."""
+        session = GameSession()
+        session.open_store(WriteAheadLog(tmp_path))
+        epoch = session.epoch
+        session.close_store()
+
+        restarted = GameSession()
+        restarted.open_store(WriteAheadLog(tmp_path))
+        assert restarted.epoch == epoch
+        restarted.close_store()
+
+
+    def test_patch_replays(self, tmp_path):
+        """Patches should be logged and replayed; rejected ones shouldn't."""
+        store = MemorySessionStore(tmp_path)
+        store.add(GameSession())
+        session = store.default()
+        char_id = session.add_character({"name": "Pip", "notes": ""})
+        session.patch_character(char_id, [{"op": "replace", "path": "/notes", "value": "map"}])
+        with pytest.raises(PatchError):
+            session.patch_character(char_id, [{"op": "remove", "path": "/missing"}])
+
+        restarted = MemorySessionStore(tmp_path)
+        restarted.add(GameSession())
+        assert restarted.default().get_character(char_id)["notes"] == "map"
+        assert restarted.default().get_character(char_id)["version"] == 2
+
+
+class TestTokenIndex:
+    """The player token index must track every way characters change."""
+
+    def test_add_and_delete(self):
+        """Deleted characters should no longer be found by token."""
+        session = GameSession()
+        char_id = session.add_character({"name": "Pip"})
+        token = session.get_character(char_id)["player_token"]
+        assert session.get_character_by_token(token)["id"] == char_id
+
+        session.delete_character(char_id)
+        assert session.get_character_by_token(token) is None
+
+    def test_token_cannot_be_changed(self):
+        """Updates that try to change the token should leave the index valid."""
+        session = GameSession()
+        char_id = session.add_character({"name": "Pip"})
+        token = session.get_character(char_id)["player_token"]
+        session.update_character(char_id, {"player_token": "stolen"})
+        assert session.get_character_by_token(token)["id"] == char_id
+        assert session.get_character_by_token("stolen") is None
+
+    def test_reset_and_load(self):
+        """Reset should empty the index; loading should rebuild it."""
+        session = GameSession()
+        char_id = session.add_character({"name": "Pip"})
+        token = session.get_character(char_id)["player_token"]
+        exported = session.to_json()
+
+        session.reset()
+        assert session.get_character_by_token(token) is None
+        assert session.from_json(exported)
+        assert session.get_character_by_token(token)["name"] == "Pip"
+
+    def test_replay(self, tmp_path):
+        """Sessions restored from a log should find characters by token."""
+        store = MemorySessionStore(tmp_path)
+        store.add(GameSession())
+        session = store.default()
+        char_id = session.add_character({"name": "Pip"})
+        token = session.get_character(char_id)["player_token"]
+
+        restarted = MemorySessionStore(tmp_path)
+        restarted.add(GameSession())
+        assert restarted.default().get_character_by_token(token)["id"] == char_id
+
+
+class TestSnapshots:
+    """Readers get immutable, versioned snapshots that share unchanged data."""
+
+    def test_old_snapshot_unchanged(self):
+        """Writes should publish a new snapshot, leaving old ones intact."""
+        session = GameSession()
+        char_id = session.add_character({"name": "Pip", "hp": {"current": 3, "max": 3}})
+        before = session.snapshot()
+        session.update_character(char_id, {"hp": {"current": 1}})
+        session.set_session_name("Later")
+
+        assert before.characters[char_id]["hp"] == {"current": 3, "max": 3}
+        assert before.state["session_name"] == "New Session"
+        assert session.get_character(char_id)["hp"] == {"current": 1, "max": 3}
+        assert session.snapshot().version > before.version
+
+    def test_unchanged_data_is_shared(self):
+        """Only the changed character, and only its changed paths, should be copied."""
+        session = GameSession()
+        first = session.add_character(
+            {"name": "Pip", "hp": {"current": 3}, "inventory": {"pack": []}}
+        )
+        second = session.add_character({"name": "Tam"})
+        before = session.snapshot()
+        session.update_character(first, {"hp": {"current": 2}})
+        after = session.snapshot()
+
+        assert after.characters[second] is before.characters[second]
+        assert after.characters[first] is not before.characters[first]
+        assert after.characters[first]["inventory"] is before.characters[first]["inventory"]
+
+    def test_readers_never_block(self):
+        """Taking a snapshot should not wait on writers' locks."""
+        session = GameSession()
+        session.add_character({"name": "Pip"})
+        with session._exclusive():
+            assert "char_001" in session.snapshot().characters
+
+    def test_version_survives_restart(self, tmp_path):
+        """A restored session should continue from the same version."""
+        store = MemorySessionStore(tmp_path)
+        store.add(GameSession())
+        session = store.default()
+        session.add_character({"name": "Pip"})
+        session.set_gm_notes("x")
+        version = session.version
+
+        restarted = MemorySessionStore(tmp_path)
+        restarted.add(GameSession())
+        assert restarted.default().version == version
+
+    def test_store_versions(self, store):
+        """Every backend should bump the version on each change."""
+        session = store.create()
+        versions = [session.version]
+        char_id = session.add_character({"name": "Pip"})
+        versions.append(session.version)
+        session.update_character(char_id, {"notes": "x"})
+        versions.append(session.version)
+        session.reset()
+        versions.append(session.version)
+        assert versions == sorted(set(versions))
+        snapshot = session.snapshot()
+        assert snapshot.version == session.version
+        assert snapshot.characters == {}
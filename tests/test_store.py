@@ -0,0 +1,143 @@
+"""Unit tests for the durable session store."""
+
+import json
+
+import pytest
+
+from mausritter.generator import generate_character
+from mausritter.rng import SeededRNG
+from mausritter.server.session import GameSession
+from mausritter.server.store import WriteAheadLog
+
+
+def _open(path, compact_every=1000):
+    """A session attached to a log in path."""
+    session = GameSession()
+    restored = session.open_store(WriteAheadLog(path, compact_every=compact_every))
+    return session, restored
+
+
+def _mutate(session):
+    """Apply one of each kind of logged mutation."""
+    rng = SeededRNG(1)
+    first = session.add_character(generate_character(rng=rng))
+    second = session.add_character(generate_character(rng=rng))
+    session.update_character(first, {"hp": {"current": 1}, "notes": "hurt"})
+    session.delete_character(second)
+    session.set_gm_notes("ambush at the mill")
+    session.set_session_name("Thursday")
+    session.update_session_data({"turn_count": 4})
+    return first
+
+
+class TestWriteAheadLog:
+    """Tests for WriteAheadLog and GameSession replay."""
+
+    def test_fresh_store(self, tmp_path):
+        """An empty directory should start a new session."""
+        session, restored = _open(tmp_path)
+        assert not restored
+        assert (tmp_path / "snapshot.json").exists()
+
+    def test_replay_after_crash(self, tmp_path):
+        """State should be rebuilt from the log without a final snapshot."""
+        session, _ = _open(tmp_path)
+        first = _mutate(session)
+        # No close_store: simulate a crash
+
+        recovered, restored = _open(tmp_path)
+        assert restored
+        assert recovered.get_state() == session.get_state()
+        assert recovered.gm_token == session.gm_token
+        assert recovered.get_character(first)["hp"]["current"] == 1
+        assert recovered.add_character({"name": "Next"}) == "char_003"
+
+    def test_log_records_only_changes(self, tmp_path):
+        """An update should log the patch, not the whole character."""
+        session, _ = _open(tmp_path)
+        char_id = session.add_character(generate_character(rng=SeededRNG(2)))
+        size = (tmp_path / "session.log").stat().st_size
+        session.update_character(char_id, {"notes": "x"})
+        record = (tmp_path / "session.log").read_text().splitlines()[-1]
+        assert json.loads(record)["args"] == {"char_id": char_id, "updates": {"notes": "x"}}
+        assert (tmp_path / "session.log").stat().st_size - size == len(record) + 1
+
+    def test_compaction(self, tmp_path):
+        """The log should be folded into the snapshot every compact_every records."""
+        session, _ = _open(tmp_path, compact_every=3)
+        for turn in range(7):
+            session.update_session_data({"turn_count": turn})
+        assert len((tmp_path / "session.log").read_text().splitlines()) == 1
+
+        recovered, _ = _open(tmp_path)
+        assert recovered.get_session_data()["turn_count"] == 6
+
+    def test_torn_write_ignored(self, tmp_path):
+        """A partial last line from a crash should be dropped on replay."""
+        session, _ = _open(tmp_path)
+        session.set_gm_notes("kept")
+        with open(tmp_path / "session.log", "a") as f:
+            f.write('{"seq": 99, "op": "set_gm')
+
+        recovered, _ = _open(tmp_path)
+        assert recovered.get_state()["gm_notes"] == "kept"
+
+    def test_writes_after_torn_tail_survive_restarts(self, tmp_path):
+        """Records appended after a torn tail should not be lost at the next restart."""
+        session, _ = _open(tmp_path)
+        session.set_gm_notes("one")
+        with open(tmp_path / "session.log", "a") as f:
+            f.write('{"seq": 99, "op": "set_gm')
+
+        session, _ = _open(tmp_path)
+        session.set_gm_notes("two")
+        session, _ = _open(tmp_path)
+        assert session.get_state()["gm_notes"] == "two"
+        session.set_gm_notes("three")
+
+        recovered, _ = _open(tmp_path)
+        assert recovered.get_state()["gm_notes"] == "three"
+        assert all(json.loads(line) for line in (tmp_path / "session.log").read_text().splitlines())
+
+    def test_failed_mutation_not_logged(self, tmp_path):
+        """A mutation that fails shouldn't leave a record that breaks replay."""
+        session, _ = _open(tmp_path)
+        char_id = session.add_character({"name": "Pip"})
+        size = (tmp_path / "session.log").stat().st_size
+        with pytest.raises(AttributeError):
+            session.update_character(char_id, ["not", "an", "update"])
+        with pytest.raises(TypeError):
+            session.update_session_data(["turn_count"])
+        assert (tmp_path / "session.log").stat().st_size == size
+
+        recovered, _ = _open(tmp_path)
+        assert recovered.get_character(char_id)["name"] == "Pip"
+
+    def test_stale_records_skipped(self, tmp_path):
+        """Records already in the snapshot should not be applied twice."""
+        session, _ = _open(tmp_path)
+        session.update_session_data({"turn_count": 2})
+        log = (tmp_path / "session.log").read_text()
+        session.checkpoint()
+        # Crash between writing the snapshot and truncating the log
+        (tmp_path / "session.log").write_text(log)
+        session.update_session_data({"turn_count": 3})
+
+        recovered, _ = _open(tmp_path)
+        assert recovered.get_session_data()["turn_count"] == 3
+
+    @pytest.mark.parametrize("action", ["reset", "load"])
+    def test_whole_session_changes_snapshot(self, tmp_path, action):
+        """New and loaded sessions should survive a restart too."""
+        session, _ = _open(tmp_path)
+        _mutate(session)
+        if action == "reset":
+            session.reset()
+        else:
+            other = GameSession()
+            other.set_session_name("Loaded")
+            assert session.from_json(other.to_json())
+
+        recovered, _ = _open(tmp_path)
+        assert recovered.get_state() == session.get_state()
+        assert recovered.gm_token == session.gm_token
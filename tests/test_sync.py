@@ -0,0 +1,111 @@
+"""Tests for WebSocket sync of character sheets."""
+
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("flask")
+
+from mausritter.server import create_app  # noqa: E402
+from mausritter.server.routes.sync import apply_frame  # noqa: E402
+from mausritter.server.session import GameSession, game_session  # noqa: E402
+
+
+def _frame(**message):
+    return json.dumps(message)
+
+
+class TestApplyFrame:
+    """Edit frames should behave like the REST PATCH endpoint."""
+
+    def test_ack_with_version(self):
+        """Applied edits should be acked with a version that includes them."""
+        session = GameSession()
+        char_id = session.add_character({"name": "Pip", "notes": ""})
+        reply = apply_frame(session, char_id, _frame(
+            seq=1, patch=[{"op": "replace", "path": "/notes", "value": "map"}]
+        ))
+        assert reply == {"ack": 1, "version": session.version, "character_version": 2}
+        reply = apply_frame(session, char_id, _frame(seq=2, update={"name": "Tam"}))
+        assert reply["ack"] == 2
+        assert session.get_character(char_id)["name"] == "Tam"
+
+    def test_nacks(self):
+        """Refused edits should carry the status REST would return."""
+        session = GameSession()
+        char_id = session.add_character({"name": "Pip"})
+        conflict = apply_frame(session, char_id, _frame(
+            seq=1, patch=[{"op": "test", "path": "/name", "value": "Tam"}]
+        ))
+        assert (conflict["nack"], conflict["status"]) == (1, 409)
+        assert apply_frame(session, char_id, _frame(
+            seq=2, patch=[{"op": "remove", "path": "/id"}]
+        ))["status"] == 400
+        assert apply_frame(session, "char_999", _frame(seq=3, update={}))["status"] == 404
+        assert apply_frame(session, char_id, _frame(seq=4))["status"] == 400
+        assert apply_frame(session, char_id, "not json")["status"] == 400
+        assert apply_frame(session, char_id, _frame(seq=5, if_match="1", update={}))["status"] == 400
+
+    def test_version_conflict(self):
+        """A stale if_match should be nacked with what changed since."""
+        session = GameSession()
+        char_id = session.add_character({"name": "Pip", "notes": ""})
+        session.update_character(char_id, {"notes": "map"})
+        reply = apply_frame(session, char_id, _frame(seq=1, if_match=1, update={"name": "Tam"}))
+        assert reply["status"] == 409 and reply["character_version"] == 2
+        assert reply["delta"] == [
+            {"op": "replace", "path": "/notes", "value": "map"},
+            {"op": "replace", "path": "/version", "value": 2},
+        ]
+        assert apply_frame(session, char_id, _frame(seq=2, if_match=2, update={"name": "Tam"}))["ack"] == 2
+
+
+class TestSyncSocket:
+    """End to end over a real server."""
+
+    @pytest.fixture
+    def server(self):
+        """The app served on a local port."""
+        pytest.importorskip("flask_sock")
+        from werkzeug.serving import make_server
+
+        game_session.reset()
+        server = make_server("127.0.0.1", 0, create_app(), threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield f"ws://127.0.0.1:{server.server_port}/api/sync"
+        server.shutdown()
+
+    def test_edits_acks_and_updates(self, server):
+        """Edits should be acked and GM changes pushed on the same socket."""
+        from simple_websocket import Client
+
+        char_id = game_session.add_character({"name": "Pip", "hp": {"current": 3}})
+        token = game_session.get_character(char_id)["player_token"]
+        ws = Client.connect(
+            f"{server}?token={token}&character={char_id}&since={game_session.version}"
+        )
+        try:
+            ws.send(_frame(seq=1, patch=[{"op": "replace", "path": "/name", "value": "Tam"}]))
+            replies = [json.loads(ws.receive(timeout=5)) for _ in range(2)]
+            ack = next(reply for reply in replies if "ack" in reply)
+            echo = next(reply for reply in replies if "event" in reply)
+            assert ack == {"ack": 1, "version": echo["version"], "character_version": 2}
+
+            game_session.update_character(char_id, {"hp": {"current": 1}})
+            pushed = json.loads(ws.receive(timeout=5))
+            assert pushed["event"] == "character"
+            assert pushed["update"] == {"hp": {"current": 1}}
+        finally:
+            ws.close()
+
+    def test_rejects_other_characters(self, server):
+        """A player token shouldn't open a socket for someone else's mouse."""
+        from simple_websocket import Client, ConnectionClosed
+
+        mine = game_session.add_character({"name": "Pip"})
+        other = game_session.add_character({"name": "Tam"})
+        token = game_session.get_character(mine)["player_token"]
+        ws = Client.connect(f"{server}?token={token}&character={other}")
+        with pytest.raises(ConnectionClosed):
+            ws.receive(timeout=5)